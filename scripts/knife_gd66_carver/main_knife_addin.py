@@ -6,15 +6,19 @@ og oppretter nødvendige brukerparametere uten å modellere geometri direkte.
 """
 import math
 from dataclasses import dataclass
-from typing import Dict, List, Sequence
+from typing import Dict, List, Sequence, Tuple
 
 import adsk.core
 import adsk.fusion
 
 from scripts.shared.config_loader import load_machine_park, load_material_catalog
+from scripts.shared.entity_tags import AttributeIndex, tag_entity
+from scripts.shared.face_index import FaceIndex
+from scripts.shared.parameter_snapshot import ParameterSnapshot
 
 ID_TAG = "codex_fusionapi_v1.2"
 _COMPLIANCE_BANNER = f"COMPLIANCE BANNER :: ID {ID_TAG} :: knife_gd66_carver"
+_MANUFACTURING_GROUP = "ManufacturingLayer"
 
 
 @dataclass
@@ -96,6 +100,14 @@ MANUFACTURING_LAYER: Dict[str, List[str]] = {
 }
 
 
+# Navngitte flater som kan finnes entydig fra geometrien: utadrettet normal
+# i komponentens koordinater (bladprofilen ligger i XY med ryggen mot +Y).
+# Øvrige flater (slip, buk, tupp) må merkes av byggeren som lager dem.
+NAMED_FACE_NORMALS: Dict[str, Tuple[float, float, float]] = {
+    "spine_ground": (0.0, 1.0, 0.0),
+}
+
+
 def _apply_user_parameters(design: adsk.fusion.Design) -> None:
     """Oppretter eller oppdaterer alle brukerparametere i ParameterLayer."""
 
@@ -126,11 +138,12 @@ def _compose_status_message() -> str:
     )
 
 
-def _get_param_value(design: adsk.fusion.Design, name: str) -> float:
-    user_param = design.userParameters.itemByName(name)
-    if not user_param:
-        raise ValueError(f"Mangler brukerparameter: {name}")
-    return float(user_param.value)
+def _read_parameters(design: adsk.fusion.Design) -> ParameterSnapshot:
+    """Leser ParameterLayer én gang: lengder i cm (skisseenhet), vinkler i grader."""
+
+    names = [spec.name for spec in PARAMETER_LAYER]
+    angle_units = {spec.name: "deg" for spec in PARAMETER_LAYER if spec.expression.endswith(" deg")}
+    return ParameterSnapshot.from_design(design, angle_units, names=names)
 
 
 def _ensure_component(
@@ -159,14 +172,14 @@ def _ensure_sketch(
     return sketch
 
 
-def _draw_blade_profile(design: adsk.fusion.Design, sketch: adsk.fusion.Sketch) -> None:
-    blade_length = _get_param_value(design, "blade_length")
-    blade_width_raw = _get_param_value(design, "blade_width_raw")
-    blade_width_final = _get_param_value(design, "blade_width_final")
-    taper_ratio = _get_param_value(design, "taper_ratio")
-    tip_height = _get_param_value(design, "tip_height")
-    ricasso_length = _get_param_value(design, "ricasso_length")
-    bevel_angle = _get_param_value(design, "bevel_angle_deg")
+def _draw_blade_profile(params: ParameterSnapshot, sketch: adsk.fusion.Sketch) -> None:
+    blade_length = params.require("blade_length")
+    blade_width_raw = params.require("blade_width_raw")
+    blade_width_final = params.require("blade_width_final")
+    taper_ratio = params.require("taper_ratio")
+    tip_height = params.require("tip_height")
+    ricasso_length = params.require("ricasso_length")
+    bevel_angle = params.require("bevel_angle_deg")
 
     lines = sketch.sketchCurves.sketchLines
     splines = sketch.sketchCurves.sketchFittedSplines
@@ -220,19 +233,17 @@ def _draw_blade_profile(design: adsk.fusion.Design, sketch: adsk.fusion.Sketch)
     )
     tip_guide.isConstruction = True
 
-    bevel_height = math.tan(math.radians(bevel_angle)) * _get_param_value(
-        design, "spine_thickness_final"
-    )
+    bevel_height = math.tan(math.radians(bevel_angle)) * params.require("spine_thickness_final")
     bevel_anchor = adsk.core.Point3D.create(blade_length * 0.25, bevel_height, 0)
     bevel_line = lines.addByTwoPoints(bevel_anchor, adsk.core.Point3D.create(blade_length * 0.5, 0, 0))
     bevel_line.isConstruction = True
 
 
-def _draw_handle_profile(design: adsk.fusion.Design, sketch: adsk.fusion.Sketch) -> None:
-    handle_length = _get_param_value(design, "handle_length")
-    handle_thickness = _get_param_value(design, "handle_thickness")
-    palm_swell = _get_param_value(design, "palm_swell")
-    choil_clearance = _get_param_value(design, "choil_clearance")
+def _draw_handle_profile(params: ParameterSnapshot, sketch: adsk.fusion.Sketch) -> None:
+    handle_length = params.require("handle_length")
+    handle_thickness = params.require("handle_thickness")
+    palm_swell = params.require("palm_swell")
+    choil_clearance = params.require("choil_clearance")
 
     lines = sketch.sketchCurves.sketchLines
     splines = sketch.sketchCurves.sketchFittedSplines
@@ -273,13 +284,45 @@ def _draw_handle_profile(design: adsk.fusion.Design, sketch: adsk.fusion.Sketch)
     pinch_spline.isConstruction = True
 
 
-def _tag_named_faces(component: adsk.fusion.Component, faces: Sequence[str]) -> None:
+def _remove_face_placeholders(component: adsk.fusion.Component, faces: Sequence[str]) -> None:
+    """Fjerner plassholdere på komponentnivå fra eldre versjoner."""
+
     attribs = component.attributes
     for face_name in faces:
-        attribs.add("ManufacturingLayer", face_name, "placeholder")
+        placeholder = attribs.itemByName(_MANUFACTURING_GROUP, face_name)
+        if placeholder:
+            placeholder.deleteMe()
+
 
+def _tag_named_faces(
+    component: adsk.fusion.Component, faces: Sequence[str], index: AttributeIndex
+) -> List[str]:
+    """Merker flatene i ``faces`` på komponentens kropper.
 
-def _validate_material_and_process(design: adsk.fusion.Design) -> List[str]:
+    Flater som allerede er merket (finnes i ``index``) beholdes uten ny
+    skanning. Returnerer navnene som ikke kunne knyttes til en flate.
+    """
+
+    _remove_face_placeholders(component, faces)
+    face_index = None
+    untagged: List[str] = []
+    for face_name in faces:
+        if any(entity.body.parentComponent == component for entity in index.entities(face_name)):
+            continue
+        normal = NAMED_FACE_NORMALS.get(face_name)
+        face = None
+        if normal and component.bRepBodies.count > 0:
+            if face_index is None:
+                face_index = FaceIndex(face for body in component.bRepBodies for face in body.faces)
+            face = face_index.top_planar_face(normal)
+        if face is None:
+            untagged.append(face_name)
+            continue
+        tag_entity(face, _MANUFACTURING_GROUP, face_name)
+    return untagged
+
+
+def _validate_material_and_process(params: ParameterSnapshot) -> List[str]:
     errors: List[str] = []
     machine_cfg = load_machine_park()
     materials = load_material_catalog()
@@ -298,11 +341,11 @@ def _validate_material_and_process(design: adsk.fusion.Design) -> List[str]:
     lathe_cfg = machine_cfg.get("lathe", {})
     lathe_swing = float(lathe_cfg.get("swing_diameter_mm", 180.0))
 
-    blade_length = _get_param_value(design, "blade_length")
-    blade_width_raw = _get_param_value(design, "blade_width_raw")
-    spine_thickness_raw = _get_param_value(design, "spine_thickness_raw")
-    handle_length = _get_param_value(design, "handle_length")
-    handle_thickness = _get_param_value(design, "handle_thickness")
+    blade_length = params.in_unit("blade_length", "mm")
+    blade_width_raw = params.in_unit("blade_width_raw", "mm")
+    spine_thickness_raw = params.in_unit("spine_thickness_raw", "mm")
+    handle_length = params.in_unit("handle_length", "mm")
+    handle_thickness = params.in_unit("handle_thickness", "mm")
 
     if blade_length > cnc_x or blade_width_raw > cnc_y or spine_thickness_raw > cnc_z:
         errors.append(
@@ -337,6 +380,7 @@ def run(context: str) -> None:
         return
 
     _apply_user_parameters(design)
+    params = _read_parameters(design)
 
     root = design.rootComponent
     xy_plane = root.xYConstructionPlane
@@ -344,8 +388,8 @@ def run(context: str) -> None:
     blade_sketch = _ensure_sketch(root.sketches, xy_plane, "blade_profile_sketch")
     handle_sketch = _ensure_sketch(root.sketches, xy_plane, "handle_profile_sketch")
 
-    _draw_blade_profile(design, blade_sketch)
-    _draw_handle_profile(design, handle_sketch)
+    _draw_blade_profile(params, blade_sketch)
+    _draw_handle_profile(params, handle_sketch)
 
     blade_comp = _ensure_component(root, "blade_comp")
     handle_comp = _ensure_component(root, "handle_comp")
@@ -353,13 +397,17 @@ def run(context: str) -> None:
     scale_right = _ensure_component(root, "scale_right")
     wedge_body = _ensure_component(root, "wedge_body")
 
-    for comp in (blade_comp, handle_comp, scale_left, scale_right, wedge_body):
-        _tag_named_faces(comp, MANUFACTURING_LAYER["named_faces"])
+    for comp in (handle_comp, scale_left, scale_right, wedge_body):
+        _remove_face_placeholders(comp, MANUFACTURING_LAYER["named_faces"])
+    tag_index = AttributeIndex.from_design(design, _MANUFACTURING_GROUP)
+    untagged_faces = _tag_named_faces(blade_comp, MANUFACTURING_LAYER["named_faces"], tag_index)
 
-    validation_errors = _validate_material_and_process(design)
+    validation_errors = _validate_material_and_process(params)
 
     if ui:
         status = _compose_status_message()
+        if untagged_faces:
+            status += "\n\nFlater uten merke (mangler kropp eller regel): " + ", ".join(untagged_faces)
         if validation_errors:
             status += "\n\nValideringsfeil:\n" + "\n".join(validation_errors)
         else:
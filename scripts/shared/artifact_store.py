@@ -0,0 +1,147 @@
+# ID: codex_fusionapi_v1.9
+"""Innholdsadressert lager for genererte filer (eksporter, dokumenter, simulering).
+
+Filene lagres én gang under ``objects/<sha256>`` uansett hvor mange
+varianter som bruker dem. Hver variant (nøkkel = parameterhash) har et
+manifest ``variants/<nøkkel>.json`` som kobler artefakttype (f.eks.
+``export:frame:step``) til innholdshash og arbeidssti. Å gå tilbake til en
+variant som er bygget før er da bare å kopiere filene fra lageret til
+arbeidsstiene (``materialize``). Alle skriv er atomiske: ny fil ved siden
+av målet og ``os.replace``.
+
+Modulen importerer ikke ``adsk``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Set
+
+_CHUNK = 1 << 20
+
+
+def atomic_write_text(path: Path, text: str, newline: Optional[str] = None) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8", newline=newline) as handle:
+        handle.write(text)
+    os.replace(tmp_path, path)
+
+
+def atomic_copy(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + ".tmp")
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Lager under ``root``; arbeidsstier i manifestene er relative til ``workspace``."""
+
+    def __init__(self, root: Path, workspace: Path) -> None:
+        self.root = Path(root)
+        self.workspace = Path(workspace)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _manifest_path(self, variant: str) -> Path:
+        return self.root / "variants" / f"{variant}.json"
+
+    def _relative(self, path: Path) -> str:
+        path = Path(path)
+        try:
+            return path.resolve().relative_to(self.workspace.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    def load_manifest(self, variant: str) -> Dict[str, Dict[str, object]]:
+        try:
+            payload = json.loads(self._manifest_path(variant).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        artifacts = payload.get("artifacts") if isinstance(payload, dict) else None
+        return artifacts if isinstance(artifacts, dict) else {}
+
+    def _store_manifest(self, variant: str, artifacts: Mapping[str, Dict[str, object]]) -> None:
+        payload = {"variant": variant, "artifacts": dict(sorted(artifacts.items()))}
+        atomic_write_text(self._manifest_path(variant), json.dumps(payload, indent=2))
+
+    def put(self, path: Path) -> str:
+        """Legg ``path`` i lageret (hvis innholdet ikke finnes) og returner hashen."""
+
+        digest = file_digest(path)
+        target = self._object_path(digest)
+        if not target.exists():
+            atomic_copy(path, target)
+        return digest
+
+    def record(self, variant: str, paths: Mapping[str, Path]) -> int:
+        """Lagre filene i ``paths`` (artefakttype -> sti) for ``variant``.
+
+        Filer med samme størrelse og endringstid som i manifestet hashes ikke
+        på nytt. Returnerer antall artefakter som ble lagt til eller endret.
+        """
+
+        artifacts = self.load_manifest(variant)
+        changed = 0
+        for artifact, path in paths.items():
+            path = Path(path)
+            if not path.exists():
+                continue
+            stat = path.stat()
+            entry = artifacts.get(artifact, {})
+            if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+                continue
+            artifacts[artifact] = {
+                "path": self._relative(path),
+                "sha256": self.put(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+            changed += 1
+        if changed:
+            self._store_manifest(variant, artifacts)
+        return changed
+
+    def materialize(self, variant: str, paths: Mapping[str, Path]) -> Set[str]:
+        """Kopier lagrede artefakter for ``variant`` til stiene i ``paths``.
+
+        Returnerer artefakttypene som nå stemmer med varianten; filer som
+        allerede har riktig innhold kopieres ikke.
+        """
+
+        artifacts = self.load_manifest(variant)
+        restored: Set[str] = set()
+        touched = False
+        for artifact, path in paths.items():
+            entry = artifacts.get(artifact)
+            if not entry:
+                continue
+            digest = str(entry.get("sha256", ""))
+            source = self._object_path(digest)
+            if not source.exists():
+                continue
+            path = Path(path)
+            if not (path.exists() and path.stat().st_size == entry.get("size") and file_digest(path) == digest):
+                atomic_copy(source, path)
+            stat = path.stat()
+            if entry.get("mtime_ns") != stat.st_mtime_ns:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                touched = True
+            restored.add(artifact)
+        if touched:
+            self._store_manifest(variant, artifacts)
+        return restored
@@ -0,0 +1,62 @@
+# ID: codex_fusionapi_v1.9
+"""Merking av flater og kanter når de lages, og oppslag via attributtindeks.
+
+Byggerne kjenner flatene de nettopp har laget (``endFaces``,
+``sideFaces``) og merker dem med et attributt i en egen gruppe. Senere
+steg slår opp i ``AttributeIndex``, som henter alle attributtene i gruppen
+med ett ``design.findAttributes``-kall, i stedet for å skanne topologien.
+Modulen importerer ikke ``adsk``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def tag_entity(entity: Any, group: str, name: str, value: str = "") -> None:
+    """Merk ``entity`` (flate, kant, kropp) med ``group/name``."""
+
+    entity.attributes.add(group, name, value)
+
+
+def tag_entities(entities: Iterable[Any], group: str, name: str, value: str = "") -> int:
+    count = 0
+    for entity in entities:
+        tag_entity(entity, group, name, value)
+        count += 1
+    return count
+
+
+class AttributeIndex:
+    """``{navn: [entiteter]}`` for alle attributter i én gruppe."""
+
+    def __init__(self, attributes: Iterable[Any]) -> None:
+        self._entities: Dict[str, List[Any]] = {}
+        self._values: Dict[str, List[str]] = {}
+        for attribute in attributes:
+            entity = attribute.parent
+            # Attributter på slettede entiteter har ingen forelder.
+            if entity is None or not getattr(entity, "isValid", True):
+                continue
+            self._entities.setdefault(attribute.name, []).append(entity)
+            self._values.setdefault(attribute.name, []).append(attribute.value)
+
+    @classmethod
+    def from_design(cls, design: Any, group: str) -> "AttributeIndex":
+        return cls(design.findAttributes(group, ""))
+
+    def names(self) -> List[str]:
+        return sorted(self._entities)
+
+    def entities(self, name: str) -> List[Any]:
+        return list(self._entities.get(name, ()))
+
+    def first(self, name: str) -> Optional[Any]:
+        entities = self._entities.get(name)
+        return entities[0] if entities else None
+
+    def values(self, name: str) -> List[str]:
+        return list(self._values.get(name, ()))
+
+    def count(self, name: str) -> int:
+        return len(self._entities.get(name, ()))
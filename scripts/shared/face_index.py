@@ -0,0 +1,258 @@
+# ID: codex_fusionapi_v1.9
+"""Oppslag i flatene til en B-Rep-kropp uten å skanne topologien på nytt.
+
+Hvert ``face.geometry``/``pointOnFace``-kall går over COM-broen til Fusion.
+``FaceIndex`` leser geometrien til hver flate én gang og svarer deretter på
+«øverste plane flate», «sylindre med radius r ± tol» og «flater med normal
+n» fra cachen. Modulen importerer ikke ``adsk``; flater leses via
+attributtene i Fusion-API-et, så den kan også brukes med testobjekter.
+
+Lengder er i Fusion sine interne enheter (cm).
+
+Kjør ``python -m scripts.shared.face_index`` for en benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import math
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Samme verdier som adsk.core.SurfaceTypes.
+PLANE_SURFACE = 0
+CYLINDER_SURFACE = 1
+
+Vector = Tuple[float, float, float]
+
+_NORMAL_DIGITS = 6
+
+
+@dataclass(frozen=True)
+class FaceRecord:
+    face: Any
+    surface_type: int
+    point: Vector
+    normal: Optional[Vector] = None
+    radius: Optional[float] = None
+    axis: Optional[Vector] = None
+
+
+def _xyz(value: Any) -> Vector:
+    return (float(value.x), float(value.y), float(value.z))
+
+
+def _unit(vector: Sequence[float]) -> Vector:
+    length = math.sqrt(sum(component * component for component in vector))
+    if length == 0.0:
+        raise ValueError("Normalvektoren kan ikke ha lengde 0.")
+    return (vector[0] / length, vector[1] / length, vector[2] / length)
+
+
+def _dot(a: Vector, b: Vector) -> float:
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _normal_key(normal: Vector) -> Vector:
+    # + 0.0 gjør -0.0 til 0.0 slik at like normaler får samme nøkkel.
+    return tuple(round(component, _NORMAL_DIGITS) + 0.0 for component in normal)  # type: ignore[return-value]
+
+
+def _outward_normal(face: Any, geometry: Any, point: Any) -> Vector:
+    evaluator = getattr(face, "evaluator", None)
+    if evaluator is not None:
+        ok, normal = evaluator.getNormalAtPoint(point)
+        if ok:
+            return _unit(_xyz(normal))
+    # Uten evaluator: flatenormalen, snudd hvis parameterretningen er reversert.
+    normal = _unit(_xyz(geometry.normal))
+    if getattr(face, "isParamReversed", False):
+        normal = (-normal[0], -normal[1], -normal[2])
+    return normal
+
+
+def read_face(face: Any) -> FaceRecord:
+    """Les geometrien til én flate (de eneste API-kallene indeksen gjør)."""
+
+    geometry = face.geometry
+    surface_type = int(geometry.surfaceType)
+    point = face.pointOnFace
+    if surface_type == PLANE_SURFACE:
+        return FaceRecord(face, surface_type, _xyz(point), normal=_outward_normal(face, geometry, point))
+    if surface_type == CYLINDER_SURFACE:
+        return FaceRecord(
+            face,
+            surface_type,
+            _xyz(point),
+            radius=float(geometry.radius),
+            axis=_unit(_xyz(geometry.axis)),
+        )
+    return FaceRecord(face, surface_type, _xyz(point))
+
+
+class FaceIndex:
+    """Cache over flatene i en kropp (eller en vilkårlig samling flater)."""
+
+    def __init__(self, faces: Iterable[Any]) -> None:
+        self.records: List[FaceRecord] = [read_face(face) for face in faces]
+        self._planar = [record for record in self.records if record.surface_type == PLANE_SURFACE]
+        cylinders = sorted(
+            (record for record in self.records if record.surface_type == CYLINDER_SURFACE),
+            key=lambda record: record.radius,
+        )
+        self._cylinders = cylinders
+        self._cylinder_radii = [record.radius for record in cylinders]
+        self._by_normal: Dict[Vector, List[FaceRecord]] = {}
+        for record in self._planar:
+            self._by_normal.setdefault(_normal_key(record.normal), []).append(record)
+
+    @classmethod
+    def from_body(cls, body: Any) -> "FaceIndex":
+        return cls(body.faces)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def top_planar_face(self, direction: Vector = (0.0, 0.0, 1.0), tol: float = 1e-6) -> Optional[Any]:
+        """Plan flate med normal langs ``direction`` som ligger lengst ut i den retningen."""
+
+        direction = _unit(direction)
+        best: Optional[FaceRecord] = None
+        best_height = -math.inf
+        for record in self._planar:
+            if _dot(record.normal, direction) < 1.0 - tol:
+                continue
+            height = _dot(record.point, direction)
+            if height > best_height:
+                best, best_height = record, height
+        return best.face if best else None
+
+    def cylinders(self, radius: float, tol: float) -> List[Any]:
+        """Sylinderflater med radius i ``[radius - tol, radius + tol]``."""
+
+        lower = bisect.bisect_left(self._cylinder_radii, radius - tol)
+        upper = bisect.bisect_right(self._cylinder_radii, radius + tol)
+        return [record.face for record in self._cylinders[lower:upper]]
+
+    def faces_by_normal(self, direction: Vector, angle_tol_deg: float = 0.0) -> List[Any]:
+        """Plane flater med utadrettet normal lik ``direction`` (innen ``angle_tol_deg``)."""
+
+        direction = _unit(direction)
+        if angle_tol_deg <= 0.0:
+            return [record.face for record in self._by_normal.get(_normal_key(direction), [])]
+        limit = math.cos(math.radians(angle_tol_deg))
+        return [record.face for record in self._planar if _dot(record.normal, direction) >= limit]
+
+
+# --- Benchmark -------------------------------------------------------------
+
+
+class _CountingFace:
+    """Testflate som teller geometrilesinger, slik COM-kall ville blitt talt."""
+
+    reads = 0
+
+    def __init__(self, geometry: Any, point: Vector) -> None:
+        self._geometry = geometry
+        self._point = SimpleNamespace(x=point[0], y=point[1], z=point[2])
+
+    @property
+    def geometry(self) -> Any:
+        _CountingFace.reads += 1
+        return self._geometry
+
+    @property
+    def pointOnFace(self) -> Any:  # noqa: N802 - samme navn som i Fusion-API-et
+        _CountingFace.reads += 1
+        return self._point
+
+
+def _synthetic_faces(count: int) -> List[_CountingFace]:
+    """Plate med hull: topp/bunn/sider pluss ``count`` sylinderflater med ulike radier."""
+
+    faces = [
+        _CountingFace(SimpleNamespace(surfaceType=PLANE_SURFACE, normal=SimpleNamespace(x=0, y=0, z=1)), (0, 0, 1.2)),
+        _CountingFace(SimpleNamespace(surfaceType=PLANE_SURFACE, normal=SimpleNamespace(x=0, y=0, z=-1)), (0, 0, 0)),
+    ]
+    for index, (nx, ny) in enumerate(((1, 0), (-1, 0), (0, 1), (0, -1))):
+        faces.append(
+            _CountingFace(
+                SimpleNamespace(surfaceType=PLANE_SURFACE, normal=SimpleNamespace(x=nx, y=ny, z=0)),
+                (13.0 * nx, 8.0 * ny, 0.6 + index * 0.01),
+            )
+        )
+    for index in range(max(count - len(faces), 0)):
+        radius = 0.2 + 0.05 * (index % 8)
+        faces.append(
+            _CountingFace(
+                SimpleNamespace(
+                    surfaceType=CYLINDER_SURFACE,
+                    radius=radius,
+                    axis=SimpleNamespace(x=0, y=0, z=1),
+                ),
+                (index * 0.1, 0.0, 0.6),
+            )
+        )
+    return faces
+
+
+def _scan_queries(faces: Sequence[Any], radius: float, tol: float) -> Tuple[Any, List[Any]]:
+    # Slik byggerne gjorde det før: full skanning for hver spørring.
+    top = max(faces, key=lambda face: face.pointOnFace.z)
+    matches = []
+    for face in faces:
+        geometry = face.geometry
+        if geometry.surfaceType == CYLINDER_SURFACE and abs(geometry.radius - radius) <= tol:
+            matches.append(face)
+    return top, matches
+
+
+def benchmark(face_count: int = 500, queries: int = 50) -> Dict[str, float]:
+    faces = _synthetic_faces(face_count)
+    radius, tol = 0.25, 0.01
+
+    _CountingFace.reads = 0
+    started = time.perf_counter()
+    for _ in range(queries):
+        scan_top, scan_matches = _scan_queries(faces, radius, tol)
+    scan_seconds = time.perf_counter() - started
+    scan_reads = _CountingFace.reads
+
+    _CountingFace.reads = 0
+    started = time.perf_counter()
+    index = FaceIndex(faces)
+    for _ in range(queries):
+        index_top = index.top_planar_face()
+        index_matches = index.cylinders(radius, tol)
+    index_seconds = time.perf_counter() - started
+    index_reads = _CountingFace.reads
+
+    if index_top is not scan_top or {id(face) for face in index_matches} != {id(face) for face in scan_matches}:
+        raise AssertionError("FaceIndex og skanning ga ulike svar.")
+    return {
+        "faces": float(len(faces)),
+        "queries": float(queries),
+        "scan_seconds": scan_seconds,
+        "scan_reads": float(scan_reads),
+        "index_seconds": index_seconds,
+        "index_reads": float(index_reads),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark for FaceIndex mot full skanning.")
+    parser.add_argument("--faces", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    stats = benchmark(args.faces, args.queries)
+    print(f"Flater: {stats['faces']:.0f}, spørringer: {stats['queries']:.0f} (topp + sylinderradius)")
+    print(f"Skanning: {stats['scan_seconds'] * 1000:.2f} ms, {stats['scan_reads']:.0f} geometrilesinger")
+    print(f"FaceIndex: {stats['index_seconds'] * 1000:.2f} ms, {stats['index_reads']:.0f} geometrilesinger")
+
+
+if __name__ == "__main__":
+    main()
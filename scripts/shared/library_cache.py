@@ -0,0 +1,49 @@
+# ID: codex_fusionapi_v1.9
+"""Oppslag av materialer og utseender med ett bibliotekssøk per navn.
+
+Søk i Fusion sine material- og utseendebibliotek går over COM-broen og er
+trege. ``LookupCache`` husker svaret for hvert navn gjennom hele økten,
+også når navnet ikke finnes, slik at bom rapporteres uten nye søk.
+Modulen importerer ikke ``adsk``; søkefunksjonen gis inn av kalleren.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+
+class LookupCache:
+    """``{navn: objekt}`` fylt ved første oppslag; ``None`` betyr bom."""
+
+    def __init__(self, resolve: Callable[[str], Optional[Any]]) -> None:
+        self._resolve = resolve
+        self._entries: Dict[str, Optional[Any]] = {}
+        self.lookups = 0
+
+    def get(self, name: str) -> Optional[Any]:
+        if name not in self._entries:
+            self.lookups += 1
+            self._entries[name] = self._resolve(name)
+        return self._entries[name]
+
+    def misses(self) -> List[str]:
+        """Navn som er slått opp uten treff."""
+
+        return sorted(name for name, value in self._entries.items() if value is None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.lookups = 0
+
+
+def search_libraries(libraries: Any, collection: str, name: str) -> Optional[Any]:
+    """Første treff på ``name`` i ``library.<collection>`` for bibliotekene i ``libraries``."""
+
+    for index in range(libraries.count):
+        items = getattr(libraries.item(index), collection, None)
+        if items is None:
+            continue
+        item = items.itemByName(name)
+        if item:
+            return item
+    return None
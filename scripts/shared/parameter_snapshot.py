@@ -0,0 +1,81 @@
+# ID: codex_fusionapi_v1.9
+"""Engangslesing av brukerparametre til en uforanderlig tabell.
+
+Hver ``itemByName``/``evaluateExpression`` er et kall over COM-broen til
+Fusion. ``ParameterSnapshot.from_design`` leser alle brukerparametre én
+gang per kjøring og konverterer fra Fusion sine interne enheter (cm, rad,
+kelvin) til enhetene kallstedet ber om. Modulen importerer ikke ``adsk``.
+"""
+
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+from scripts.shared.units import from_internal
+
+
+class ParameterSnapshot(Mapping[str, float]):
+    """Uforanderlig ``{navn: verdi}`` for brukerparametrene i ett design."""
+
+    def __init__(
+        self, internal: Mapping[str, float], units: Optional[Mapping[str, str]] = None
+    ) -> None:
+        units = units or {}
+        self._internal = MappingProxyType({name: float(value) for name, value in internal.items()})
+        self._values = MappingProxyType(
+            {
+                name: from_internal(value, units[name]) if units.get(name) else value
+                for name, value in self._internal.items()
+            }
+        )
+
+    @classmethod
+    def from_design(
+        cls,
+        design: Any,
+        units: Optional[Mapping[str, str]] = None,
+        names: Optional[Iterable[str]] = None,
+    ) -> "ParameterSnapshot":
+        """Les brukerparametrene i ``design`` én gang.
+
+        ``units`` angir ønsket enhet per parameternavn; parametre uten
+        oppføring beholder Fusion sin interne verdi. ``names`` begrenser
+        snapshotet til de oppgitte parametrene.
+        """
+
+        wanted = set(names) if names is not None else None
+        user_params = design.userParameters
+        internal = {}
+        for index in range(user_params.count):
+            param = user_params.item(index)
+            name = param.name
+            if wanted is None or name in wanted:
+                internal[name] = param.value
+        return cls(internal, units)
+
+    def require(self, name: str) -> float:
+        """Verdi i snapshotets enhet; ``ValueError`` hvis parameteren mangler."""
+
+        if name not in self._values:
+            raise ValueError(f"Mangler brukerparameter: {name}")
+        return self._values[name]
+
+    def in_unit(self, name: str, unit: str) -> float:
+        """Verdi konvertert fra intern enhet til ``unit`` (f.eks. ``"mm"``)."""
+
+        if name not in self._internal:
+            raise ValueError(f"Mangler brukerparameter: {name}")
+        return from_internal(self._internal[name], unit)
+
+    def __getitem__(self, name: str) -> float:
+        return self._values[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"ParameterSnapshot({dict(self._values)!r})"
@@ -0,0 +1,86 @@
+# ID: codex_fusionapi_v1.9
+"""Enhetskonvertering mellom parameterenheter og Fusion sine interne enheter.
+
+Fusion lagrer lengder i cm, vinkler i radianer og temperaturer i kelvin.
+Tabellene er rene Python-data slik at både add-ins og headless kode kan
+bruke dem.
+"""
+
+from __future__ import annotations
+
+import math
+
+LENGTH_UNITS = {"mm", "cm", "m", "in", "ft"}
+ANGLE_UNITS = {"deg", "rad"}
+TEMPERATURE_UNITS = {
+    "degc",
+    "c",
+    "celsius",
+    "degf",
+    "f",
+    "fahrenheit",
+    "kelvin",
+    "k",
+    "rankine",
+}
+LENGTH_TO_MM = {
+    "mm": 1.0,
+    "cm": 10.0,
+    "m": 1000.0,
+    "in": 25.4,
+    "ft": 304.8,
+}
+
+
+def normalize_unit(unit: str) -> str:
+    return unit.strip().lower()
+
+
+def unit_kind(unit: str) -> str:
+    """Returner ``length``, ``angle``, ``temperature`` eller tom streng."""
+
+    normalized = normalize_unit(unit or "")
+    if normalized in LENGTH_UNITS:
+        return "length"
+    if normalized in ANGLE_UNITS:
+        return "angle"
+    if normalized in TEMPERATURE_UNITS:
+        return "temperature"
+    return ""
+
+
+def to_internal(value: float, unit: str) -> float:
+    """Konverter ``value`` i ``unit`` til Fusion sin interne enhet."""
+
+    normalized = normalize_unit(unit or "")
+    if normalized in LENGTH_UNITS:
+        return value * LENGTH_TO_MM[normalized] / 10.0
+    if normalized in ANGLE_UNITS:
+        return math.radians(value) if normalized == "deg" else value
+    if normalized in TEMPERATURE_UNITS:
+        if normalized in {"degc", "c", "celsius"}:
+            return value + 273.15
+        if normalized in {"degf", "f", "fahrenheit"}:
+            return (value + 459.67) * (5.0 / 9.0)
+        if normalized in {"rankine"}:
+            return value * (5.0 / 9.0)
+        # kelvin / k faller igjennom til returverdi
+    return value
+
+
+def from_internal(value: float, unit: str) -> float:
+    """Konverter en intern Fusion-verdi til ``unit`` (invers av ``to_internal``)."""
+
+    normalized = normalize_unit(unit or "")
+    if normalized in LENGTH_UNITS:
+        return value * 10.0 / LENGTH_TO_MM[normalized]
+    if normalized in ANGLE_UNITS:
+        return math.degrees(value) if normalized == "deg" else value
+    if normalized in TEMPERATURE_UNITS:
+        if normalized in {"degc", "c", "celsius"}:
+            return value - 273.15
+        if normalized in {"degf", "f", "fahrenheit"}:
+            return value * (9.0 / 5.0) - 459.67
+        if normalized in {"rankine"}:
+            return value * (9.0 / 5.0)
+    return value
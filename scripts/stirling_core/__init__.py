@@ -0,0 +1,2 @@
+# ID: codex_fusionapi_v1.9
+"""Stirlingmotor-designet: Fusion-add-in og headless beregningsmoduler."""
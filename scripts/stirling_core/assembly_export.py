@@ -0,0 +1,245 @@
+# ID: codex_fusionapi_v1.9
+"""Sammenstilling som 3MF og glTF (GLB) med instansierte nett (krever numpy).
+
+Flate STL/OBJ-eksporter gjentar hele nettet for hver like del.
+Her lagres hvert unike nett én gang (nøkkel: ``primitives.geometry_key``)
+og hver komponent er en referanse til nettet med verdensmatrisen fra
+layouttabellen. Nettene kommer fra ``mesher``, så alt lages uten Fusion.
+
+- 3MF: ett ``<object>`` per unikt nett og ett ``<item>`` med ``transform``
+  per komponent, i millimeter.
+- GLB: én ``mesh`` per unikt nett og én ``node`` med ``matrix`` per
+  komponent. glTF er i meter med y opp, så rotnoden skalerer og roterer
+  z-opp-koordinatene våre.
+
+Kjør ``python -m scripts.stirling_core.assembly_export --help`` fra repo-roten.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scripts.stirling_core import engine, primitives
+from scripts.stirling_core.layout import LayoutEntry, build_layout_table
+from scripts.stirling_core.mesher import (
+    DEFAULT_MESH_DIR,
+    DEFAULT_RESOLUTION_DEG,
+    Mesh,
+    assembly_mesh,
+    parse_overrides,
+    part_meshes,
+    write_binary_stl,
+)
+from scripts.stirling_core.parameters import parameter_values
+from scripts.stirling_core.transforms import Matrix, TransformTree
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+_RELS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+
+# z opp i mm -> y opp i meter (kolonnevis, som glTF forventer).
+_GLTF_ROOT_MATRIX = [0.001, 0.0, 0.0, 0.0, 0.0, 0.0, -0.001, 0.0, 0.0, 0.001, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+_FLOAT = 5126
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+
+
+@dataclass
+class Instance:
+    name: str
+    mesh: str
+    matrix: Matrix
+
+
+def assembly_instances(
+    geom: Mapping[str, float],
+    layout: Mapping[str, LayoutEntry],
+    resolution_deg: float = DEFAULT_RESOLUTION_DEG,
+) -> Tuple[Dict[str, Mesh], List[Instance]]:
+    """``({geometrinøkkel: nett}, [instanser])`` for komponentene i ``layout``."""
+
+    keys = [key for key in layout if key in primitives.PART_SOLIDS]
+    meshes_by_part = part_meshes(geom, keys, resolution_deg)
+    tree = TransformTree(layout)
+    meshes: Dict[str, Mesh] = {}
+    instances: List[Instance] = []
+    for key in keys:
+        shape = primitives.geometry_key(primitives.part_solids(key, geom))
+        meshes.setdefault(shape, meshes_by_part[key])
+        instances.append(Instance(key, shape, tree.world(key)))
+    return meshes, instances
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+# --- 3MF -------------------------------------------------------------------
+
+
+def _3mf_transform(matrix: Matrix) -> str:
+    # 3MF bruker radvektorer: kolonnene i vår 3×4-matrise, så translasjonen.
+    m = matrix
+    values = (m[0], m[4], m[8], m[1], m[5], m[9], m[2], m[6], m[10], m[3], m[7], m[11])
+    return " ".join(f"{value:.9g}" for value in values)
+
+
+def _3mf_object(object_id: int, name: str, mesh: Mesh) -> str:
+    vertices = "".join(f'<vertex x="{x:.6f}" y="{y:.6f}" z="{z:.6f}"/>' for x, y, z in mesh.vertices.tolist())
+    triangles = "".join(f'<triangle v1="{a}" v2="{b}" v3="{c}"/>' for a, b, c in mesh.faces.tolist())
+    return (
+        f'<object id="{object_id}" name="{name}" type="model"><mesh>'
+        f"<vertices>{vertices}</vertices><triangles>{triangles}</triangles>"
+        "</mesh></object>"
+    )
+
+
+def write_3mf(path: Path, meshes: Mapping[str, Mesh], instances: Sequence[Instance]) -> None:
+    ids = {shape: index + 1 for index, shape in enumerate(meshes)}
+    owners = {}
+    for instance in instances:
+        owners.setdefault(instance.mesh, instance.name)
+    objects = "".join(_3mf_object(ids[shape], owners.get(shape, shape), mesh) for shape, mesh in meshes.items())
+    items = "".join(
+        f'<item objectid="{ids[instance.mesh]}" transform="{_3mf_transform(instance.matrix)}"/>'
+        for instance in instances
+    )
+    model = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<model unit="millimeter" xml:lang="en-US" '
+        'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+        f"<resources>{objects}</resources><build>{items}</build></model>\n"
+    )
+    tmp_path = Path(path).with_name(Path(path).name + ".tmp")
+    tmp_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _RELS)
+        archive.writestr("3D/3dmodel.model", model)
+    os.replace(tmp_path, path)
+
+
+# --- glTF ------------------------------------------------------------------
+
+
+def _gltf_matrix(matrix: Matrix) -> List[float]:
+    return np.asarray(matrix, dtype=float).reshape(4, 4).T.reshape(-1).tolist()
+
+
+def write_glb(path: Path, meshes: Mapping[str, Mesh], instances: Sequence[Instance]) -> None:
+    chunks: List[bytes] = []
+    offset = 0
+    buffer_views: List[Dict[str, object]] = []
+    accessors: List[Dict[str, object]] = []
+    gltf_meshes: List[Dict[str, object]] = []
+    mesh_index: Dict[str, int] = {}
+
+    def add_view(data: bytes, target: int) -> int:
+        nonlocal offset
+        buffer_views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(data), "target": target})
+        padded = data + b"\x00" * (-len(data) % 4)
+        chunks.append(padded)
+        offset += len(padded)
+        return len(buffer_views) - 1
+
+    for shape, mesh in meshes.items():
+        positions = np.ascontiguousarray(mesh.vertices, dtype="<f4")
+        indices = np.ascontiguousarray(mesh.faces, dtype="<u4").reshape(-1)
+        accessors.append({
+            "bufferView": add_view(positions.tobytes(), _ARRAY_BUFFER),
+            "componentType": _FLOAT,
+            "count": len(positions),
+            "type": "VEC3",
+            "min": positions.min(axis=0).tolist(),
+            "max": positions.max(axis=0).tolist(),
+        })
+        accessors.append({
+            "bufferView": add_view(indices.tobytes(), _ELEMENT_ARRAY_BUFFER),
+            "componentType": _UNSIGNED_INT,
+            "count": len(indices),
+            "type": "SCALAR",
+        })
+        mesh_index[shape] = len(gltf_meshes)
+        gltf_meshes.append({
+            "name": shape,
+            "primitives": [{"attributes": {"POSITION": len(accessors) - 2}, "indices": len(accessors) - 1}],
+        })
+
+    nodes: List[Dict[str, object]] = [
+        {"name": "stirling", "matrix": _GLTF_ROOT_MATRIX, "children": list(range(1, len(instances) + 1))}
+    ]
+    nodes += [
+        {"name": instance.name, "mesh": mesh_index[instance.mesh], "matrix": _gltf_matrix(instance.matrix)}
+        for instance in instances
+    ]
+    binary = b"".join(chunks)
+    document = {
+        "asset": {"version": "2.0", "generator": "stirling_core assembly_export"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": nodes,
+        "meshes": gltf_meshes,
+        "accessors": accessors,
+        "bufferViews": buffer_views,
+        "buffers": [{"byteLength": len(binary)}],
+    }
+    text = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    text += b" " * (-len(text) % 4)
+    length = 12 + 8 + len(text) + 8 + len(binary)
+    _atomic_write_bytes(
+        path,
+        struct.pack("<4sII", b"glTF", 2, length)
+        + struct.pack("<I4s", len(text), b"JSON") + text
+        + struct.pack("<I4s", len(binary), b"BIN\x00") + binary,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sammenstilling som 3MF og GLB med instansierte nett.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_MESH_DIR)
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION_DEG, help="Vinkelsteg i grader.")
+    parser.add_argument("--set", action="append", default=[], metavar="NAVN=VERDI", help="Overstyr en parameter.")
+    args = parser.parse_args(argv)
+
+    values = parameter_values(parse_overrides(args.set))
+    geom = engine.compute_geometry_inputs(values)
+    layout = build_layout_table(values, geom)
+    started = time.perf_counter()
+    meshes, instances = assembly_instances(geom, layout, args.resolution)
+    paths = {"3mf": args.out / "stirling_assembly_v1.3mf", "glb": args.out / "stirling_assembly_v1.glb"}
+    write_3mf(paths["3mf"], meshes, instances)
+    write_glb(paths["glb"], meshes, instances)
+    elapsed = time.perf_counter() - started
+    # Flat STL til sammenligning, samme nett uten instansiering.
+    paths["stl"] = args.out / "stirling_assembly_v1.stl"
+    write_binary_stl(paths["stl"], assembly_mesh(part_meshes(geom, layout, args.resolution), layout))
+    print(f"{len(instances)} komponenter, {len(meshes)} unike nett ({elapsed * 1000:.1f} ms)")
+    for fmt, path in paths.items():
+        print(f"{fmt}: {path.stat().st_size / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
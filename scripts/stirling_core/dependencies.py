@@ -0,0 +1,231 @@
+# ID: codex_fusionapi_v1.9
+"""Avhengighetsgraf fra brukerparametre til komponenter, eksport og dokumenter.
+
+Hver node i ``NODE_INPUTS`` lister hva den leser: andre noder
+(``component:frame``), ``geom``-nøkler (``base_thick``) eller
+brukerparametre (``CR_TARGET``). ``plan_regeneration`` sammenligner
+parametrene fra forrige bygg med de nåværende og returnerer kun nodene som
+faktisk påvirkes, slik at ``run()`` kan hoppe over resten.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, Mapping, Optional, Set, Tuple
+
+from scripts.stirling_core import engine
+from scripts.stirling_core.layout import build_layout_table, changed_layout_entries
+from scripts.stirling_core.parameters import PARAMETER_DEFINITIONS
+
+COMPONENT_KEYS: Tuple[str, ...] = (
+    "frame",
+    "work_cylinder",
+    "displacer_cylinder",
+    "work_piston",
+    "displacer",
+    "crankshaft",
+    "flywheel",
+    "connecting_rods",
+    "connecting_rod_2",
+    "thermal",
+)
+
+EXPORT_TARGETS: Tuple[str, ...] = (
+    "assembly",
+    "frame",
+    "work_cylinder",
+    "displacer_cylinder",
+    "work_piston",
+    "displacer",
+    "crankshaft",
+    "flywheel",
+)
+
+DOCUMENTS: Tuple[str, ...] = (
+    "drawings",
+    "bom",
+    "arbeidsplan",
+    "changelog",
+    "simulation",
+    "metadata",
+)
+
+# Avledede geom-nøkler og hva de beregnes fra (se engine.compute_geometry_inputs).
+GEOMETRY_DERIVATIONS: Dict[str, Tuple[str, ...]] = {
+    "work_clearance": ("clear_min", "clear_max"),
+    "piston_diameter": ("id_work", "work_clearance"),
+    "displacer_diameter": ("id_disp", "work_clearance"),
+}
+
+# geom-nøkler som hver build_*-funksjon leser.
+COMPONENT_INPUTS: Dict[str, Tuple[str, ...]] = {
+    "frame": (
+        "base_length",
+        "base_width",
+        "base_thick",
+        "frame_height",
+        "column_count",
+        "mount_count_x",
+        "mount_count_y",
+    ),
+    "work_cylinder": ("od_work", "id_work", "len_work"),
+    "displacer_cylinder": ("od_disp", "id_disp", "len_disp"),
+    "work_piston": ("piston_diameter", "stroke"),
+    "displacer": ("displacer_diameter", "len_disp"),
+    "crankshaft": ("shaft_d", "offset", "rod_length", "crank_pin"),
+    "flywheel": ("flywheel_d", "flywheel_thick", "shaft_d"),
+    "connecting_rods": ("rod_d", "rod_length"),
+    "connecting_rod_2": ("rod_d", "rod_length"),
+    "thermal": ("od_disp", "od_work", "rib_count"),
+}
+
+_METRIC_INPUTS = ("id_work", "stroke", "CR_TARGET")
+_THERMAL_INPUTS = ("id_disp", "angle_cyl", "hot_end_temp", "cold_end_temp")
+_PRODUCTION_INPUTS = (
+    "base_length",
+    "base_width",
+    "base_thick",
+    "od_work",
+    "od_disp",
+    "len_work",
+    "len_disp",
+    "frame_height",
+)
+
+
+def _build_node_inputs() -> Dict[str, Tuple[str, ...]]:
+    nodes: Dict[str, Tuple[str, ...]] = {}
+    for key, inputs in COMPONENT_INPUTS.items():
+        nodes[f"component:{key}"] = inputs
+    # Pakkingen bruker avgrensningsboksene til alle delene.
+    nodes["layout"] = tuple(sorted({key for inputs in COMPONENT_INPUTS.values() for key in inputs} | {"offset"}))
+    for target in EXPORT_TARGETS:
+        if target == "assembly":
+            nodes["export:assembly"] = tuple(f"component:{k}" for k in COMPONENT_KEYS) + ("layout",)
+        else:
+            nodes[f"export:{target}"] = (f"component:{target}",)
+    nodes["document:drawings"] = (
+        "component:frame",
+        "component:work_cylinder",
+        "component:flywheel",
+    )
+    nodes["document:bom"] = tuple(
+        sorted(
+            {key for inputs in COMPONENT_INPUTS.values() for key in inputs}
+            - {"crank_pin"}
+            - {key for key, _ in engine.PATTERN_PARAMETERS}
+        )
+    ) + _METRIC_INPUTS
+    nodes["document:arbeidsplan"] = ()
+    nodes["document:changelog"] = tuple(definition.name for definition in PARAMETER_DEFINITIONS)
+    nodes["document:simulation"] = _METRIC_INPUTS + _THERMAL_INPUTS
+    nodes["document:metadata"] = _METRIC_INPUTS + ("clear_min", "clear_max") + _PRODUCTION_INPUTS
+    return nodes
+
+
+NODE_INPUTS: Dict[str, Tuple[str, ...]] = _build_node_inputs()
+
+_GEOM_TO_PARAMETER: Dict[str, str] = dict(
+    engine.GEOMETRY_PARAMETERS + engine.OPERATING_PARAMETERS + engine.PATTERN_PARAMETERS
+)
+_PARAMETER_NAMES: FrozenSet[str] = frozenset(definition.name for definition in PARAMETER_DEFINITIONS)
+
+
+@lru_cache(maxsize=None)
+def parameters_for(name: str) -> FrozenSet[str]:
+    """Alle brukerparametre som en node, geom-nøkkel eller parameter avhenger av."""
+
+    if name in _PARAMETER_NAMES:
+        return frozenset((name,))
+    if name in _GEOM_TO_PARAMETER:
+        return frozenset((_GEOM_TO_PARAMETER[name],))
+    inputs = GEOMETRY_DERIVATIONS.get(name, NODE_INPUTS.get(name))
+    if inputs is None:
+        raise KeyError(f"Ukjent node i avhengighetsgrafen: {name}")
+    result: Set[str] = set()
+    for item in inputs:
+        result |= parameters_for(item)
+    return frozenset(result)
+
+
+def dependents_of(parameters: Set[str]) -> Set[str]:
+    """Noder i ``NODE_INPUTS`` som må regenereres når ``parameters`` endres."""
+
+    return {node for node in NODE_INPUTS if parameters_for(node) & parameters}
+
+
+@dataclass
+class RegenerationPlan:
+    full: bool
+    changed_parameters: Set[str] = field(default_factory=set)
+    components: Set[str] = field(default_factory=set)
+    layout: Set[str] = field(default_factory=set)
+    exports: Set[str] = field(default_factory=set)
+    documents: Set[str] = field(default_factory=set)
+
+    def describe(self) -> str:
+        if self.full:
+            return "full regenerering"
+        if not (self.components or self.layout or self.exports or self.documents):
+            return "ingen endringer"
+        parts = [
+            f"parametre: {', '.join(sorted(self.changed_parameters)) or '-'}",
+            f"komponenter: {', '.join(sorted(self.components)) or '-'}",
+            f"layout: {', '.join(sorted(self.layout)) or '-'}",
+            f"eksport: {', '.join(sorted(self.exports)) or '-'}",
+            f"dokumenter: {', '.join(sorted(self.documents)) or '-'}",
+        ]
+        return "; ".join(parts)
+
+
+def full_plan() -> RegenerationPlan:
+    return RegenerationPlan(
+        full=True,
+        changed_parameters=set(_PARAMETER_NAMES),
+        components=set(COMPONENT_KEYS),
+        layout=set(COMPONENT_KEYS),
+        exports=set(EXPORT_TARGETS),
+        documents=set(DOCUMENTS),
+    )
+
+
+def plan_regeneration(
+    previous: Optional[Mapping[str, float]],
+    current: Mapping[str, float],
+    tolerance: float = 1e-9,
+) -> RegenerationPlan:
+    """Finn hvilke komponenter, layoutposter og artefakter som må lages på nytt.
+
+    ``previous`` er parametertabellen fra forrige vellykkede bygg (``None``
+    betyr at ingenting er bygget). Layoutposter sammenlignes på oppløst
+    verdenstransform, slik at kun forekomster som faktisk flytter seg røres.
+    """
+
+    if not previous or set(previous) != set(current):
+        return full_plan()
+
+    changed = {
+        name
+        for name, value in current.items()
+        if abs(float(previous[name]) - float(value)) > tolerance
+    }
+    nodes = dependents_of(changed)
+    plan = RegenerationPlan(full=False, changed_parameters=changed)
+    for node in nodes:
+        kind, _, target = node.partition(":")
+        if kind == "component":
+            plan.components.add(target)
+        elif kind == "export":
+            plan.exports.add(target)
+        elif kind == "document":
+            plan.documents.add(target)
+
+    if "layout" in nodes:
+        plan.layout |= changed_layout_entries(
+            build_layout_table(previous, engine.compute_geometry_inputs(previous)),
+            build_layout_table(current, engine.compute_geometry_inputs(current)),
+        )
+    # Nye forekomster må alltid plasseres.
+    plan.layout |= plan.components
+    return plan
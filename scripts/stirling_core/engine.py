@@ -0,0 +1,182 @@
+# ID: codex_fusionapi_v1.9
+"""Headless geometri- og ytelsesberegning for stirling_core.
+
+Funksjonene tar en ren parametertabell (``{navn: verdi}`` i enhetene fra
+``PARAMETER_DEFINITIONS``) og returnerer de samme ``geom``/``metrics``-
+ordbøkene som Fusion-add-in'en bruker. Modulen importerer ikke ``adsk`` og
+kan derfor evaluere motorvarianter direkte på en byggeserver.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from scripts.stirling_core.parameters import parameter_values
+
+REQUIRED_MATERIAL_CODES = (
+    "AL6061",
+    "GLASS_QUARTZ",
+    "STEEL_GENERIC",
+    "BRASS_GENERIC",
+    "COPPER_GENERIC",
+    "CFRP_SHEET",
+)
+
+# Kobling mellom nøklene i ``geom`` og brukerparameteren de leses fra (mm).
+GEOMETRY_PARAMETERS: Tuple[Tuple[str, str], ...] = (
+    ("id_work", "ID_WORK"),
+    ("od_work", "OD_WORK"),
+    ("len_work", "LEN_WORK"),
+    ("id_disp", "ID_DISP"),
+    ("od_disp", "OD_DISP"),
+    ("len_disp", "LEN_DISP"),
+    ("stroke", "STROKE"),
+    ("clear_min", "CLEAR_MIN"),
+    ("clear_max", "CLEAR_MAX"),
+    ("flywheel_d", "FLYWHEEL_D"),
+    ("flywheel_thick", "FLYWHEEL_THICK"),
+    ("crank_pin", "CRANK_PIN"),
+    ("shaft_d", "SHAFT_D"),
+    ("rod_d", "ROD_DIAMETER"),
+    ("rod_length", "ROD_LENGTH"),
+    ("offset", "DISPLACER_OFFSET"),
+    ("base_length", "BASE_LENGTH"),
+    ("base_width", "BASE_WIDTH"),
+    ("base_thick", "BASE_THICK"),
+    ("frame_height", "FRAME_COLUMN_H"),
+)
+
+# Vinkel (grader) og temperaturer (°C) som brukes av termodynamikk/kinematikk.
+OPERATING_PARAMETERS: Tuple[Tuple[str, str], ...] = (
+    ("angle_cyl", "ANGLE_CYL"),
+    ("hot_end_temp", "HOT_END_TEMP"),
+    ("cold_end_temp", "COLD_END_TEMP"),
+)
+
+
+# Antall instanser i mønstrene (se primitives.py).
+PATTERN_PARAMETERS: Tuple[Tuple[str, str], ...] = (
+    ("column_count", "COLUMN_COUNT"),
+    ("mount_count_x", "MOUNT_COUNT_X"),
+    ("mount_count_y", "MOUNT_COUNT_Y"),
+    ("rib_count", "RIB_COUNT"),
+)
+
+
+class BuilderError(RuntimeError):
+    """Signaliserer at genereringen ikke kan fortsette."""
+
+
+def compute_geometry_inputs(values: Mapping[str, float]) -> Dict[str, float]:
+    """Beregn ``geom`` (mm, grader, °C) fra parametertabellen."""
+
+    geom = {key: float(values[name]) for key, name in GEOMETRY_PARAMETERS}
+    for key, name in OPERATING_PARAMETERS + PATTERN_PARAMETERS:
+        if name in values:
+            geom[key] = float(values[name])
+    geom["work_clearance"] = 0.5 * (geom["clear_min"] + geom["clear_max"])
+    geom["piston_diameter"] = geom["id_work"] - 2 * geom["work_clearance"]
+    geom["displacer_diameter"] = geom["id_disp"] - 2 * geom["work_clearance"]
+    return geom
+
+
+def compute_performance_metrics(
+    values: Mapping[str, float], geom: Dict[str, float]
+) -> Dict[str, float]:
+    """Slagvolum, dødvolum og estimert kompresjonsforhold for én variant."""
+
+    area_mm2 = math.pi * (geom["id_work"] / 2.0) ** 2
+    stroke_volume_cm3 = (area_mm2 * geom["stroke"]) / 1000.0
+    cr_target = float(values["CR_TARGET"])
+    dead_volume_cm3 = 0.0
+    if stroke_volume_cm3 > 0:
+        dead_volume_cm3 = stroke_volume_cm3 / max(cr_target - 1.0, 0.01)
+    safe_dead_volume = max(dead_volume_cm3, 1e-9)
+    cr_estimate = (stroke_volume_cm3 + safe_dead_volume) / safe_dead_volume
+    return {
+        "area_mm2": area_mm2,
+        "stroke_volume_cm3": stroke_volume_cm3,
+        "dead_volume_cm3": dead_volume_cm3,
+        "cr_estimate": cr_estimate,
+    }
+
+
+def evaluate_clearances(
+    params: Optional[Mapping[str, object]], geom: Dict[str, float]
+) -> Dict[str, float]:
+    clearances = {
+        "arbeidsstempel": geom["work_clearance"],
+        "fortrenger": geom["work_clearance"],
+    }
+    clear_min = geom["clear_min"]
+    clear_max = geom["clear_max"]
+    for name, value in clearances.items():
+        if value < clear_min or value > clear_max:
+            raise BuilderError(f"Klaringen for {name} ({value:.2f} mm) bryter spesifikasjonen.")
+    return clearances
+
+
+def evaluate_production(
+    geom: Dict[str, float],
+    machine_cfg: Mapping[str, Mapping[str, Any]],
+    material_db: Iterable[Mapping[str, Any]],
+) -> Dict[str, str]:
+    """Sjekk maskin-/materialgrenser for én variant uten å skrive attributter.
+
+    ``machine_cfg`` og ``material_db`` er resultatet av ``load_machine_park``
+    og ``load_material_catalog``; de sendes inn slik at sweeps kan laste
+    konfigurasjonen én gang og gjenbruke den for alle varianter.
+    """
+
+    report: Dict[str, str] = {}
+
+    cnc_cfg = machine_cfg.get("cnc_mill", {}).get("volume_mm", {})
+    cnc_x = float(cnc_cfg.get("x", 320.0))
+    cnc_y = float(cnc_cfg.get("y", 220.0))
+    cnc_z = float(cnc_cfg.get("z", 110.0))
+
+    # Sjekk om bunnplaten får plass på standard CNC-fres.
+    fits_x = geom["base_length"] <= cnc_x
+    fits_y = geom["base_width"] <= cnc_y
+    fits_z = geom["base_thick"] <= cnc_z
+    report["cnc_bed"] = "ok" if all((fits_x, fits_y, fits_z)) else "oversize"
+
+    # Sjekk om sylindre kan maskineres på standard dreiebenk.
+    lathe_cfg = machine_cfg.get("lathe", {})
+    fits_swing = max(geom["od_work"], geom["od_disp"]) <= float(lathe_cfg.get("swing_diameter_mm", 180.0))
+    fits_length = max(geom["len_work"], geom["len_disp"]) <= float(lathe_cfg.get("between_centers_mm", 300.0))
+    report["lathe"] = "ok" if all((fits_swing, fits_length)) else "oversize"
+
+    # Sjekk om printervolumet er tilstrekkelig for hel montering/print av prototyper.
+    printer_cfg = machine_cfg.get("printer", {}).get("volume_mm", {})
+    printer_x = float(printer_cfg.get("x", 220.0))
+    printer_y = float(printer_cfg.get("y", 220.0))
+    printer_z = float(printer_cfg.get("z", 250.0))
+    assembly_height = geom["base_thick"] + max(geom["frame_height"], geom["len_work"], geom["len_disp"])
+    printer_ok = (
+        geom["base_length"] <= printer_x
+        and geom["base_width"] <= printer_y
+        and assembly_height <= printer_z
+    )
+    report["printer"] = "ok" if printer_ok else "oversize"
+
+    # Rapporter materialkoder dersom de finnes i databasen.
+    catalog_codes = {str(entry.get("code", "")).upper() for entry in material_db}
+    missing = sorted(code for code in REQUIRED_MATERIAL_CODES if code not in catalog_codes)
+    if missing:
+        report["material_db"] = "missing: " + ", ".join(missing)
+    else:
+        report["material_db"] = "ok"
+
+    return report
+
+
+def evaluate_design(
+    overrides: Optional[Mapping[str, float]] = None,
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Evaluer én variant: standardverdier pluss eventuelle overstyringer."""
+
+    values = parameter_values(overrides)
+    geom = compute_geometry_inputs(values)
+    return geom, compute_performance_metrics(values, geom)
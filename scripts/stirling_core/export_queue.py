@@ -0,0 +1,141 @@
+# ID: codex_fusionapi_v1.9
+"""Eksportkø med valg av formater, finhet og mål per kjøring.
+
+``ExportSettings`` sier hvilke formater (``step``, ``stl``, ``obj``), hvilken
+nettfinhet for STL/OBJ og hvilke eksportmål som skal lages. Add-in'en
+legger én ``ExportJob`` per mål og format i en ``ExportQueue`` under
+regenereringen og kjører køen etter oppsummeringsdialogen, med fremdrift
+og avbryt. Køen er sortert format for format (i rekkefølgen fra
+innstillingene), slik at et avbrudd etter STEP-filene fortsatt gir et
+komplett STEP-sett. Rapporten viser tiden brukt per format.
+
+Modulen importerer ikke ``adsk``.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+EXPORT_FORMATS: Tuple[str, ...] = ("step", "stl", "obj")
+# Formater som trianguleres og dermed påvirkes av nettfinheten.
+MESH_FORMATS: Tuple[str, ...] = ("stl", "obj")
+MESH_REFINEMENTS: Tuple[str, ...] = ("low", "medium", "high")
+
+
+@dataclass(frozen=True)
+class ExportSettings:
+    formats: Tuple[str, ...] = EXPORT_FORMATS
+    refinement: str = "high"
+    # None eksporterer alle mål regenereringen krever.
+    targets: Optional[Tuple[str, ...]] = None
+
+    def __post_init__(self) -> None:
+        unknown = [fmt for fmt in self.formats if fmt not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Ukjente eksportformater: {', '.join(unknown)}")
+        if self.refinement not in MESH_REFINEMENTS:
+            raise ValueError(f"Ukjent nettfinhet: {self.refinement}")
+
+    def wants(self, target: str) -> bool:
+        return self.targets is None or target in self.targets
+
+    def options(self, fmt: str) -> str:
+        """Eksportvalgene som påvirker innholdet i filen for ``fmt``."""
+
+        return f"{fmt}:{self.refinement}" if fmt in MESH_FORMATS else fmt
+
+
+@dataclass
+class ExportJob:
+    target: str
+    fmt: str
+    execute: Callable[[], None]
+    # Kalles når filen er skrevet, f.eks. for å lagre fingeravtrykket.
+    on_done: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class ExportReport:
+    written: Dict[str, int] = field(default_factory=dict)
+    seconds: Dict[str, float] = field(default_factory=dict)
+    skipped: int = 0
+    failed: List[str] = field(default_factory=list)
+    cancelled: bool = False
+    # (mål, format) for jobber som feilet eller ikke ble kjørt før avbrudd.
+    unfinished: List[Tuple[str, str]] = field(default_factory=list)
+
+    def describe(self) -> str:
+        parts = [
+            f"{fmt} {count} filer {self.seconds.get(fmt, 0.0):.2f} s"
+            for fmt, count in self.written.items()
+        ]
+        text = f"Eksport: {', '.join(parts) or 'ingen filer skrevet'}; {self.skipped} uendret (fingeravtrykk)"
+        if self.failed:
+            text += f"; feilet: {', '.join(self.failed)}"
+        if self.cancelled:
+            text += "; avbrutt"
+        return text
+
+
+class ExportQueue:
+    def __init__(self, settings: Optional[ExportSettings] = None) -> None:
+        self.settings = settings or ExportSettings()
+        self.jobs: List[ExportJob] = []
+        self.skipped = 0
+        # Kjøres med rapporten etter køen, også ved avbrudd (f.eks. lagring i
+        # artefaktlageret).
+        self.finalizers: List[Callable[[ExportReport], None]] = []
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def add(self, job: ExportJob) -> None:
+        self.jobs.append(job)
+
+    def ordered(self) -> List[ExportJob]:
+        rank = {fmt: index for index, fmt in enumerate(self.settings.formats)}
+        return sorted(self.jobs, key=lambda job: rank.get(job.fmt, len(rank)))
+
+    def run(
+        self,
+        progress: Optional[Callable[[int, ExportJob], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ) -> ExportReport:
+        """Kjør jobbene; ``progress(ferdige, neste jobb)`` kalles før hver jobb.
+
+        Når ``cancelled()`` blir sann stopper køen før neste jobb. Jobber som
+        feiler hoppes over; begge deler listes i ``report.unfinished``.
+        """
+
+        report = ExportReport(skipped=self.skipped)
+        jobs: Sequence[ExportJob] = self.ordered()
+        try:
+            for index, job in enumerate(jobs):
+                if cancelled is not None and cancelled():
+                    report.cancelled = True
+                    report.unfinished.extend((rest.target, rest.fmt) for rest in jobs[index:])
+                    break
+                if progress is not None:
+                    progress(index, job)
+                started = time.perf_counter()
+                try:
+                    job.execute()
+                except Exception:
+                    report.failed.append(f"{job.target}.{job.fmt}")
+                    report.unfinished.append((job.target, job.fmt))
+                    continue
+                finally:
+                    elapsed = time.perf_counter() - started
+                    report.seconds[job.fmt] = report.seconds.get(job.fmt, 0.0) + elapsed
+                report.written[job.fmt] = report.written.get(job.fmt, 0) + 1
+                if job.on_done is not None:
+                    job.on_done()
+        finally:
+            self.jobs = []
+            self.skipped = 0
+            finalizers, self.finalizers = self.finalizers, []
+            for finalizer in finalizers:
+                finalizer(report)
+        return report
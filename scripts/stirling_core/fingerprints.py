@@ -0,0 +1,91 @@
+# ID: codex_fusionapi_v1.9
+"""Geometrifingeravtrykk for eksportene i ``cad/``.
+
+Et fingeravtrykk er en hash av geometrinøkkeltallene til en komponent
+(volum, areal, avgrensningsboks, antall flater og kropper) og en hash av
+parametrene komponenten er bygget fra. Det lagres som
+``<eksportnavn>.fingerprint.json`` ved siden av eksportfilene, ett avtrykk
+per format siden formatene kan velges og eksporteres hver for seg.
+Eksportvalg som endrer filen (nettfinhet for STL/OBJ) inngår i avtrykket
+for formatet. Sammen med avtrykket lagres sha256 av filen som ble skrevet,
+så en fil som siden er byttet ut (f.eks. av artefaktlageret) ikke regnes
+som oppdatert. En eksport hoppes over når avtrykket er uendret og filen på
+disk er den som ble skrevet.
+
+Tallene avrundes til seks gjeldende siffer, slik at støy i Fusion sine
+fysiske egenskaper mellom to bygg av samme geometri ikke gir ny eksport.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional
+
+from scripts.shared.artifact_store import file_digest
+
+FINGERPRINT_SUFFIX = ".fingerprint.json"
+
+
+def parameter_hash(values: Mapping[str, float], names: Optional[Iterable[str]] = None, salt: str = "") -> str:
+    """Hash av ``values`` (begrenset til ``names``) og ``salt``, f.eks. skriptversjonen."""
+
+    selected = sorted(values) if names is None else sorted(set(names))
+    payload = {"salt": salt, "values": {name: f"{float(values[name]):.12g}" for name in selected}}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def geometry_fingerprint(stats: Mapping[str, float], source_hash: str, options: str = "") -> str:
+    payload = {
+        "source": source_hash,
+        "options": options,
+        "stats": {key: f"{float(value):.6g}" for key, value in stats.items()},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint_path(export_stem: Path) -> Path:
+    """``cad/stirling_frame_v1`` -> ``cad/stirling_frame_v1.fingerprint.json``."""
+
+    return export_stem.with_name(export_stem.name + FINGERPRINT_SUFFIX)
+
+
+def load_fingerprints(path: Path) -> Dict[str, Dict[str, str]]:
+    """``{format: {"fingerprint": ..., "sha256": ...}}`` fra ``path``; tom ved manglende eller ugyldig fil."""
+
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    formats = payload.get("formats") if isinstance(payload, dict) else None
+    if not isinstance(formats, dict):
+        return {}
+    return {fmt: entry for fmt, entry in formats.items() if isinstance(entry, dict)}
+
+
+def export_is_current(entry: Optional[Mapping[str, str]], fingerprint: str, export_file: Path) -> bool:
+    """Sann når ``entry`` har ``fingerprint`` og ``export_file`` er filen som ble skrevet."""
+
+    if not entry or entry.get("fingerprint") != fingerprint or not export_file.exists():
+        return False
+    return file_digest(export_file) == entry.get("sha256")
+
+
+def store_fingerprint(
+    path: Path,
+    fmt: str,
+    fingerprint: str,
+    stats: Mapping[str, float],
+    source_hash: str,
+    export_file: Path,
+) -> None:
+    """Oppdater avtrykket for ``fmt`` atomisk; tallene lagres også for feilsøking."""
+
+    formats = load_fingerprints(path)
+    formats[fmt] = {"fingerprint": fingerprint, "sha256": file_digest(export_file)}
+    payload = {"formats": formats, "source": source_hash, "stats": dict(stats)}
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
@@ -0,0 +1,159 @@
+# ID: codex_fusionapi_v1.9
+"""Vektorisert veiv-/sleidekinematikk for stempel og fortrenger (krever numpy).
+
+Begge stengene deler veivtapp med radius ``STROKE/2``. Fortrengeren følger
+veivvinkelen ``theta`` og arbeidsstempelet ligger ``phase_angle_deg``
+etter, samme konvensjon som Schmidt-analysen i ``thermo``. Posisjoner måles
+fra toppdødpunkt langs sylinderaksen.
+
+Alle funksjoner tar N veivvinkler på en gang; geometri kan være skalarer
+eller arrays med én verdi per design, og resultatet får da formen
+(design × vinkel).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from scripts.stirling_core.thermo import DEFAULT_RPM, phase_angle_deg
+
+Column = Union[float, np.ndarray]
+
+
+def crank_angles(steps: int = 360) -> np.ndarray:
+    """Jevnt fordelte veivvinkler (radianer) over én omdreining."""
+
+    return np.linspace(0.0, 2.0 * np.pi, steps, endpoint=False)
+
+
+def _per_design(value: Column) -> np.ndarray:
+    return np.asarray(value, dtype=np.float64)[..., None]
+
+
+def slider_crank(
+    theta: np.ndarray, crank_radius: Column, rod_length: Column, omega: Column
+) -> Dict[str, np.ndarray]:
+    """Posisjon (mm), hastighet (mm/s), akselerasjon (mm/s²) og stangvinkel.
+
+    ``theta`` er veivvinkelen relativt til sylinderaksen, ``omega`` i rad/s.
+    """
+
+    r = _per_design(crank_radius)
+    length = _per_design(rod_length)
+    w = _per_design(omega)
+    if np.any(length <= r):
+        raise ValueError("ROD_LENGTH må være større enn STROKE/2.")
+
+    sin_t, cos_t = np.sin(theta), np.cos(theta)
+    root = np.sqrt(length**2 - (r * sin_t) ** 2)
+    position = r + length - (r * cos_t + root)
+    d_position = r * sin_t + r**2 * sin_t * cos_t / root
+    dd_position = (
+        r * cos_t
+        + r**2 * (cos_t**2 - sin_t**2) / root
+        + r**4 * (sin_t * cos_t) ** 2 / root**3
+    )
+    rod_angle = np.arcsin(r * sin_t / length)
+    rod_rate = w * r * cos_t / root
+    return {
+        "position_mm": position,
+        "velocity_mm_s": w * d_position,
+        "acceleration_mm_s2": w**2 * dd_position,
+        "rod_angle_rad": rod_angle,
+        "rod_rate_rad_s": rod_rate,
+    }
+
+
+def engine_motion(
+    geom: Mapping[str, Column],
+    theta: Optional[np.ndarray] = None,
+    rpm: Column = DEFAULT_RPM,
+) -> Dict[str, np.ndarray]:
+    """Bevegelse for fortrenger og arbeidsstempel over veivvinklene ``theta``.
+
+    Bruker ``stroke``, ``rod_length``, ``crank_pin`` og ``angle_cyl`` fra
+    ``geom``. I tillegg til posisjon/hastighet/akselerasjon returneres
+    veivtappens bane og glidehastigheten i stangøyet rundt veivtappen.
+    """
+
+    theta = crank_angles() if theta is None else np.asarray(theta, dtype=np.float64)
+    omega = np.asarray(rpm, dtype=np.float64) * 2.0 * np.pi / 60.0
+    crank_radius = np.asarray(geom["stroke"], dtype=np.float64) / 2.0
+    phase = np.radians(np.asarray(phase_angle_deg(geom), dtype=np.float64))
+
+    displacer = slider_crank(theta, crank_radius, geom["rod_length"], omega)
+    piston = slider_crank(theta - _per_design(phase), crank_radius, geom["rod_length"], omega)
+
+    pin_radius = _per_design(geom["crank_pin"]) / 2.0
+    motion: Dict[str, np.ndarray] = {
+        "theta_deg": np.degrees(theta),
+        "crank_pin_x_mm": _per_design(crank_radius) * np.sin(theta),
+        "crank_pin_y_mm": _per_design(crank_radius) * np.cos(theta),
+    }
+    for prefix, result in (("displacer", displacer), ("piston", piston)):
+        motion[f"{prefix}_position_mm"] = result["position_mm"]
+        motion[f"{prefix}_velocity_mm_s"] = result["velocity_mm_s"]
+        motion[f"{prefix}_acceleration_mm_s2"] = result["acceleration_mm_s2"]
+        motion[f"{prefix}_rod_angle_deg"] = np.degrees(result["rod_angle_rad"])
+        # Stangøyet roterer med stangvinkelen, veivtappen med omega.
+        relative_rate = np.abs(_per_design(omega) - result["rod_rate_rad_s"])
+        motion[f"{prefix}_pin_sliding_mm_s"] = relative_rate * pin_radius
+    return motion
+
+
+def volume_curves(geom: Mapping[str, Column], motion: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Levende volum (cm³, uten dødvolum) fra kinematikken i stedet for sinus-tilnærming."""
+
+    area_disp = _per_design(np.pi / 4.0 * np.asarray(geom["id_disp"], dtype=np.float64) ** 2)
+    area_work = _per_design(np.pi / 4.0 * np.asarray(geom["id_work"], dtype=np.float64) ** 2)
+    stroke = _per_design(geom["stroke"])
+    expansion = area_disp * motion["displacer_position_mm"] / 1000.0
+    compression = (
+        area_disp * (stroke - motion["displacer_position_mm"])
+        + area_work * motion["piston_position_mm"]
+    ) / 1000.0
+    return {
+        "volume_expansion_cm3": expansion,
+        "volume_compression_cm3": compression,
+        "volume_total_cm3": expansion + compression,
+    }
+
+
+def benchmark(designs: int = 10_000, steps: int = 360) -> Dict[str, float]:
+    rng = np.random.default_rng(0)
+    geom = {
+        "stroke": rng.uniform(10.0, 25.0, designs),
+        "rod_length": rng.uniform(50.0, 90.0, designs),
+        "crank_pin": rng.uniform(3.0, 6.0, designs),
+        "angle_cyl": rng.uniform(60.0, 120.0, designs),
+    }
+    started = time.perf_counter()
+    engine_motion(geom, crank_angles(steps))
+    elapsed = time.perf_counter() - started
+    return {
+        "designs": float(designs),
+        "steps": float(steps),
+        "seconds": elapsed,
+        "samples_per_second": designs * steps / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark for vektorisert veivkinematikk.")
+    parser.add_argument("--designs", type=int, default=10_000)
+    parser.add_argument("--steps", type=int, default=360)
+    args = parser.parse_args(argv)
+
+    stats = benchmark(args.designs, args.steps)
+    print(
+        f"Kinematikk: {stats['designs']:.0f} design × {stats['steps']:.0f} vinkler på "
+        f"{stats['seconds']:.2f} s = {stats['samples_per_second']:,.0f} punkter/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# ID: codex_fusionapi_v1.9
+"""Headless layouttabell for scatter-oppsettet i stirling_core.
+
+Posisjoner er i millimeter og orienteringer i grader, begge relativt til
+forelderen. Add-in'en gjør om verdensmatrisene fra ``transforms`` til
+``Matrix3D`` i ``apply_layout``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Mapping, Optional, Set, Tuple
+
+from scripts.stirling_core.packing import pack_layout, part_bounds
+from scripts.stirling_core.transforms import TransformTree
+
+
+@dataclass
+class LayoutEntry:
+    origin: Tuple[float, float, float]
+    orientation: Tuple[float, float, float]
+    parent: Optional[str] = None
+
+
+def build_layout_table(
+    params: Optional[Mapping[str, object]], geom: Dict[str, float], pack: bool = True
+) -> Dict[str, LayoutEntry]:
+    """Definerer posisjon/orientering for alle komponenter i gamma-oppsettet.
+
+    Ankerpunktene følger STIRLING_ARCHITEKTUR.md seksjon 5 uten
+    håndplukkede avstander; med ``pack`` flytter ``packing.pack_layout``
+    deler som overlapper ut på inspeksjonsrutenettet.
+    """
+
+    _ = params  # Parametre beholdes for fremtidige layoututvidelser
+    layout = nominal_layout_table(geom)
+    if not pack:
+        return layout
+    origins = _packed_origins(tuple(sorted(geom.items())))
+    return {
+        name: LayoutEntry(origin=origins[name], orientation=entry.orientation, parent=entry.parent)
+        for name, entry in layout.items()
+    }
+
+
+@lru_cache(maxsize=8)
+def _packed_origins(geometry: Tuple[Tuple[str, float], ...]) -> Dict[str, Tuple[float, float, float]]:
+    # Pakkingen avhenger bare av geometrien. Regenereringen pakker samme
+    # tabell i ``plan_regeneration`` og i ``regenerate``, og forrige kjørings
+    # tabell er den ``plan_regeneration`` sammenligner med.
+    geom = dict(geometry)
+    layout = nominal_layout_table(geom)
+    origins, _moved = pack_layout(layout, {name: part_bounds(name, geom) for name in layout})
+    return origins
+
+
+def nominal_layout_table(geom: Dict[str, float]) -> Dict[str, LayoutEntry]:
+    """Ankerpunktene før pakking, hvert relativt til forelderen."""
+
+    base_z = geom["base_thick"]
+    cylinder_offset = geom["offset"] / 2.0
+    y_front = geom["base_width"] / 2.0 - 25.0
+    z_shaft = base_z + max(geom["len_work"], geom["len_disp"]) / 2.0
+    rod_y = -geom["base_width"] / 2.0 + 25.0
+    rod_z = base_z + geom["len_work"] / 2.0
+    # Varmeplaten henger rett under bunnplaten, med ribbene opp mot den.
+    thermal_height = max(box[1][2] for box in part_bounds("thermal", geom))
+
+    return {
+        "frame": LayoutEntry(origin=(0.0, 0.0, 0.0), orientation=(0.0, 0.0, 0.0), parent=None),
+        "work_cylinder": LayoutEntry(
+            origin=(-cylinder_offset, 0.0, base_z),
+            orientation=(0.0, 0.0, 0.0),
+            parent="frame",
+        ),
+        "displacer_cylinder": LayoutEntry(
+            origin=(cylinder_offset, 0.0, base_z),
+            orientation=(0.0, 0.0, 0.0),
+            parent="frame",
+        ),
+        "work_piston": LayoutEntry(
+            origin=(0.0, 0.0, geom["len_work"] / 2.0),
+            orientation=(0.0, 0.0, 0.0),
+            parent="work_cylinder",
+        ),
+        "displacer": LayoutEntry(
+            origin=(0.0, 0.0, geom["len_disp"] / 2.0),
+            orientation=(0.0, 0.0, 0.0),
+            parent="displacer_cylinder",
+        ),
+        "crankshaft": LayoutEntry(
+            origin=(0.0, y_front, z_shaft),
+            orientation=(0.0, 90.0, 0.0),
+            parent="frame",
+        ),
+        # Svinghjulet sitter på akselen; pakkingen skyver det ut til siden.
+        "flywheel": LayoutEntry(
+            origin=(0.0, 0.0, 0.0),
+            orientation=(0.0, 0.0, 0.0),
+            parent="crankshaft",
+        ),
+        "thermal": LayoutEntry(
+            origin=(0.0, 0.0, -thermal_height),
+            orientation=(0.0, 0.0, 0.0),
+            parent="frame",
+        ),
+        "connecting_rods": LayoutEntry(
+            origin=(0.0, rod_y, rod_z),
+            orientation=(0.0, 0.0, 0.0),
+            parent="frame",
+        ),
+        # Andre koblingsstang: samme komponent som den første, egen forekomst.
+        "connecting_rod_2": LayoutEntry(
+            origin=(0.0, 0.0, 0.0),
+            orientation=(0.0, 0.0, 0.0),
+            parent="connecting_rods",
+        ),
+    }
+
+
+def resolve_layout_table(layout: Dict[str, LayoutEntry]) -> Dict[str, LayoutEntry]:
+    """Evaluerer layout med hensyn på foreldrenes posisjon/orientering.
+
+    Transformene settes sammen som matriser (se ``transforms.TransformTree``),
+    så en rotert forelder roterer også barnets posisjon og orientering.
+    """
+
+    tree = TransformTree(layout)
+    resolved: Dict[str, LayoutEntry] = {}
+    for name in layout:
+        origin, orientation = tree.resolved(name)
+        resolved[name] = LayoutEntry(origin=origin, orientation=orientation)
+    return resolved
+
+
+def changed_layout_entries(
+    previous: Dict[str, LayoutEntry], current: Dict[str, LayoutEntry]
+) -> Set[str]:
+    """Poster i ``current`` der verdenstransformen avviker fra ``previous``."""
+
+    tree = TransformTree(previous)
+    tree.take_dirty()
+    return tree.update(current) & set(current)
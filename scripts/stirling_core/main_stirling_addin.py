@@ -3,34 +3,134 @@
 
 from __future__ import annotations
 
+import contextlib
+import csv
 import datetime as _dt
+import functools
+import io
+import json
 import math
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
 
 import adsk.core
 import adsk.fusion
 import traceback
 
+from scripts.shared import units
+from scripts.shared.artifact_store import ArtifactStore, atomic_write_text
+from scripts.shared.entity_tags import AttributeIndex, tag_entities, tag_entity
+from scripts.shared.library_cache import LookupCache, search_libraries
 from scripts.shared.config_loader import load_machine_park, load_material_catalog
+from scripts.shared.parameter_snapshot import ParameterSnapshot
+from scripts.stirling_core import engine
+from scripts.stirling_core.dependencies import (
+    COMPONENT_KEYS,
+    EXPORT_TARGETS,
+    RegenerationPlan,
+    full_plan,
+    parameters_for,
+    plan_regeneration,
+)
+from scripts.stirling_core.engine import BuilderError, evaluate_clearances
+from scripts.stirling_core.export_queue import (
+    EXPORT_FORMATS,
+    ExportJob,
+    ExportQueue,
+    ExportReport,
+    ExportSettings,
+)
+from scripts.stirling_core.fingerprints import (
+    export_is_current,
+    fingerprint_path,
+    geometry_fingerprint,
+    load_fingerprints,
+    parameter_hash,
+    store_fingerprint,
+)
+from scripts.stirling_core.layout import LayoutEntry, build_layout_table
+from scripts.stirling_core.transforms import Matrix, TransformTree
+from scripts.stirling_core import primitives
+from scripts.stirling_core.parameters import PARAMETER_DEFINITIONS, ParameterDef, parameter_units
 
 ID_TAG = "codex_fusionapi_v1.9"
 _COMPLIANCE_BANNER = f"COMPLIANCE BANNER :: ID {ID_TAG} :: stirling_core"
 _ATTR_GROUP = "stirling_core"
+# Flater merket av byggerne når de lages (se scripts/shared/entity_tags.py).
+_TAG_GROUP = "stirling_core_tags"
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 CAD_DIR = PROJECT_ROOT / "cad"
 DOCS_DIR = PROJECT_ROOT / "docs"
 SIM_DIR = PROJECT_ROOT / "sim"
-
-
-@dataclass
-class ParameterDef:
-    name: str
-    value: float
-    unit: str
-    comment: str
+# Innholdsadressert lager med eksporter og dokumenter per parametervariant.
+ARTIFACT_STORE_DIR = PROJECT_ROOT / ".artifacts"
+
+# Formater, nettfinhet for STL/OBJ og mål for eksporten i denne kjøringen, f.eks.
+# ExportSettings(formats=("step",)) når kun STEP trengs, eller refinement="low".
+EXPORT_SETTINGS = ExportSettings()
+# Sett > 0 for å kjøre full regenerering så mange ganger og skrive ut tid per kjøring.
+RERUN_BENCHMARK_RUNS = 0
+# Sett f.eks. (4, 8, 16, 32, 64) for å måle ramme og varmeplate med så mange mønsterinstanser.
+PATTERN_BENCHMARK_COUNTS: Tuple[int, ...] = ()
+# Utsett skisseberegning og skjermoppdatering mens komponentene bygges (se bulk_build).
+# Sett til False for å bygge feature for feature med fortløpende beregning ved feilsøking.
+BULK_BUILD = True
+# Bygg kroppene direkte med TemporaryBRepManager i én basefeature per komponent
+# i stedet for skisse/extrude-features. Raskt for forhåndsvisning og batcheksport,
+# men uten parametrisk historikk og uten gjengefeatures.
+DIRECT_BUILD = False
+
+# Skisser opprettet med utsatt beregning under bulk_build; None utenfor bulkbygging.
+_deferred_sketches: Optional[List[adsk.fusion.Sketch]] = None
+# Bibliotekoppslag for materialer og utseender, gjenbrukt gjennom hele økten.
+_library_materials: Optional[LookupCache] = None
+_library_appearances: Optional[LookupCache] = None
+# Verdensmatrisene for layouttabellen; kun endrede undertrær regnes om mellom kjøringer.
+_layout_tree: Optional[TransformTree] = None
+
+COMPONENT_NAMES: Dict[str, str] = {
+    "frame": "Ramme og bunnplate",
+    "work_cylinder": "Arbeidssylinder",
+    "displacer_cylinder": "Fortrengersylinder",
+    "work_piston": "Arbeidsstempel",
+    "displacer": "Fortrenger",
+    "crankshaft": "Veivaksel",
+    "flywheel": "Svinghjul",
+    "connecting_rods": "Koblingsstenger",
+    "connecting_rod_2": "Koblingsstang 2",
+    "thermal": "Varme og kjøl",
+}
+COMPONENT_MATERIALS: Dict[str, str] = {
+    "frame": "Aluminum 6061",
+    "work_cylinder": "Glass - Clear",
+    "displacer_cylinder": "Glass - Clear",
+    "work_piston": "Aluminum - Satin",
+    "displacer": "Carbon Fiber",
+    "crankshaft": "Steel",
+    "flywheel": "Steel",
+    "connecting_rods": "Brass",
+    "connecting_rod_2": "Brass",
+    "thermal": "Copper",
+}
+COMPONENT_APPEARANCES: Dict[str, str] = {
+    "frame": "Brushed Aluminum",
+    "thermal": "Copper - Polished",
+}
+ENTITY_TAGS: Dict[str, Tuple[str, ...]] = {
+    "frame": ("frame_top", "mount_thread"),
+    "displacer": ("displacer_top", "displacer_bore"),
+    "flywheel": ("flywheel_end", "shaft_bore"),
+    "thermal": ("thermal_top",),
+}
+DOCUMENT_PATHS = {
+    "bom": DOCS_DIR / "BOM.csv",
+    "arbeidsplan": DOCS_DIR / "arbeidsplan.md",
+    "changelog": DOCS_DIR / "ENDRINGSLOGG.md",
+    "simulation": SIM_DIR / "kinematikk_plan.md",
+}
 
 
 @dataclass
@@ -52,45 +152,8 @@ class ComponentRecord:
     component: adsk.fusion.Component
     occurrence: adsk.fusion.Occurrence
     bodies: List[adsk.fusion.BRepBody]
-
-
-@dataclass
-class LayoutEntry:
-    origin: Tuple[float, float, float]
-    orientation: Tuple[float, float, float]
-    parent: Optional[str] = None
-
-
-PARAMETER_DEFINITIONS: Tuple[ParameterDef, ...] = (
-    ParameterDef("ID_WORK", 63.0, "mm", "Innvendig diameter arbeidssylinder (kvartsglass)."),
-    ParameterDef("OD_WORK", 70.0, "mm", "Ytre diameter arbeidssylinder."),
-    ParameterDef("LEN_WORK", 20.0, "mm", "Arbeidssylinderens lengde."),
-    ParameterDef("ID_DISP", 63.0, "mm", "Innvendig diameter fortrengersylinder."),
-    ParameterDef("OD_DISP", 70.0, "mm", "Ytre diameter fortrengersylinder."),
-    ParameterDef("LEN_DISP", 20.0, "mm", "Fortrengersylinderens lengde."),
-    ParameterDef("ANGLE_CYL", 90.0, "deg", "Vinkel mellom sylindre."),
-    ParameterDef("STROKE", 15.0, "mm", "Slaglengde."),
-    ParameterDef("CR_TARGET", 1.4, "", "Målsatt kompresjonsforhold."),
-    ParameterDef("CLEAR_MIN", 0.10, "mm", "Minimum klaring mellom bevegelige deler."),
-    ParameterDef("CLEAR_MAX", 0.30, "mm", "Maksimum klaring."),
-    ParameterDef("FLYWHEEL_D", 140.0, "mm", "Svinghjulsdiameter."),
-    ParameterDef("FLYWHEEL_THICK", 12.0, "mm", "Svinghjulstykkelse."),
-    ParameterDef("CRANK_PIN", 4.0, "mm", "Veivpinndiameter."),
-    ParameterDef("SHAFT_D", 8.0, "mm", "Veivakseldiameter."),
-    ParameterDef("ROD_DIAMETER", 6.0, "mm", "Koblingsstangdiameter."),
-    ParameterDef("ROD_LENGTH", 70.0, "mm", "Koblingsstanglengde."),
-    ParameterDef("DISPLACER_OFFSET", 80.0, "mm", "Senteravstand mellom sylindre."),
-    ParameterDef("BASE_LENGTH", 260.0, "mm", "Lengde på bunnplate."),
-    ParameterDef("BASE_WIDTH", 160.0, "mm", "Bredde på bunnplate."),
-    ParameterDef("BASE_THICK", 12.0, "mm", "Bunnplatetykkelse."),
-    ParameterDef("FRAME_COLUMN_H", 95.0, "mm", "Høyde på rammesøyler."),
-    ParameterDef("HOT_END_TEMP", 650.0, "degC", "Metadata: varm-sone temperatur."),
-    ParameterDef("COLD_END_TEMP", 60.0, "degC", "Metadata: kald-sone temperatur."),
-)
-
-
-class BuilderError(RuntimeError):
-    """Signaliserer at genereringen ikke kan fortsette."""
+    # Nøkkelen til komponenten som eier definisjonen når forekomsten deler den.
+    shared_from: Optional[str] = None
 
 
 def run(context: str) -> None:
@@ -103,18 +166,17 @@ def run(context: str) -> None:
         design = adsk.fusion.Design.cast(app.activeProduct)
         if not design:
             raise BuilderError("Aktivt dokument er ikke en Fusion 360 Design.")
-        params = define_parameters(design)
-        records, geom, metrics = create_geometry(design, params)
-        layout_table = build_layout_table(params, geom)
-        apply_layout(design.rootComponent, records, layout_table)
-        production_report = apply_production_constraints(design, params, geom)
-        clearance_report = evaluate_clearances(params, geom)
-        create_kinematics(design, records, geom)
-        generate_drawings(design, records)
-        export_BOM(
-            design, records, params, geom, metrics, clearance_report, production_report
-        )
+        if RERUN_BENCHMARK_RUNS > 0:
+            benchmark_reruns(design, RERUN_BENCHMARK_RUNS)
+            return
+        if PATTERN_BENCHMARK_COUNTS:
+            benchmark_patterns(design, PATTERN_BENCHMARK_COUNTS)
+            return
+        # Eksporten kjøres etter oppsummeringen, med fremdrift og mulighet til å avbryte.
+        queue = ExportQueue(EXPORT_SETTINGS)
+        metrics, clearance_report, production_report = regenerate(design, export_queue=queue)
         summarize(ui, metrics, clearance_report, production_report)
+        run_export_queue(queue, ui)
     except Exception:  # pragma: no cover - Fusion viser detaljer
         if ui:
             ui.messageBox(f"Stirlingmotoren feilet:\n{traceback.format_exc()}")
@@ -126,6 +188,162 @@ def stop(context: str) -> None:
     print(f"Stopper skript :: {_COMPLIANCE_BANNER}")
 
 
+def regenerate(
+    design: adsk.fusion.Design,
+    force_full: bool = False,
+    bulk: Optional[bool] = None,
+    direct: Optional[bool] = None,
+    export_queue: Optional[ExportQueue] = None,
+) -> Tuple[Dict[str, float], Dict[str, float], Dict[str, str]]:
+    """Kjør hele genereringspipen og returner metrics, klaringer og produksjonsrapport.
+
+    ``bulk`` og ``direct`` overstyrer ``BULK_BUILD`` og ``DIRECT_BUILD`` for
+    denne kjøringen. Med ``export_queue`` legges eksportene i køen og
+    kjøres av kalleren; ellers eksporteres det før funksjonen returnerer.
+    """
+
+    bulk = BULK_BUILD if bulk is None else bulk
+    direct = DIRECT_BUILD if direct is None else direct
+    queue = export_queue if export_queue is not None else ExportQueue(EXPORT_SETTINGS)
+    define_parameters(design)
+    values = read_parameter_snapshot(design)
+    plan = full_plan() if force_full else plan_build(design, values, direct, queue.settings)
+    print(f"Regenerering: {plan.describe()}")
+    timings: Dict[str, float] = {}
+    with bulk_build(design, bulk, timings):
+        records, geom, metrics = create_geometry(design, values, plan, direct)
+        layout_table = build_layout_table(values, geom)
+        apply_layout(design.rootComponent, records, layout_table, plan.layout)
+    if not direct:
+        report_missing_tags(design)
+    mode = "direkte" if direct else ("bulk" if bulk else "feature for feature")
+    print(
+        f"Byggetid ({mode}): "
+        f"{timings['build']:.2f} s bygging, {timings['compute']:.2f} s sluttberegning"
+    )
+    production_report = apply_production_constraints(design, values, geom)
+    clearance_report = evaluate_clearances(values, geom)
+    create_kinematics(design, records, geom)
+    if "drawings" in plan.documents:
+        generate_drawings(design, records)
+    export_BOM(
+        design, records, values, geom, metrics, clearance_report, production_report, plan, direct, queue
+    )
+    store_built_parameters(design, dict(values), direct)
+    if export_queue is None:
+        run_export_queue(queue)
+    return metrics, clearance_report, production_report
+
+
+def benchmark_reruns(design: adsk.fusion.Design, runs: int = 20) -> Dict[str, List[float]]:
+    """Kjør full regenerering ``runs`` ganger per byggemodus og logg tid og tidslinjelengde.
+
+    Med gjenbruk av forekomster skal både tiden og antall tidslinjeobjekter
+    holde seg flate fra kjøring til kjøring. Til slutt skrives snittid for
+    bulkbygging, feature-for-feature-bygging og direkte bygging side om side.
+    """
+
+    modes = (
+        ("bulk", True, False),
+        ("feature for feature", False, False),
+        ("direkte", True, True),
+    )
+    timings: Dict[str, List[float]] = {mode: [] for mode, _, _ in modes}
+    for mode, bulk, direct in modes:
+        for index in range(runs):
+            started = time.perf_counter()
+            regenerate(design, force_full=True, bulk=bulk, direct=direct)
+            adsk.doEvents()
+            timings[mode].append(time.perf_counter() - started)
+            timeline_count = design.timeline.count if design.timeline else 0
+            occurrence_count = design.rootComponent.occurrences.count
+            print(
+                f"{mode} {index + 1}/{runs}: {timings[mode][-1]:.2f} s, "
+                f"tidslinje {timeline_count}, forekomster {occurrence_count}"
+            )
+    for mode, samples in timings.items():
+        if samples:
+            print(f"Snitt {mode}: {sum(samples) / len(samples):.2f} s over {len(samples)} kjøringer")
+    return timings
+
+
+def benchmark_patterns(design: adsk.fusion.Design, counts: Iterable[int]) -> List[Tuple[int, float, int]]:
+    """Bygg ramme og varmeplate med ``count`` hull og ribber og logg tid og features.
+
+    Byggene skjer i midlertidige komponenter som slettes etterpå. Med
+    mønsterfeatures skal antall features være det samme for alle antall.
+    """
+
+    define_parameters(design)
+    geom = engine.compute_geometry_inputs(read_parameter_snapshot(design))
+    root = design.rootComponent
+    results: List[Tuple[int, float, int]] = []
+    for count in counts:
+        count_x = max(1, math.ceil(math.sqrt(count)))
+        count_y = max(1, math.ceil(count / count_x))
+        variant = dict(geom, rib_count=count, mount_count_x=count_x, mount_count_y=count_y)
+        occurrences = []
+        started = time.perf_counter()
+        feature_count = 0
+        with bulk_build(design):
+            for key, builder in (("frame", build_frame), ("thermal", build_thermal_features)):
+                occ = root.occurrences.addNewComponent(adsk.core.Matrix3D.create())
+                occ.component.name = f"Mønsterbenchmark {key} {count}"
+                occurrences.append(occ)
+                builder(ComponentRecord(name=occ.component.name, component=occ.component, occurrence=occ, bodies=[]), variant)
+        elapsed = time.perf_counter() - started
+        for occ in occurrences:
+            feature_count += occ.component.features.count
+            occ.deleteMe()
+        results.append((count, elapsed, feature_count))
+        print(
+            f"Mønster {count} instanser ({count_x}×{count_y} hull, {count} ribber): "
+            f"{elapsed:.2f} s, {feature_count} features"
+        )
+    return results
+
+
+@contextlib.contextmanager
+def bulk_build(
+    design: adsk.fusion.Design, enabled: bool = True, timings: Optional[Dict[str, float]] = None
+) -> Iterator[None]:
+    """Bygg med utsatt skisseberegning og én samlet beregning til slutt.
+
+    Skisser fra ``add_sketch`` får ``isComputeDeferred`` slik at kurvene
+    løses samlet når profilene først trengs (``sketch_profiles``), ikke for
+    hver kurve. Skisser som aldri brukes til profiler beregnes ved slutten,
+    der designet beregnes og visningen oppdateres én gang. Med
+    ``enabled=False`` bygges alt som før. ``timings`` fylles med
+    ``build`` og ``compute`` (sekunder).
+    """
+
+    global _deferred_sketches
+    timings = timings if timings is not None else {}
+    started = time.perf_counter()
+    if not enabled:
+        yield
+        timings["build"] = time.perf_counter() - started
+        timings["compute"] = 0.0
+        return
+
+    _deferred_sketches = []
+    try:
+        yield
+        timings["build"] = time.perf_counter() - started
+        started = time.perf_counter()
+        for sketch in _deferred_sketches:
+            if sketch.isValid and sketch.isComputeDeferred:
+                sketch.isComputeDeferred = False
+        design.computeAll()
+        app = adsk.core.Application.get()
+        viewport = app.activeViewport if app else None
+        if viewport:
+            viewport.refresh()
+        timings["compute"] = time.perf_counter() - started
+    finally:
+        _deferred_sketches = None
+
+
 def define_parameters(design: adsk.fusion.Design) -> Dict[str, adsk.fusion.UserParameter]:
     """Opprett og synkroniser alle brukerparametre før videre generering."""
 
@@ -133,95 +351,140 @@ def define_parameters(design: adsk.fusion.Design) -> Dict[str, adsk.fusion.UserP
     return register_user_parameters(design)
 
 
+def read_parameter_snapshot(design: adsk.fusion.Design) -> ParameterSnapshot:
+    """Les motorparametrene én gang, i enhetene fra PARAMETER_DEFINITIONS."""
+
+    unit_map = parameter_units()
+    return ParameterSnapshot.from_design(design, unit_map, names=unit_map)
+
+
+def plan_build(
+    design: adsk.fusion.Design,
+    values: Mapping[str, float],
+    direct: bool = False,
+    settings: Optional[ExportSettings] = None,
+) -> RegenerationPlan:
+    """Finn hva som må regenereres siden forrige vellykkede kjøring.
+
+    I tillegg til parameterendringer bygges komponenter som mangler i
+    designet, artefakter som mangler på disk og eksporter som tidligere
+    kjøringer valgte bort (``load_pending_exports``). Bytte av byggevei
+    (``direct``) gir full regenerering.
+    """
+
+    plan = plan_regeneration(load_built_parameters(design, direct), values)
+    missing_components = set(COMPONENT_KEYS) - set(find_component_occurrences(design))
+    if missing_components:
+        plan.components |= missing_components
+        plan.layout |= missing_components
+        plan.exports |= {"assembly"} | (missing_components & set(EXPORT_TARGETS))
+    plan.exports |= missing_exports(settings or EXPORT_SETTINGS)
+    plan.exports |= {target for target, _fmt in load_pending_exports(design)}
+    plan.documents |= {name for name, path in DOCUMENT_PATHS.items() if not path.exists()}
+    return plan
+
+
+def load_built_parameters(
+    design: adsk.fusion.Design, direct: bool = False
+) -> Optional[Dict[str, float]]:
+    """Parametertabellen fra forrige vellykkede bygg med samme byggevei, eller ``None``."""
+
+    attribute = design.attributes.itemByName(_ATTR_GROUP, "built_parameters")
+    if not attribute:
+        return None
+    try:
+        payload = json.loads(attribute.value)
+    except ValueError:
+        return None
+    # Ny skriptversjon kan endre byggefunksjonene; da bygges alt på nytt.
+    if payload.get("id") != ID_TAG:
+        return None
+    if payload.get("build", "features") != _build_label(direct):
+        return None
+    return {name: float(value) for name, value in payload.get("values", {}).items()}
+
+
+def store_built_parameters(
+    design: adsk.fusion.Design, values: Mapping[str, float], direct: bool = False
+) -> None:
+    payload = json.dumps(
+        {"id": ID_TAG, "build": _build_label(direct), "values": dict(values)}, sort_keys=True
+    )
+    design.attributes.add(_ATTR_GROUP, "built_parameters", payload)
+
+
+def _build_label(direct: bool) -> str:
+    return "direct" if direct else "features"
+
+
 def create_geometry(
     design: adsk.fusion.Design,
-    params: Dict[str, adsk.fusion.UserParameter],
+    values: Mapping[str, float],
+    plan: Optional[RegenerationPlan] = None,
+    direct: bool = False,
 ) -> Tuple[Dict[str, ComponentRecord], Dict[str, float], Dict[str, float]]:
-    """Generer alle komponenter og tilhørende metadata."""
-
-    geom = compute_geometry_inputs(design, params)
-    metrics = compute_performance_metrics(params, geom)
-    records = create_component_records(design)
-    build_geometry(design, records, geom)
-    apply_materials_and_appearances(design, records)
-    return records, geom, metrics
+    """Generer komponentene i ``plan`` (alle uten plan) og tilhørende metadata.
 
+    Med ``direct`` bygges kroppene via ``build_geometry_direct``.
+    """
 
-def build_layout_table(
-    params: Dict[str, adsk.fusion.UserParameter], geom: Dict[str, float]
-) -> Dict[str, LayoutEntry]:
-    """Definerer posisjon/orientering for alle komponenter i gamma-oppsettet."""
-
-    _ = params  # Parametre beholdes for fremtidige layoututvidelser
-    base_z = geom["base_thick"]
-    cylinder_offset = geom["offset"] / 2.0
-    work_mid = base_z + geom["len_work"] / 2.0
-    disp_mid = base_z + geom["len_disp"] / 2.0
-    y_front = geom["base_width"] / 2.0 - 25.0
-    z_shaft = base_z + max(geom["len_work"], geom["len_disp"]) / 2.0
-    rod_y = -geom["base_width"] / 2.0 + 25.0
-    rod_z = base_z + geom["len_work"] / 2.0
-
-    layout: Dict[str, LayoutEntry] = {
-        "frame": LayoutEntry(origin=(0.0, 0.0, 0.0), orientation=(0.0, 0.0, 0.0), parent=None),
-        "work_cylinder": LayoutEntry(
-            origin=(-cylinder_offset, 0.0, base_z),
-            orientation=(0.0, 0.0, 0.0),
-            parent="frame",
-        ),
-        "displacer_cylinder": LayoutEntry(
-            origin=(cylinder_offset, 0.0, base_z),
-            orientation=(0.0, 0.0, 0.0),
-            parent="frame",
-        ),
-        "work_piston": LayoutEntry(
-            origin=(-cylinder_offset, 0.0, work_mid),
-            orientation=(0.0, 0.0, 0.0),
-            parent="work_cylinder",
-        ),
-        "displacer": LayoutEntry(
-            origin=(cylinder_offset, 0.0, disp_mid),
-            orientation=(0.0, 0.0, 0.0),
-            parent="displacer_cylinder",
-        ),
-        "crankshaft": LayoutEntry(
-            origin=(0.0, y_front, z_shaft),
-            orientation=(0.0, 90.0, 0.0),
-            parent="frame",
-        ),
-        "flywheel": LayoutEntry(
-            origin=(0.0, y_front + 10.0, z_shaft),
-            orientation=(0.0, 90.0, 0.0),
-            parent="crankshaft",
-        ),
-        "thermal": LayoutEntry(
-            origin=(0.0, 0.0, -20.0),
-            orientation=(0.0, 0.0, 0.0),
-            parent="frame",
-        ),
-        "connecting_rods": LayoutEntry(
-            origin=(0.0, rod_y, rod_z),
-            orientation=(0.0, 0.0, 0.0),
-            parent="frame",
-        ),
-    }
-    return layout
+    geom = engine.compute_geometry_inputs(values)
+    metrics = engine.compute_performance_metrics(values, geom)
+    metrics.update(compute_thermal_metrics(geom, metrics))
+    owners = primitives.shared_definitions(geom, COMPONENT_KEYS, COMPONENT_MATERIALS)
+    rebuild = plan.components if plan else None
+    if plan:
+        # Forekomster som bytter definisjon (deles/deles ikke lenger) lages på nytt.
+        redefined = redefined_components(design, owners)
+        plan.components |= redefined
+        plan.layout |= redefined
+    records = create_component_records(design, rebuild, owners)
+    shared = {key: owner for key, owner in owners.items() if owner != key}
+    if shared:
+        print("Delte definisjoner: " + ", ".join(f"{key} → {owner}" for key, owner in shared.items()))
+    if direct:
+        build_geometry_direct(design, records, geom, rebuild)
+    else:
+        build_geometry(design, records, geom, rebuild)
+    apply_materials_and_appearances(design, records, rebuild)
+    return records, geom, metrics
 
 
 def apply_layout(
     root: adsk.fusion.Component,
     records: Dict[str, ComponentRecord],
     layout: Dict[str, LayoutEntry],
+    names: Optional[Set[str]] = None,
 ) -> None:
-    """Plasser alle komponentforekomster iht. layouttabellen."""
+    """Plasser komponentforekomstene i ``names`` (alle uten filter) iht. layouttabellen.
 
-    resolved = resolve_layout_table(layout)
-    for name, entry in resolved.items():
-        record = records.get(name)
-        if not record:
-            continue
-        transform = layout_entry_to_matrix(entry)
-        set_component_transform(record.occurrence, transform)
+    Alle verdensmatrisene hentes fra transformtreet før første forekomst
+    flyttes, og settes deretter i én omgang. De faste leddene til
+    forekomster som flyttes slettes først; ``build_joints`` lager dem på
+    nytt med den nye plasseringen.
+    """
+
+    global _layout_tree
+    if _layout_tree is None:
+        _layout_tree = TransformTree()
+    _layout_tree.update(layout)
+    targets = [name for name in layout if name in records and (names is None or name in names)]
+    transforms = [
+        (records[name].occurrence, layout_matrix(matrix))
+        for name, matrix in _layout_tree.world_transforms(targets).items()
+    ]
+    # Leddene mot rammen låser den relative posisjonen; flyttes rammen, gjelder det alle.
+    relaid = records if "frame" in targets else targets
+    for name in relaid:
+        remove_as_built_joints(records[name].occurrence)
+    for occurrence, transform in transforms:
+        set_component_transform(occurrence, transform)
+
+
+def remove_as_built_joints(occurrence: adsk.fusion.Occurrence) -> None:
+    joints = occurrence.asBuiltJoints
+    for index in range(joints.count - 1, -1, -1):
+        joints.item(index).deleteMe()
 
 
 def create_kinematics(
@@ -237,71 +500,130 @@ def create_kinematics(
 def export_BOM(
     design: adsk.fusion.Design,
     records: Dict[str, ComponentRecord],
-    params: Dict[str, adsk.fusion.UserParameter],
+    values: Mapping[str, float],
     geom: Dict[str, float],
     metrics: Dict[str, float],
     clearances: Dict[str, float],
     production_report: Dict[str, str],
+    plan: Optional[RegenerationPlan] = None,
+    direct: bool = False,
+    queue: Optional[ExportQueue] = None,
 ) -> None:
-    """Generer eksportfiler, stykk-liste og metadata."""
-
-    export_all(records, design)
-    bom_entries = compile_bom_entries(params, geom, metrics)
-    write_bom(bom_entries)
-    write_arbeidsplan()
-    update_changelog()
-    write_simulation_stub(metrics)
-    apply_metadata(design, metrics, clearances, production_report)
-
-
-def resolve_layout_table(layout: Dict[str, LayoutEntry]) -> Dict[str, LayoutEntry]:
-    """Evaluerer layout med hensyn på foreldrenes posisjon/orientering."""
-
-    resolved: Dict[str, LayoutEntry] = {}
-
-    def _resolve(name: str) -> LayoutEntry:
-        if name in resolved:
-            return resolved[name]
-        entry = layout[name]
-        origin = entry.origin
-        orientation = entry.orientation
-        if entry.parent and entry.parent in layout:
-            parent_entry = _resolve(entry.parent)
-            origin = tuple(parent_entry.origin[i] + origin[i] for i in range(3))
-            orientation = tuple(parent_entry.orientation[i] + orientation[i] for i in range(3))
-        resolved[name] = LayoutEntry(origin=origin, orientation=orientation)
-        return resolved[name]
-
-    for key in layout:
-        _resolve(key)
-    return resolved
-
-
-def layout_entry_to_matrix(entry: LayoutEntry) -> adsk.core.Matrix3D:
-    matrix = compose_orientation_matrix(entry.orientation)
-    matrix.translation = adsk.core.Vector3D.create(
-        mm_to_cm(entry.origin[0]),
-        mm_to_cm(entry.origin[1]),
-        mm_to_cm(entry.origin[2]),
-    )
-    return matrix
+    """Skriv stykkliste, dokumenter og metadata og legg eksportene i ``queue``.
 
+    Filer som artefaktlageret allerede har for denne parametervarianten
+    hentes derfra; eksporter sjekkes likevel mot fingeravtrykket før de
+    hoppes over. Etter eksporten lagres dokumentene og eksportene for de
+    valgte målene og formatene for varianten. Uten ``queue`` eksporteres
+    det med en gang.
+    """
 
-def compose_orientation_matrix(orientation: Tuple[float, float, float]) -> adsk.core.Matrix3D:
-    matrix = adsk.core.Matrix3D.create()
-    matrix.setToIdentity()
-    axes = (
-        adsk.core.Vector3D.create(1, 0, 0),
-        adsk.core.Vector3D.create(0, 1, 0),
-        adsk.core.Vector3D.create(0, 0, 1),
-    )
-    for angle_deg, axis in zip(orientation, axes):
-        if abs(angle_deg) < 1e-6:
+    run_now = queue is None
+    queue = queue if queue is not None else ExportQueue(EXPORT_SETTINGS)
+    documents = plan.documents if plan else set(DOCUMENT_PATHS) | {"metadata"}
+    exports = plan.exports if plan else set(EXPORT_TARGETS)
+    store = artifact_store()
+    variant = variant_key(values, direct, queue.settings)
+    paths = artifact_paths()
+    restored = store.materialize(variant, paths)
+    if restored:
+        print(f"Artefaktlager: {len(restored)} filer fra variant {variant} gjenbrukt")
+    documents = {name for name in documents if f"document:{name}" not in restored}
+    export_all(records, design, exports, values, queue)
+    update_pending_exports(design, exports, queue.settings)
+    if "bom" in documents:
+        bom_entries = compile_bom_entries(values, geom, metrics)
+        write_bom(bom_entries)
+    if "arbeidsplan" in documents:
+        write_arbeidsplan()
+    if "changelog" in documents:
+        update_changelog()
+    if "simulation" in documents:
+        write_simulation_stub(metrics)
+    if "metadata" in documents:
+        apply_metadata(design, metrics, clearances, production_report)
+    queue.finalizers.append(remove_unfinished_exports)
+    # Kun filene denne kjøringen har gjort gjeldende: formater og mål som er
+    # valgt bort kan ligge igjen fra en annen variant.
+    current = artifact_paths(queue.settings)
+    queue.finalizers.append(lambda report: store.record(variant, current))
+    if run_now:
+        run_export_queue(queue)
+
+
+def load_pending_exports(design: adsk.fusion.Design) -> Set[Tuple[str, str]]:
+    """``(mål, format)`` som er berørt av endringer, men ikke eksportert ennå."""
+
+    attribute = design.attributes.itemByName(_ATTR_GROUP, "pending_exports")
+    if not attribute:
+        return set()
+    try:
+        return {(str(target), str(fmt)) for target, fmt in json.loads(attribute.value)}
+    except (TypeError, ValueError):
+        return set()
+
+
+def update_pending_exports(
+    design: adsk.fusion.Design, exports: Iterable[str], settings: ExportSettings
+) -> None:
+    """Husk berørte eksporter som ``settings`` valgte bort, og glem dem som ble tatt med.
+
+    Parametrene lagres som bygget selv om noen formater eller mål ikke
+    eksporteres; uten denne listen ville de gamle filene aldri blitt fornyet.
+    """
+
+    exports = set(exports)
+    affected = {(target, fmt) for target in exports for fmt in EXPORT_FORMATS}
+    handled = {(target, fmt) for target in exports if settings.wants(target) for fmt in settings.formats}
+    previous = load_pending_exports(design)
+    pending = (previous | affected) - handled
+    if pending != previous:
+        design.attributes.add(_ATTR_GROUP, "pending_exports", json.dumps(sorted(pending)))
+
+
+def artifact_store() -> ArtifactStore:
+    return ArtifactStore(ARTIFACT_STORE_DIR, PROJECT_ROOT)
+
+
+def variant_key(
+    values: Mapping[str, float], direct: bool = False, settings: Optional[ExportSettings] = None
+) -> str:
+    """Nøkkel for parametervarianten i artefaktlageret.
+
+    Skriptversjon, byggevei og nettfinhet inngår, siden de endrer filene.
+    """
+
+    refinement = (settings or EXPORT_SETTINGS).refinement
+    return parameter_hash(values, salt=f"{ID_TAG}:{_build_label(direct)}:{refinement}")
+
+
+def artifact_paths(settings: Optional[ExportSettings] = None) -> Dict[str, Path]:
+    """``{artefakttype: arbeidssti}`` for alt som lagres per variant.
+
+    Med ``settings`` kun eksportene for målene og formatene som er valgt.
+    """
+
+    paths: Dict[str, Path] = {}
+    for name in EXPORT_TARGETS:
+        if settings is not None and not settings.wants(name):
             continue
-        rotation = adsk.core.Matrix3D.create()
-        rotation.setToRotation(math.radians(angle_deg), axis, adsk.core.Point3D.create(0, 0, 0))
-        matrix.transformBy(rotation)
-    return matrix
+        for extension in EXPORT_FORMATS if settings is None else settings.formats:
+            paths[f"export:{name}:{extension}"] = export_path(name, extension)
+        paths[f"export:{name}:fingerprint"] = fingerprint_path(export_stem(name))
+    for name, path in DOCUMENT_PATHS.items():
+        paths[f"document:{name}"] = path
+    return paths
+
+
+def layout_matrix(matrix: Matrix) -> adsk.core.Matrix3D:
+    """Verdensmatrise fra ``transforms`` (mm) som ``Matrix3D`` (cm)."""
+
+    values = list(matrix)
+    for index in (3, 7, 11):
+        values[index] = mm_to_cm(values[index])
+    transform = adsk.core.Matrix3D.create()
+    transform.setWithArray(values)
+    return transform
 
 
 def set_component_transform(
@@ -344,94 +666,42 @@ def ensure_directories() -> None:
 def register_user_parameters(
     design: adsk.fusion.Design,
 ) -> Dict[str, adsk.fusion.UserParameter]:
-    """Synkroniserer brukerparametre med definerte standarder."""
+    """Synkroniserer brukerparametre med definerte standarder.
+
+    Eksisterende parametre sammenlignes først, og kun enhet, verdi eller
+    kommentar som faktisk avviker skrives. Verdiendringer samles og skrives
+    i én operasjon, slik at en stabil design ikke får noen skrivinger.
+    """
 
     app = adsk.core.Application.get()
     ui = app.userInterface if app else None
     user_params = design.userParameters
     units_manager = design.unitsManager
     registered: Dict[str, adsk.fusion.UserParameter] = {}
-
-    length_units = {"mm", "cm", "m", "in", "ft"}
-    angle_units = {"deg", "rad"}
-    temperature_units = {
-        "degc",
-        "c",
-        "celsius",
-        "degf",
-        "f",
-        "fahrenheit",
-        "kelvin",
-        "k",
-        "rankine",
-    }
-    length_to_mm = {
-        "mm": 1.0,
-        "cm": 10.0,
-        "m": 1000.0,
-        "in": 25.4,
-        "ft": 304.8,
-    }
-
-    def normalize_unit(unit: str) -> str:
-        return unit.strip().lower()
+    resolved_units: Dict[str, str] = {}
+    pending_values: List[Tuple[adsk.fusion.UserParameter, float]] = []
 
     def resolve_unit(unit: str) -> str:
         unit = unit or ""
-        if not unit:
-            return ""
-        try:
-            if units_manager.isValidUnit(unit):
-                return unit
-        except Exception:
-            pass
-        normalized = normalize_unit(unit)
-        fallback = ""
-        if normalized in length_units:
-            fallback = getattr(units_manager, "defaultLengthUnits", "")
-        elif normalized in angle_units:
-            fallback = getattr(units_manager, "defaultAngleUnits", "")
-        elif normalized in temperature_units:
-            fallback = getattr(units_manager, "defaultTemperatureUnits", "") or "kelvin"
-        if fallback:
-            try:
-                if units_manager.isValidUnit(fallback):
-                    return fallback
-            except Exception:
-                return fallback
-        return ""
-
-    def value_to_internal(value: float, unit: str) -> float:
-        unit = unit or ""
-        normalized = normalize_unit(unit) if unit else ""
-        if normalized in length_units:
-            mm_value = value * length_to_mm.get(normalized, 1.0)
-            return mm_to_cm(mm_value)
-        if normalized in angle_units:
-            return math.radians(value) if normalized == "deg" else value
-        if normalized in temperature_units:
-            if normalized in {"degc", "c", "celsius"}:
-                return value + 273.15
-            if normalized in {"degf", "f", "fahrenheit"}:
-                return (value + 459.67) * (5.0 / 9.0)
-            if normalized in {"rankine"}:
-                return value * (5.0 / 9.0)
-            # kelvin / k faller igjennom til returverdi
-        return value
+        if unit not in resolved_units:
+            resolved_units[unit] = _resolve_unit_uncached(units_manager, unit)
+        return resolved_units[unit]
 
     def sync_param(defn: ParameterDef) -> adsk.fusion.UserParameter:
         existing = user_params.itemByName(defn.name)
         unit_for_param = resolve_unit(defn.unit)
-        value_internal = value_to_internal(defn.value, defn.unit or unit_for_param)
+        value_internal = units.to_internal(defn.value, defn.unit or unit_for_param)
 
         # Oppdater eksisterende parameter
         if existing:
             try:
                 target_unit = unit_for_param or existing.unit or ""
-                if target_unit:
+                if target_unit and existing.unit != target_unit:
                     existing.unit = target_unit
-                existing.value = value_internal
-                existing.comment = defn.comment
+                if not math.isclose(existing.value, value_internal, rel_tol=1e-9, abs_tol=1e-12):
+                    pending_values.append((existing, value_internal))
+                if existing.comment != defn.comment:
+                    existing.comment = defn.comment
                 registered[defn.name] = existing
                 return existing
             except Exception:
@@ -459,8 +729,64 @@ def register_user_parameters(
     for definition in PARAMETER_DEFINITIONS:
         sync_param(definition)
 
+    write_parameter_values(design, pending_values)
+    print(f"Parametersynk: {len(pending_values)} verdier oppdatert.")
     return registered
 
+
+def _resolve_unit_uncached(units_manager: adsk.core.UnitsManager, unit: str) -> str:
+    if not unit:
+        return ""
+    try:
+        if units_manager.isValidUnit(unit):
+            return unit
+    except Exception:
+        pass
+    kind = units.unit_kind(unit)
+    fallback = ""
+    if kind == "length":
+        fallback = getattr(units_manager, "defaultLengthUnits", "")
+    elif kind == "angle":
+        fallback = getattr(units_manager, "defaultAngleUnits", "")
+    elif kind == "temperature":
+        fallback = getattr(units_manager, "defaultTemperatureUnits", "") or "kelvin"
+    if fallback:
+        try:
+            if units_manager.isValidUnit(fallback):
+                return fallback
+        except Exception:
+            return fallback
+    return ""
+
+
+def write_parameter_values(
+    design: adsk.fusion.Design,
+    changes: List[Tuple[adsk.fusion.UserParameter, float]],
+) -> None:
+    """Skriv interne verdier samlet med ``Design.modifyParameters`` (én recompute).
+
+    Faller tilbake til én skriving per parameter i Fusion-versjoner uten
+    ``modifyParameters``.
+    """
+
+    if not changes:
+        return
+    modify = getattr(design, "modifyParameters", None)
+    if modify is not None:
+        try:
+            parameters = [param for param, _ in changes]
+            inputs = [adsk.core.ValueInput.createByReal(value) for _, value in changes]
+            if modify(parameters, inputs):
+                return
+            print("Parametersynk: modifyParameters feilet, skriver én parameter om gangen.")
+        except (AttributeError, RuntimeError) as error:
+            print(f"Parametersynk: modifyParameters feilet ({error}), skriver én parameter om gangen.")
+    else:
+        print("Parametersynk: modifyParameters finnes ikke, skriver én parameter om gangen.")
+    for param, value in changes:
+        param.value = value
+
+
 def param_to_unit(
     design: adsk.fusion.Design, param: adsk.fusion.UserParameter, unit: str
 ) -> float:
@@ -473,61 +799,28 @@ def param_to_unit(
     return param.value
 
 
-def compute_geometry_inputs(
-    design: adsk.fusion.Design,
-    params: Dict[str, adsk.fusion.UserParameter],
-) -> Dict[str, float]:
-    mm = lambda name: param_to_unit(design, params[name], "mm")
-    geom = {
-        "id_work": mm("ID_WORK"),
-        "od_work": mm("OD_WORK"),
-        "len_work": mm("LEN_WORK"),
-        "id_disp": mm("ID_DISP"),
-        "od_disp": mm("OD_DISP"),
-        "len_disp": mm("LEN_DISP"),
-        "stroke": mm("STROKE"),
-        "clear_min": mm("CLEAR_MIN"),
-        "clear_max": mm("CLEAR_MAX"),
-        "flywheel_d": mm("FLYWHEEL_D"),
-        "flywheel_thick": mm("FLYWHEEL_THICK"),
-        "crank_pin": mm("CRANK_PIN"),
-        "shaft_d": mm("SHAFT_D"),
-        "rod_d": mm("ROD_DIAMETER"),
-        "rod_length": mm("ROD_LENGTH"),
-        "offset": mm("DISPLACER_OFFSET"),
-        "base_length": mm("BASE_LENGTH"),
-        "base_width": mm("BASE_WIDTH"),
-        "base_thick": mm("BASE_THICK"),
-        "frame_height": mm("FRAME_COLUMN_H"),
-    }
-    geom["work_clearance"] = 0.5 * (geom["clear_min"] + geom["clear_max"])
-    geom["piston_diameter"] = geom["id_work"] - 2 * geom["work_clearance"]
-    geom["displacer_diameter"] = geom["id_disp"] - 2 * geom["work_clearance"]
-    return geom
-
-
-def compute_performance_metrics(
-    params: Dict[str, adsk.fusion.UserParameter], geom: Dict[str, float]
-) -> Dict[str, float]:
-    area_mm2 = math.pi * (geom["id_work"] / 2.0) ** 2
-    stroke_volume_cm3 = (area_mm2 * geom["stroke"]) / 1000.0
-    cr_target = params["CR_TARGET"].value
-    dead_volume_cm3 = 0.0
-    if stroke_volume_cm3 > 0:
-        dead_volume_cm3 = stroke_volume_cm3 / max(cr_target - 1.0, 0.01)
-    safe_dead_volume = max(dead_volume_cm3, 1e-9)
-    cr_estimate = (stroke_volume_cm3 + safe_dead_volume) / safe_dead_volume
+def compute_thermal_metrics(geom: Dict[str, float], metrics: Dict[str, float]) -> Dict[str, float]:
+    """Schmidt-analyse (indikert arbeid/effekt) når numpy finnes i Fusion-miljøet."""
+
+    try:
+        from scripts.stirling_core.thermo import schmidt_performance
+    except Exception:
+        return {}
+    try:
+        result = schmidt_performance(geom, metrics["dead_volume_cm3"])
+    except Exception:
+        return {}
     return {
-        "area_mm2": area_mm2,
-        "stroke_volume_cm3": stroke_volume_cm3,
-        "dead_volume_cm3": dead_volume_cm3,
-        "cr_estimate": cr_estimate,
+        "schmidt_work_j": float(result["work_j"]),
+        "schmidt_power_w": float(result["power_w"]),
+        "schmidt_efficiency": float(result["efficiency"]),
+        "schmidt_pressure_max_pa": float(result["pressure_max_pa"]),
     }
 
 
 def apply_production_constraints(
     design: adsk.fusion.Design,
-    params: Dict[str, adsk.fusion.UserParameter],
+    values: Mapping[str, float],
     geom: Dict[str, float],
 ) -> Dict[str, str]:
     """Evaluer enkle maskin-/materialgrenser og logg resultatet.
@@ -537,57 +830,8 @@ def apply_production_constraints(
     slik at Fusion-brukeren kan inspisere begrensningene.
     """
 
-    _ = params  # Parametre benyttes senere for fullstendig validering
-    machine_cfg = load_machine_park()
-    material_db = load_material_catalog()
-
-    report: Dict[str, str] = {}
-
-    cnc_cfg = machine_cfg.get("cnc_mill", {}).get("volume_mm", {})
-    cnc_x = float(cnc_cfg.get("x", 320.0))
-    cnc_y = float(cnc_cfg.get("y", 220.0))
-    cnc_z = float(cnc_cfg.get("z", 110.0))
-
-    # Sjekk om bunnplaten får plass på standard CNC-fres.
-    fits_x = geom["base_length"] <= cnc_x
-    fits_y = geom["base_width"] <= cnc_y
-    fits_z = geom["base_thick"] <= cnc_z
-    report["cnc_bed"] = "ok" if all((fits_x, fits_y, fits_z)) else "oversize"
-
-    # Sjekk om sylindre kan maskineres på standard dreiebenk.
-    lathe_cfg = machine_cfg.get("lathe", {})
-    fits_swing = max(geom["od_work"], geom["od_disp"]) <= float(lathe_cfg.get("swing_diameter_mm", 180.0))
-    fits_length = max(geom["len_work"], geom["len_disp"]) <= float(lathe_cfg.get("between_centers_mm", 300.0))
-    report["lathe"] = "ok" if all((fits_swing, fits_length)) else "oversize"
-
-    # Sjekk om printervolumet er tilstrekkelig for hel montering/print av prototyper.
-    printer_cfg = machine_cfg.get("printer", {}).get("volume_mm", {})
-    printer_x = float(printer_cfg.get("x", 220.0))
-    printer_y = float(printer_cfg.get("y", 220.0))
-    printer_z = float(printer_cfg.get("z", 250.0))
-    assembly_height = geom["base_thick"] + max(geom["frame_height"], geom["len_work"], geom["len_disp"])
-    printer_ok = (
-        geom["base_length"] <= printer_x
-        and geom["base_width"] <= printer_y
-        and assembly_height <= printer_z
-    )
-    report["printer"] = "ok" if printer_ok else "oversize"
-
-    # Rapporter materialkoder dersom de finnes i databasen.
-    catalog_codes = {str(entry.get("code", "")).upper() for entry in material_db}
-    required_codes = {
-        "AL6061",
-        "GLASS_QUARTZ",
-        "STEEL_GENERIC",
-        "BRASS_GENERIC",
-        "COPPER_GENERIC",
-        "CFRP_SHEET",
-    }
-    missing = sorted(code for code in required_codes if code not in catalog_codes)
-    if missing:
-        report["material_db"] = "missing: " + ", ".join(missing)
-    else:
-        report["material_db"] = "ok"
+    _ = values  # Parametre benyttes senere for fullstendig validering
+    report = engine.evaluate_production(geom, load_machine_park(), load_material_catalog())
 
     for key, value in report.items():
         design.attributes.add(_ATTR_GROUP, f"production_{key}", value)
@@ -595,30 +839,128 @@ def apply_production_constraints(
     return report
 
 
-def create_component_records(design: adsk.fusion.Design) -> Dict[str, ComponentRecord]:
+def find_component_occurrences(
+    design: adsk.fusion.Design, remove_duplicates: bool = False
+) -> Dict[str, adsk.fusion.Occurrence]:
+    """Finn forekomstene som tidligere kjøringer har generert.
+
+    Forekomster merkes med ``component_key``; umerkede forekomster fra eldre
+    skriptversjoner gjenkjennes på komponentnavnet og merkes. Med
+    ``remove_duplicates`` slettes ekstra kopier av samme komponent, slik at
+    dokumentet ikke vokser med hver kjøring.
+    """
+
+    key_by_name = {name: key for key, name in COMPONENT_NAMES.items()}
+    found: Dict[str, adsk.fusion.Occurrence] = {}
+    duplicates: List[adsk.fusion.Occurrence] = []
+    for occ in list(design.rootComponent.occurrences):
+        attribute = occ.attributes.itemByName(_ATTR_GROUP, "component_key")
+        key = attribute.value if attribute else key_by_name.get(occ.component.name)
+        if key is None:
+            continue
+        if key in found:
+            duplicates.append(occ)
+            continue
+        if not attribute and remove_duplicates:
+            occ.attributes.add(_ATTR_GROUP, "component_key", key)
+        found[key] = occ
+    if remove_duplicates:
+        for occ in duplicates:
+            occ.deleteMe()
+    return found
+
+
+def occurrence_definition(occ: adsk.fusion.Occurrence, key: str) -> str:
+    """Komponentnøkkelen som eier definisjonen forekomsten viser (eldre forekomster: sin egen)."""
+
+    attribute = occ.attributes.itemByName(_ATTR_GROUP, "definition")
+    return attribute.value if attribute else key
+
+
+def redefined_components(design: adsk.fusion.Design, owners: Mapping[str, str]) -> Set[str]:
+    """Komponenter der eksisterende forekomst viser en annen definisjon enn ``owners`` krever."""
+
+    return {
+        key
+        for key, occ in find_component_occurrences(design).items()
+        if key in owners and occurrence_definition(occ, key) != owners[key]
+    }
+
+
+def clear_component(component: adsk.fusion.Component) -> None:
+    """Fjern features, skisser og kropper slik at komponenten kan bygges på nytt på stedet."""
+
+    features = component.features
+    for index in range(features.count - 1, -1, -1):
+        features.item(index).deleteMe()
+    sketches = component.sketches
+    for index in range(sketches.count - 1, -1, -1):
+        sketches.item(index).deleteMe()
+    bodies = component.bRepBodies
+    for index in range(bodies.count - 1, -1, -1):
+        bodies.item(index).deleteMe()
+
+
+def create_component_records(
+    design: adsk.fusion.Design,
+    rebuild: Optional[Set[str]] = None,
+    owners: Optional[Mapping[str, str]] = None,
+) -> Dict[str, ComponentRecord]:
+    """Finn eller opprett alle komponenter; tøm de i ``rebuild`` for ny bygging.
+
+    Eksisterende forekomster beholdes (med transform og ledd) og tømmes på
+    stedet i stedet for å legges til på nytt. Uten ``rebuild`` tømmes alle.
+    Komponenter som ``owners`` peker til en annen komponent får en ny
+    forekomst av eierens komponent i stedet for en egen definisjon.
+    """
+
     root = design.rootComponent
     occs = root.occurrences
+    existing = find_component_occurrences(design, remove_duplicates=True)
+    owners = owners or {}
     R: Dict[str, ComponentRecord] = {}
 
-    def _new(name: str) -> ComponentRecord:
-        occ = occs.addNewComponent(adsk.core.Matrix3D.create())
-        occ.component.name = name
+    def _new(key: str) -> ComponentRecord:
+        name = COMPONENT_NAMES[key]
+        owner = owners.get(key, key)
+        occ = existing.get(key)
+        if occ is not None and occurrence_definition(occ, key) != owner:
+            occ.deleteMe()
+            occ = None
+        if owner != key:
+            source = R[owner]
+            if occ is None:
+                occ = occs.addExistingComponent(source.component, adsk.core.Matrix3D.create())
+                occ.attributes.add(_ATTR_GROUP, "component_key", key)
+                occ.attributes.add(_ATTR_GROUP, "definition", owner)
+            return ComponentRecord(
+                name=source.name,
+                component=source.component,
+                occurrence=occ,
+                bodies=source.bodies,
+                shared_from=owner,
+            )
+        if occ is None:
+            occ = occs.addNewComponent(adsk.core.Matrix3D.create())
+            occ.component.name = name
+            occ.attributes.add(_ATTR_GROUP, "component_key", key)
+            occ.attributes.add(_ATTR_GROUP, "definition", key)
+        elif rebuild is None or key in rebuild:
+            clear_component(occ.component)
+        else:
+            bodies = list(occ.component.bRepBodies)
+            return ComponentRecord(name=name, component=occ.component, occurrence=occ, bodies=bodies)
         return ComponentRecord(name=name, component=occ.component, occurrence=occ, bodies=[])
 
     # 0) Ramme/bunnplate på origo, grunnlagt (grounded)
-    R["frame"] = _new("Ramme og bunnplate")
+    R["frame"] = _new("frame")
     R["frame"].occurrence.isGrounded = True
 
-    # Komponentforekomster opprettes rundt origo og flyttes av layoutfasen
-    R["work_cylinder"] = _new("Arbeidssylinder")
-    R["displacer_cylinder"] = _new("Fortrengersylinder")
-    R["work_piston"] = _new("Arbeidsstempel")
-    R["displacer"] = _new("Fortrenger")
-    R["crankshaft"] = _new("Veivaksel")
-    R["flywheel"] = _new("Svinghjul")
-
-    R["connecting_rods"] = _new("Koblingsstenger")
-    R["thermal"] = _new("Varme og kjøl")
+    # Komponentforekomster opprettes rundt origo og flyttes av layoutfasen.
+    # Eieren av en delt definisjon kommer alltid før komponentene som deler den.
+    for key in COMPONENT_KEYS:
+        if key not in R:
+            R[key] = _new(key)
     return R
 
 
@@ -634,28 +976,139 @@ def build_geometry(
     design: adsk.fusion.Design,
     records: Dict[str, ComponentRecord],
     geom: Dict[str, float],
+    components: Optional[Set[str]] = None,
+) -> None:
+    def wanted(key: str) -> bool:
+        # Delte definisjoner bygges kun én gang, av eieren.
+        return (components is None or key in components) and records[key].shared_from is None
+
+    if wanted("frame"):
+        build_frame(records["frame"], geom)
+    if wanted("work_cylinder"):
+        build_quartz_cylinder(records["work_cylinder"], geom["od_work"], geom["id_work"], geom["len_work"], "Arbeidssylinder")
+    if wanted("displacer_cylinder"):
+        build_quartz_cylinder(records["displacer_cylinder"], geom["od_disp"], geom["id_disp"], geom["len_disp"], "Fortrengersylinder")
+    if wanted("work_piston"):
+        build_piston(records["work_piston"], geom["piston_diameter"], geom["stroke"], name="Arbeidsstempel")
+    if wanted("displacer"):
+        build_piston(records["displacer"], geom["displacer_diameter"], geom["len_disp"], hollow=True, name="Fortrenger")
+    if wanted("crankshaft"):
+        build_crankshaft(records["crankshaft"], geom)
+    if wanted("flywheel"):
+        build_flywheel(records["flywheel"], geom)
+    if wanted("connecting_rods"):
+        build_connecting_rods(records["connecting_rods"], geom)
+    if wanted("thermal"):
+        build_thermal_features(records["thermal"], geom)
+
+
+def build_geometry_direct(
+    design: adsk.fusion.Design,
+    records: Dict[str, ComponentRecord],
+    geom: Dict[str, float],
+    components: Optional[Set[str]] = None,
 ) -> None:
-    build_frame(records["frame"], geom)
-    build_quartz_cylinder(records["work_cylinder"], geom["od_work"], geom["id_work"], geom["len_work"], "Arbeidssylinder")
-    build_quartz_cylinder(records["displacer_cylinder"], geom["od_disp"], geom["id_disp"], geom["len_disp"], "Fortrengersylinder")
-    build_piston(records["work_piston"], geom["piston_diameter"], geom["stroke"], name="Arbeidsstempel")
-    build_piston(records["displacer"], geom["displacer_diameter"], geom["len_disp"], hollow=True, name="Fortrenger")
-    build_crankshaft(records["crankshaft"], geom)
-    build_flywheel(records["flywheel"], geom)
-    build_connecting_rods(records["connecting_rods"], geom)
-    build_thermal_features(records["thermal"], geom)
+    """Bygg kroppene fra ``primitives`` som midlertidige B-Rep-kropper.
+
+    Hver komponent får én basefeature (i parametriske design) med alle
+    kroppene, så tidslinjen får ett element per komponent i stedet for én
+    skisse og extrude per form.
+    """
+
+    brep = adsk.fusion.TemporaryBRepManager.get()
+    parametric = design.designType == adsk.fusion.DesignTypes.ParametricDesignType
+    for key in COMPONENT_KEYS:
+        if components is not None and key not in components:
+            continue
+        record = records[key]
+        if record.shared_from is not None:
+            continue
+        comp = record.component
+        solids = [(spec.name, temporary_solid(brep, spec)) for spec in primitives.part_solids(key, geom)]
+        base_feature = comp.features.baseFeatures.add() if parametric else None
+        if base_feature:
+            base_feature.startEdit()
+        try:
+            for name, solid in solids:
+                body = comp.bRepBodies.add(solid, base_feature) if base_feature else comp.bRepBodies.add(solid)
+                body.name = name
+                record.bodies.append(body)
+        finally:
+            if base_feature:
+                base_feature.finishEdit()
+
+
+def temporary_solid(
+    brep: adsk.fusion.TemporaryBRepManager, spec: primitives.SolidSpec
+) -> adsk.fusion.BRepBody:
+    solid = temporary_primitive(brep, spec.add[0])
+    for primitive in spec.add[1:]:
+        brep.booleanOperation(solid, temporary_primitive(brep, primitive), adsk.fusion.BooleanTypes.UnionBooleanType)
+    for primitive in spec.subtract:
+        brep.booleanOperation(solid, temporary_primitive(brep, primitive), adsk.fusion.BooleanTypes.DifferenceBooleanType)
+    return solid
+
+
+def temporary_primitive(
+    brep: adsk.fusion.TemporaryBRepManager, primitive: primitives.Primitive
+) -> adsk.fusion.BRepBody:
+    x, y, z = (mm_to_cm(value) for value in primitive.center)
+    if primitive.shape == primitives.BOX:
+        length, width, height = (mm_to_cm(value) for value in primitive.size)
+        angle = math.radians(primitive.angle_deg)
+        box = adsk.core.OrientedBoundingBox3D.create(
+            adsk.core.Point3D.create(x, y, z + height / 2.0),
+            adsk.core.Vector3D.create(math.cos(angle), math.sin(angle), 0),
+            adsk.core.Vector3D.create(-math.sin(angle), math.cos(angle), 0),
+            length,
+            width,
+            height,
+        )
+        return brep.createBox(box)
+    if primitive.shape == primitives.CYLINDER:
+        radius, height = (mm_to_cm(value) for value in primitive.size)
+        return brep.createCylinderOrCone(
+            adsk.core.Point3D.create(x, y, z),
+            radius,
+            adsk.core.Point3D.create(x, y, z + height),
+            radius,
+        )
+    raise BuilderError(f"Ukjent grunnform: {primitive.shape}")
+
+
+def add_sketch(comp: adsk.fusion.Component, plane) -> adsk.fusion.Sketch:
+    """Ny skisse; under bulk_build med utsatt beregning til profilene trengs."""
+
+    sketch = comp.sketches.add(plane)
+    if _deferred_sketches is not None:
+        sketch.isComputeDeferred = True
+        _deferred_sketches.append(sketch)
+    return sketch
+
+
+def compute_sketch(sketch: adsk.fusion.Sketch) -> adsk.fusion.Sketch:
+    """Kjør en eventuell utsatt beregning før skissen brukes av en feature."""
+
+    if _deferred_sketches is not None and sketch.isComputeDeferred:
+        sketch.isComputeDeferred = False
+    return sketch
+
+
+def sketch_profiles(sketch: adsk.fusion.Sketch) -> adsk.fusion.Profiles:
+    """Profilene til ``sketch``, etter at en eventuell utsatt beregning er kjørt."""
+
+    return compute_sketch(sketch).profiles
 
 
 def build_frame(record: ComponentRecord, geom: Dict[str, float]) -> None:
     comp = record.component
-    sketches = comp.sketches
     xy = comp.xYConstructionPlane
-    sketch = sketches.add(xy)
+    sketch = add_sketch(comp, xy)
     center = adsk.core.Point3D.create(0, 0, 0)
     corner = adsk.core.Point3D.create(mm_to_cm(geom["base_length"] / 2.0), mm_to_cm(geom["base_width"] / 2.0), 0)
     lines = sketch.sketchCurves.sketchLines
     lines.addCenterPointRectangle(center, corner)
-    profile = sketch.profiles.item(0)
+    profile = sketch_profiles(sketch).item(0)
     extrudes = comp.features.extrudeFeatures
     thickness = adsk.core.ValueInput.createByReal(mm_to_cm(geom["base_thick"]))
     ext_input = extrudes.createInput(profile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
@@ -664,110 +1117,267 @@ def build_frame(record: ComponentRecord, geom: Dict[str, float]) -> None:
     base_body = ext.bodies.item(0)
     base_body.name = "Bunnplate"
     record.bodies.append(base_body)
+    top_face = tag_end_face(ext, "frame_top")
+    if top_face is None:
+        raise BuilderError("Fant ingen toppflate på bunnplaten for monteringshullene.")
 
-    create_threaded_mounts(comp, base_body, geom)
+    create_threaded_mounts(comp, top_face, geom)
     create_columns(comp, geom, record.bodies)
+    summary = describe_bodies(record.bodies)
+    print(
+        f"Ramme: {summary['bodies']:.0f} kropper, {summary['volume_cm3']:.3f} cm³, "
+        f"{summary['faces']:.0f} flater, {comp.features.count} features"
+    )
 
 
 def create_threaded_mounts(
-    comp: adsk.fusion.Component, base_body: adsk.fusion.BRepBody, geom: Dict[str, float]
+    comp: adsk.fusion.Component, top_face: adsk.fusion.BRepFace, geom: Dict[str, float]
 ) -> None:
-    sketches = comp.sketches
-    top_face = max(base_body.faces, key=lambda f: f.pointOnFace.z)
-    sketch = sketches.add(top_face)
-    margin_x = geom["base_length"] / 2.0 - 20.0
-    margin_y = geom["base_width"] / 2.0 - 20.0
-    circles = sketch.sketchCurves.sketchCircles
-    positions = [
-        (-margin_x, -margin_y),
-        (margin_x, -margin_y),
-        (margin_x, margin_y),
-        (-margin_x, margin_y),
-    ]
-    for x_mm, y_mm in positions:
-        circles.addByCenterRadius(
-            adsk.core.Point3D.create(mm_to_cm(x_mm), mm_to_cm(y_mm), 0),
-            mm_to_cm(2.5),
+    """Ett gjengehull som frø, kopiert med rektangulært mønster (``MOUNT_COUNT_X/Y``)."""
+
+    count_x, step_x, count_y, step_y = primitives.mount_grid(geom)
+    seed_x, seed_y = primitives.mount_hole_positions(geom)[0]
+    seed = create_tapped_holes(
+        comp,
+        top_face,
+        [(seed_x, seed_y, geom["base_thick"])],
+        "M5x0.8",
+        depth_mm=geom["base_thick"],
+        diameter_mm=2 * primitives.MOUNT_HOLE_RADIUS,
+        tag="mount_thread",
+    )
+    pattern = pattern_rectangular(comp, seed, count_x, step_x, count_y, step_y)
+    if pattern is not None:
+        tag_entities(pattern_element_faces(pattern), _TAG_GROUP, "mount_thread", "M5x0.8")
+
+
+def pattern_element_faces(
+    pattern: adsk.fusion.RectangularPatternFeature,
+) -> List[adsk.fusion.BRepFace]:
+    """Flatene mønsteret laget, hentet fra hvert mønsterelement i stedet for å søke i topologien."""
+
+    faces: List[adsk.fusion.BRepFace] = []
+    for element in pattern.patternElements:
+        faces.extend(element.faces)
+    return faces
+
+
+def pattern_rectangular(
+    comp: adsk.fusion.Component,
+    features: List[adsk.fusion.Feature],
+    count_x: int,
+    spacing_x_mm: float,
+    count_y: int = 1,
+    spacing_y_mm: float = 0.0,
+) -> Optional[adsk.fusion.RectangularPatternFeature]:
+    """Kopier ``features`` i et rutenett langs komponentens x- og y-akse.
+
+    Uansett antall instanser blir dette én mønsterfeature; ``None`` når
+    rutenettet bare har frøet.
+    """
+
+    if not features or count_x * count_y <= 1:
+        return None
+    entities = adsk.core.ObjectCollection.create()
+    for feature in features:
+        entities.add(feature)
+    patterns = comp.features.rectangularPatternFeatures
+    # Avstanden er uten betydning for en retning med én instans, men må være > 0.
+    pattern_input = patterns.createInput(
+        entities,
+        comp.xConstructionAxis,
+        adsk.core.ValueInput.createByReal(count_x),
+        adsk.core.ValueInput.createByReal(mm_to_cm(spacing_x_mm or 1.0)),
+        adsk.fusion.PatternDistanceType.SpacingPatternDistanceType,
+    )
+    if count_y > 1:
+        pattern_input.setDirectionTwo(
+            comp.yConstructionAxis,
+            adsk.core.ValueInput.createByReal(count_y),
+            adsk.core.ValueInput.createByReal(mm_to_cm(spacing_y_mm)),
         )
-    profiles = sketch.profiles
-    extrudes = comp.features.extrudeFeatures
-    faces_to_thread: List[adsk.core.Face] = []
-    max_hole_area = math.pi * (mm_to_cm(4.0) ** 2)
-    for i in range(profiles.count):
-        profile = profiles.item(i)
+    return patterns.add(pattern_input)
+
+
+def pattern_circular(
+    comp: adsk.fusion.Component,
+    features: List[adsk.fusion.Feature],
+    count: int,
+    total_angle_deg: float,
+) -> Optional[adsk.fusion.CircularPatternFeature]:
+    """Kopier ``features`` ``count`` ganger om komponentens z-akse over ``total_angle_deg``."""
+
+    if not features or count <= 1:
+        return None
+    entities = adsk.core.ObjectCollection.create()
+    for feature in features:
+        entities.add(feature)
+    patterns = comp.features.circularPatternFeatures
+    pattern_input = patterns.createInput(entities, comp.zConstructionAxis)
+    pattern_input.quantity = adsk.core.ValueInput.createByReal(count)
+    pattern_input.totalAngle = adsk.core.ValueInput.createByString(f"{total_angle_deg} deg")
+    pattern_input.isSymmetric = False
+    return patterns.add(pattern_input)
+
+
+def create_tapped_holes(
+    comp: adsk.fusion.Component,
+    face: adsk.fusion.BRepFace,
+    positions_mm: Iterable[Tuple[float, float, float]],
+    designation: str,
+    depth_mm: float,
+    diameter_mm: float,
+    tag: Optional[str] = None,
+) -> List[adsk.fusion.Feature]:
+    """Lag alle gjengehullene i ``positions_mm`` som én hullfeature.
+
+    Posisjonene er punkter på ``face`` i komponentens koordinater (mm).
+    En flateskisse kan ha speilede eller roterte akser, så punktene går
+    gjennom ``modelToSketchSpace``; ellers havner frøet til et mønster langs
+    komponentens akser i feil hjørne. Hullet får gjengene
+    direkte (``tapType``) når Fusion-versjonen støtter det; ellers legges
+    én gjengefeature på hullets sideflater. Med ``tag`` merkes sideflatene.
+    Returnerer hullet og eventuelle gjengefeatures, klare for mønster.
+    """
+
+    sketch = add_sketch(comp, face)
+    points = adsk.core.ObjectCollection.create()
+    for x_mm, y_mm, z_mm in positions_mm:
+        model_point = adsk.core.Point3D.create(mm_to_cm(x_mm), mm_to_cm(y_mm), mm_to_cm(z_mm))
+        points.add(sketch.sketchPoints.add(sketch.modelToSketchSpace(model_point)))
+    if points.count == 0:
+        return []
+    compute_sketch(sketch)
+
+    holes = comp.features.holeFeatures
+    hole_input = holes.createSimpleInput(adsk.core.ValueInput.createByReal(mm_to_cm(diameter_mm)))
+    hole_input.setPositionBySketchPoints(points)
+    hole_input.setDistanceExtent(adsk.core.ValueInput.createByReal(mm_to_cm(depth_mm)))
+    thread_info = create_thread_info(comp, designation)
+    tapped = False
+    if thread_info is not None:
         try:
-            area_props = profile.areaProperties(
-                adsk.fusion.CalculationAccuracy.MediumCalculationAccuracy
-            )
-            if area_props.area > max_hole_area:
-                continue
+            hole_input.tapType = adsk.fusion.HoleTapTypes.TappedHoleTapType
+            hole_input.threadInfo = thread_info
+            tapped = True
         except Exception:
-            pass
-        ext_input = extrudes.createInput(profile, adsk.fusion.FeatureOperations.CutFeatureOperation)
-        ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(geom["base_thick"])))
-        # Extruderingen skjer på toppflaten av bunnplaten. Standardretningen peker
-        # bort fra kroppen, noe som gjør at Fusion ikke finner noe å kutte og
-        # kaster en "No target body"-feil. Ved å eksplisitt angi negativ
-        # retning sørger vi for at kuttet går ned i platen.
-        ext_input.isDirectionNegative = True
-        ext_input.participantBodies = [base_body]
-        cut = extrudes.add(ext_input)
-        for face in base_body.faces:
-            geometry = face.geometry
-            surface_type = getattr(geometry, "surfaceType", None)
-            if surface_type == adsk.core.SurfaceTypes.CylinderSurfaceType:
-                radius = geometry.radius
-                if math.isclose(radius, mm_to_cm(2.5), rel_tol=0.15):
-                    faces_to_thread.append(face)
-                    if len(faces_to_thread) == 4:
-                        break
-    apply_threads(comp, faces_to_thread, "M5x0.8")
+            tapped = False
+    hole = holes.add(hole_input)
+    side_faces = list(hole.sideFaces)
+    if tag:
+        tag_entities(side_faces, _TAG_GROUP, tag, designation)
+    features: List[adsk.fusion.Feature] = [hole]
+    if not tapped:
+        features.extend(apply_threads(comp, side_faces, designation))
+    return features
 
 
 def create_columns(comp: adsk.fusion.Component, geom: Dict[str, float], bodies: List[adsk.fusion.BRepBody]) -> None:
-    sketches = comp.sketches
-    base_plane = comp.xYConstructionPlane
-    sketch = sketches.add(base_plane)
-    circles = sketch.sketchCurves.sketchCircles
-    offsets = [
-        (-geom["base_length"] / 4.0, 0),
-        (geom["base_length"] / 4.0, 0),
-    ]
-    for x_mm, y_mm in offsets:
-        circles.addByCenterRadius(
-            adsk.core.Point3D.create(mm_to_cm(x_mm), mm_to_cm(y_mm), 0),
-            mm_to_cm(5.0),
-        )
-    for idx in range(sketch.profiles.count):
-        profile = sketch.profiles.item(idx)
-        extrude = comp.features.extrudeFeatures
-        ext_input = extrude.createInput(profile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-        ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(geom["frame_height"])))
-        result = extrude.add(ext_input)
-        column_body = result.bodies.item(0)
+    """Én søyle som frø, kopiert langs x med ``COLUMN_COUNT`` instanser."""
+
+    count, step = primitives.column_line(geom)
+    x_mm, y_mm = primitives.column_positions(geom)[0]
+    sketch = add_sketch(comp, comp.xYConstructionPlane)
+    sketch.sketchCurves.sketchCircles.addByCenterRadius(
+        adsk.core.Point3D.create(mm_to_cm(x_mm), mm_to_cm(y_mm), 0),
+        mm_to_cm(primitives.COLUMN_RADIUS),
+    )
+    extrude = comp.features.extrudeFeatures
+    ext_input = extrude.createInput(
+        sketch_profiles(sketch).item(0), adsk.fusion.FeatureOperations.NewBodyFeatureOperation
+    )
+    ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(geom["frame_height"])))
+    seed = extrude.add(ext_input)
+    column_bodies = [seed.bodies.item(idx) for idx in range(seed.bodies.count)]
+    pattern = pattern_rectangular(comp, [seed], count, step)
+    if pattern is not None:
+        column_bodies.extend(pattern.bodies.item(idx) for idx in range(pattern.bodies.count))
+    for idx, column_body in enumerate(column_bodies):
         column_body.name = f"Rammekolonne {idx + 1}"
         bodies.append(column_body)
 
 
 def apply_threads(
-    comp: adsk.fusion.Component, faces: Iterable[adsk.core.Face], designation: str
-) -> None:
+    comp: adsk.fusion.Component, faces: Iterable[adsk.fusion.BRepFace], designation: str
+) -> List[adsk.fusion.ThreadFeature]:
+    faces = list(faces)
     if not faces:
-        return
+        return []
     thread_features = comp.features.threadFeatures
-    data_query = thread_features.threadDataQuery
-    thread_type = data_query.defaultMetricThreadType
+    thread_info = create_thread_info(comp, designation)
+    if thread_info is None:
+        return []
+    # Én gjengefeature for alle flatene; eldre Fusion-versjoner godtar kun
+    # én flate per input, og da faller vi tilbake til én feature per flate.
+    collection = adsk.core.ObjectCollection.create()
+    for face in faces:
+        collection.add(face)
     try:
-        thread_info = data_query.createThreadInfo(True, thread_type, designation, "6H")
+        thread_input = thread_features.createInput(collection, thread_info)
+        thread_input.isFullLength = True
+        return [thread_features.add(thread_input)]
     except Exception:
-        return
+        pass
+    created: List[adsk.fusion.ThreadFeature] = []
     for face in faces:
         try:
             thread_input = thread_features.createInput(face, thread_info)
             thread_input.isFullLength = True
-            thread_features.add(thread_input)
+            created.append(thread_features.add(thread_input))
         except Exception:
             continue
+    return created
+
+
+def create_thread_info(
+    comp: adsk.fusion.Component, designation: str
+) -> Optional[adsk.fusion.ThreadInfo]:
+    """Innvendig metrisk gjenge (toleranseklasse 6H), eller ``None`` hvis ukjent."""
+
+    data_query = comp.features.threadFeatures.threadDataQuery
+    try:
+        return data_query.createThreadInfo(True, data_query.defaultMetricThreadType, designation, "6H")
+    except Exception:
+        return None
+
+
+def tag_end_face(feature: adsk.fusion.ExtrudeFeature, name: str) -> Optional[adsk.fusion.BRepFace]:
+    """Merk og returner første endeflate til ``feature`` (``None`` hvis ingen)."""
+
+    end_faces = feature.endFaces
+    if end_faces.count == 0:
+        return None
+    face = end_faces.item(0)
+    tag_entity(face, _TAG_GROUP, name)
+    return face
+
+
+def report_missing_tags(design: adsk.fusion.Design) -> List[str]:
+    """Skriv ut forventede flatemerker (``ENTITY_TAGS``) som ikke finnes i designet."""
+
+    index = AttributeIndex.from_design(design, _TAG_GROUP)
+    missing = [
+        f"{key}/{name}"
+        for key, names in ENTITY_TAGS.items()
+        for name in names
+        if index.count(name) == 0
+    ]
+    if missing:
+        print(f"Mangler flatemerker: {', '.join(missing)}")
+    return missing
+
+
+def describe_bodies(bodies: Iterable[adsk.fusion.BRepBody]) -> Dict[str, float]:
+    """Antall kropper, samlet volum (cm³) og antall flater, for å sammenligne bygg."""
+
+    count = 0
+    volume = 0.0
+    faces = 0
+    for body in bodies:
+        count += 1
+        volume += body.physicalProperties.volume
+        faces += body.faces.count
+    return {"bodies": float(count), "volume_cm3": volume, "faces": float(faces)}
 
 
 def build_quartz_cylinder(
@@ -778,13 +1388,13 @@ def build_quartz_cylinder(
     name: str,
 ) -> None:
     comp = record.component
-    sketch = comp.sketches.add(comp.xYConstructionPlane)
+    sketch = add_sketch(comp, comp.xYConstructionPlane)
     circles = sketch.sketchCurves.sketchCircles
     center = adsk.core.Point3D.create(0, 0, 0)
     circles.addByCenterRadius(center, mm_to_cm(outer_diameter / 2.0))
     circles.addByCenterRadius(center, mm_to_cm(inner_diameter / 2.0))
     profile = None
-    for candidate in sketch.profiles:
+    for candidate in sketch_profiles(sketch):
         if candidate.profileLoops.count == 2:
             profile = candidate
             break
@@ -807,11 +1417,11 @@ def build_piston(
     name: str = "Piston",
 ) -> None:
     comp = record.component
-    sketch = comp.sketches.add(comp.xYConstructionPlane)
+    sketch = add_sketch(comp, comp.xYConstructionPlane)
     circles = sketch.sketchCurves.sketchCircles
     base_center = adsk.core.Point3D.create(0, 0, 0)
     circles.addByCenterRadius(base_center, mm_to_cm(diameter / 2.0))
-    profile = sketch.profiles.item(0)
+    profile = sketch_profiles(sketch).item(0)
     extrudes = comp.features.extrudeFeatures
     ext_input = extrudes.createInput(profile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
     ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(length_mm)))
@@ -820,24 +1430,26 @@ def build_piston(
     body.name = name
     record.bodies.append(body)
     if hollow:
-        faces = list(body.faces)
-        top_face = max(faces, key=lambda face: face.pointOnFace.z)
-        sketch_inner = comp.sketches.add(top_face)
+        top_face = tag_end_face(ext, "displacer_top")
+        if top_face is None:
+            raise BuilderError(f"Fant ingen toppflate på {name} for utboringen.")
+        sketch_inner = add_sketch(comp, top_face)
         circles_inner = sketch_inner.sketchCurves.sketchCircles
-        circles_inner.addByCenterRadius(adsk.core.Point3D.create(0, 0, 0), mm_to_cm((diameter - 1.5) / 2.0))
-        profile_inner = sketch_inner.profiles.item(0)
+        circles_inner.addByCenterRadius(adsk.core.Point3D.create(0, 0, 0), mm_to_cm(diameter / 2.0 - primitives.DISPLACER_WALL))
+        profile_inner = sketch_profiles(sketch_inner).item(0)
         cut_input = extrudes.createInput(profile_inner, adsk.fusion.FeatureOperations.CutFeatureOperation)
         cut_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(length_mm * 0.9)))
-        extrudes.add(cut_input)
+        cut = extrudes.add(cut_input)
+        tag_entities(cut.sideFaces, _TAG_GROUP, "displacer_bore")
 
 
 def build_crankshaft(record: ComponentRecord, geom: Dict[str, float]) -> None:
     comp = record.component
-    sketch = comp.sketches.add(comp.xYConstructionPlane)
+    sketch = add_sketch(comp, comp.xYConstructionPlane)
     circles = sketch.sketchCurves.sketchCircles
     center = adsk.core.Point3D.create(0, 0, 0)
     circles.addByCenterRadius(center, mm_to_cm(geom["shaft_d"] / 2.0))
-    profile = sketch.profiles.item(0)
+    profile = sketch_profiles(sketch).item(0)
     extrude = comp.features.extrudeFeatures
     length = geom["offset"] + 2 * geom["rod_length"]
     ext_input = extrude.createInput(profile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
@@ -847,12 +1459,12 @@ def build_crankshaft(record: ComponentRecord, geom: Dict[str, float]) -> None:
     shaft_body.name = "Veivaksel"
     record.bodies.append(shaft_body)
 
-    plate_sketch = comp.sketches.add(comp.xYConstructionPlane)
+    plate_sketch = add_sketch(comp, comp.xYConstructionPlane)
     rect = plate_sketch.sketchCurves.sketchLines.addCenterPointRectangle(
         adsk.core.Point3D.create(0, 0, 0),
         adsk.core.Point3D.create(mm_to_cm(geom["rod_length"] / 3.0), mm_to_cm(geom["crank_pin"]), 0),
     )
-    profile_plate = plate_sketch.profiles.item(0)
+    profile_plate = sketch_profiles(plate_sketch).item(0)
     plate_input = extrude.createInput(profile_plate, adsk.fusion.FeatureOperations.JoinFeatureOperation)
     plate_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(geom["crank_pin"] * 2.0)))
     extrude.add(plate_input)
@@ -860,11 +1472,11 @@ def build_crankshaft(record: ComponentRecord, geom: Dict[str, float]) -> None:
 
 def build_flywheel(record: ComponentRecord, geom: Dict[str, float]) -> None:
     comp = record.component
-    sketch = comp.sketches.add(comp.xYConstructionPlane)
+    sketch = add_sketch(comp, comp.xYConstructionPlane)
     circles = sketch.sketchCurves.sketchCircles
     center = adsk.core.Point3D.create(0, 0, 0)
     circles.addByCenterRadius(center, mm_to_cm(geom["flywheel_d"] / 2.0))
-    profile = sketch.profiles.item(0)
+    profile = sketch_profiles(sketch).item(0)
     extrude = comp.features.extrudeFeatures
     ext_input = extrude.createInput(profile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
     ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(geom["flywheel_thick"])))
@@ -873,22 +1485,22 @@ def build_flywheel(record: ComponentRecord, geom: Dict[str, float]) -> None:
     body.name = "Svinghjul"
     record.bodies.append(body)
 
-    end_faces = ext.endFaces
-    target_face = end_faces.item(0) if end_faces.count > 0 else None
+    target_face = tag_end_face(ext, "flywheel_end")
     if target_face is None:
         raise BuilderError("Fant ingen endeflate på svinghjulet for å lage gjennomgående hull.")
-    cut_sketch = comp.sketches.add(target_face)
+    cut_sketch = add_sketch(comp, target_face)
     cut_circles = cut_sketch.sketchCurves.sketchCircles
     cut_circles.addByCenterRadius(center, mm_to_cm(geom["shaft_d"] / 2.0))
-    cut_profile = cut_sketch.profiles.item(0)
+    cut_profile = sketch_profiles(cut_sketch).item(0)
     cut_input = extrude.createInput(cut_profile, adsk.fusion.FeatureOperations.CutFeatureOperation)
     cut_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(geom["flywheel_thick"])))
-    extrude.add(cut_input)
+    bore = extrude.add(cut_input)
+    tag_entities(bore.sideFaces, _TAG_GROUP, "shaft_bore")
 
 
 def build_connecting_rods(record: ComponentRecord, geom: Dict[str, float]) -> None:
     comp = record.component
-    sketch = comp.sketches.add(comp.xYConstructionPlane)
+    sketch = add_sketch(comp, comp.xYConstructionPlane)
     lines = sketch.sketchCurves.sketchLines
     half = geom["rod_length"] / 2.0
     profile = lines.addCenterPointRectangle(
@@ -896,7 +1508,7 @@ def build_connecting_rods(record: ComponentRecord, geom: Dict[str, float]) -> No
         adsk.core.Point3D.create(mm_to_cm(geom["rod_d"] / 2.0), mm_to_cm(half), 0),
     )
     extrude = comp.features.extrudeFeatures
-    ext_input = extrude.createInput(sketch.profiles.item(0), adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    ext_input = extrude.createInput(sketch_profiles(sketch).item(0), adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
     ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(geom["rod_d"])))
     ext = extrude.add(ext_input)
     body = ext.bodies.item(0)
@@ -906,89 +1518,152 @@ def build_connecting_rods(record: ComponentRecord, geom: Dict[str, float]) -> No
 
 def build_thermal_features(record: ComponentRecord, geom: Dict[str, float]) -> None:
     comp = record.component
-    sketch = comp.sketches.add(comp.xYConstructionPlane)
+    sketch = add_sketch(comp, comp.xYConstructionPlane)
     circles = sketch.sketchCurves.sketchCircles
     center = adsk.core.Point3D.create(0, 0, 0)
-    hot_radius = max(geom["od_disp"], geom["od_work"]) / 2.0 + 5.0
+    hot_radius = primitives.thermal_plate_radius(geom)
     circles.addByCenterRadius(center, mm_to_cm(hot_radius))
-    profile = sketch.profiles.item(0)
+    profile = sketch_profiles(sketch).item(0)
     extrude = comp.features.extrudeFeatures
     ext_input = extrude.createInput(profile, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-    ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(5.0)))
+    ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(primitives.THERMAL_PLATE_THICK)))
     ext = extrude.add(ext_input)
     body = ext.bodies.item(0)
     body.name = "Varmeplate"
     record.bodies.append(body)
 
-    rib_sketch = comp.sketches.add(comp.xYConstructionPlane)
-    lines = rib_sketch.sketchCurves.sketchLines
-    for angle in range(0, 180, 30):
-        rad = math.radians(angle)
-        lines.addByTwoPoints(
-            adsk.core.Point3D.create(0, 0, 0),
-            adsk.core.Point3D.create(mm_to_cm(hot_radius * math.cos(rad)), mm_to_cm(hot_radius * math.sin(rad)), 0),
-        )
+    # Én ribbe over hele diameteren som frø, kopiert med sirkulært mønster over
+    # en halv omdreining (ribbe i og i + RIB_COUNT ville ellers falle sammen).
+    top_face = tag_end_face(ext, "thermal_top")
+    if top_face is None:
+        raise BuilderError("Fant ingen toppflate på varmeplaten for kjøleribbene.")
+    rib_sketch = add_sketch(comp, top_face)
+    rib_sketch.sketchCurves.sketchLines.addCenterPointRectangle(
+        center,
+        adsk.core.Point3D.create(
+            mm_to_cm(primitives.rib_length(geom) / 2.0), mm_to_cm(primitives.THERMAL_RIB_WIDTH / 2.0), 0
+        ),
+    )
+    rib_input = extrude.createInput(
+        sketch_profiles(rib_sketch).item(0), adsk.fusion.FeatureOperations.JoinFeatureOperation
+    )
+    rib_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(mm_to_cm(primitives.THERMAL_RIB_HEIGHT)))
+    rib_input.participantBodies = [body]
+    seed = extrude.add(rib_input)
+    count = len(primitives.rib_angles(geom))
+    pattern_circular(comp, [seed], count, 180.0 * (count - 1) / count)
+
+
+def library_caches() -> Tuple[LookupCache, LookupCache]:
+    """Material- og utseendebibliotekene, med ett søk per navn og økt."""
+
+    global _library_materials, _library_appearances
+    if _library_materials is None or _library_appearances is None:
+        libraries = adsk.core.Application.get().materialLibraries
+        _library_materials = LookupCache(lambda name: search_libraries(libraries, "materials", name))
+        _library_appearances = LookupCache(lambda name: search_libraries(libraries, "appearances", name))
+    return _library_materials, _library_appearances
 
 
 def apply_materials_and_appearances(
-    design: adsk.fusion.Design, records: Dict[str, ComponentRecord]
+    design: adsk.fusion.Design,
+    records: Dict[str, ComponentRecord],
+    components: Optional[Set[str]] = None,
 ) -> None:
-    materials = design.materials
-    appearances = design.appearances
-    material_map = {
-        "frame": "Aluminum 6061",
-        "work_cylinder": "Glass - Clear",
-        "displacer_cylinder": "Glass - Clear",
-        "work_piston": "Aluminum - Satin",
-        "displacer": "Carbon Fiber",
-        "crankshaft": "Steel",
-        "flywheel": "Steel",
-        "connecting_rods": "Brass",
-        "thermal": "Copper",
-    }
-    appearance_map = {
-        "frame": "Brushed Aluminum",
-        "thermal": "Copper - Polished",
-    }
+    """Sett materiale på komponentene og utseende på kroppene deres.
+
+    Hvert navn slås opp én gang per kjøring i designet og, ved bom der, én
+    gang per økt i bibliotekene. Utseender fra biblioteket kopieres inn i
+    designet første gang de brukes. Navn uten treff skrives ut samlet.
+    """
+
+    library_materials, library_appearances = library_caches()
+    materials: Dict[str, Optional[adsk.core.Material]] = {}
+    appearances: Dict[str, Optional[adsk.core.Appearance]] = {}
+
+    def material_for(name: str) -> Optional[adsk.core.Material]:
+        if name not in materials:
+            materials[name] = design.materials.itemByName(name) or library_materials.get(name)
+        return materials[name]
+
+    def appearance_for(name: str) -> Optional[adsk.core.Appearance]:
+        if name not in appearances:
+            appearance = design.appearances.itemByName(name)
+            if not appearance:
+                source = library_appearances.get(name)
+                appearance = design.appearances.addByCopy(source, name) if source else None
+            appearances[name] = appearance
+        return appearances[name]
+
     for key, record in records.items():
-        mat_name = material_map.get(key)
-        appearance_name = appearance_map.get(key)
-        material = materials.itemByName(mat_name) if mat_name else None
-        appearance = appearances.itemByName(appearance_name) if appearance_name else None
-        for body in record.bodies:
-            if material:
-                body.material = material
-            if appearance:
+        if components is not None and key not in components:
+            continue
+        # Delte definisjoner har materialet fra eieren.
+        if record.shared_from is not None:
+            continue
+        mat_name = COMPONENT_MATERIALS.get(key)
+        material = material_for(mat_name) if mat_name else None
+        if material:
+            assign_component_material(record, material)
+        appearance_name = COMPONENT_APPEARANCES.get(key)
+        appearance = appearance_for(appearance_name) if appearance_name else None
+        if appearance:
+            for body in record.bodies:
                 body.appearance = appearance
 
+    missing = [f"materiale «{name}»" for name, item in materials.items() if not item]
+    missing += [f"utseende «{name}»" for name, item in appearances.items() if not item]
+    if missing:
+        print(f"Fant ikke i design eller bibliotek: {', '.join(missing)}")
+
+
+def assign_component_material(record: ComponentRecord, material: adsk.core.Material) -> None:
+    """Materiale på komponenten (arves av alle kropper); per kropp hvis det ikke går."""
 
-def build_joints(design: adsk.fusion.Design, records: Dict[str, ComponentRecord], geom: Dict[str, float]) -> None:
+    try:
+        record.component.material = material
+    except Exception:
+        for body in record.bodies:
+            body.material = material
+
+
+def build_joints(
+    design: adsk.fusion.Design,
+    records: Dict[str, ComponentRecord],
+    geom: Dict[str, float],
+) -> None:
     root = design.rootComponent
     asb_joints = root.asBuiltJoints
 
     frame_occ = records["frame"].occurrence
 
-    def rigid_to_frame(child_occ: adsk.fusion.Occurrence) -> None:
+    def rigid_to_frame(key: str) -> None:
         """Lock an occurrence rigidly to the grounded frame."""
 
+        child_occ = records[key].occurrence
+        # Gjenbrukte forekomster som ikke er flyttet har fortsatt leddet fra
+        # forrige kjøring; apply_layout sletter leddene til flyttede forekomster.
+        if child_occ.asBuiltJoints.count > 0:
+            return
         ji = asb_joints.createInput(child_occ, frame_occ, None)
         ji.setAsRigidJointMotion()
         asb_joints.add(ji)
 
-    rigid_to_frame(records["work_cylinder"].occurrence)
-    rigid_to_frame(records["displacer_cylinder"].occurrence)
-    rigid_to_frame(records["thermal"].occurrence)
-    rigid_to_frame(records["crankshaft"].occurrence)
-    rigid_to_frame(records["flywheel"].occurrence)
-    rigid_to_frame(records["work_piston"].occurrence)
-    rigid_to_frame(records["displacer"].occurrence)
-    rigid_to_frame(records["connecting_rods"].occurrence)
+    rigid_to_frame("work_cylinder")
+    rigid_to_frame("displacer_cylinder")
+    rigid_to_frame("thermal")
+    rigid_to_frame("crankshaft")
+    rigid_to_frame("flywheel")
+    rigid_to_frame("work_piston")
+    rigid_to_frame("displacer")
+    rigid_to_frame("connecting_rods")
+    rigid_to_frame("connecting_rod_2")
 
     # TODO(codex_fusionapi_v1.9): Reintroduce realistic kinematics using
     # root.joints and explicit JointGeometry references (revolute for
     # crankshaft/flywheel, slider for pistons).
 
-    design.attributes.add(_ATTR_GROUP, "phase_deg", "90")
+    design.attributes.add(_ATTR_GROUP, "phase_deg", f"{geom.get('angle_cyl', 90.0):g}")
 
 
 def generate_drawings(design: adsk.fusion.Design, records: Dict[str, ComponentRecord]) -> None:
@@ -1018,53 +1693,162 @@ def generate_drawings(design: adsk.fusion.Design, records: Dict[str, ComponentRe
         return
 
 
-def evaluate_clearances(
-    params: Dict[str, adsk.fusion.UserParameter], geom: Dict[str, float]
-) -> Dict[str, float]:
-    clearances = {
-        "arbeidsstempel": geom["work_clearance"],
-        "fortrenger": geom["work_clearance"],
+def export_path(name: str, extension: str) -> Path:
+    return CAD_DIR / f"stirling_{name}_v1.{extension}"
+
+
+def export_stem(name: str) -> Path:
+    return CAD_DIR / f"stirling_{name}_v1"
+
+
+def missing_exports(settings: ExportSettings) -> Set[str]:
+    return {
+        name
+        for name in EXPORT_TARGETS
+        if settings.wants(name)
+        and not all(export_path(name, fmt).exists() for fmt in settings.formats)
     }
-    clear_min = geom["clear_min"]
-    clear_max = geom["clear_max"]
-    for name, value in clearances.items():
-        if value < clear_min or value > clear_max:
-            raise BuilderError(f"Klaringen for {name} ({value:.2f} mm) bryter spesifikasjonen.")
-    return clearances
 
 
-def export_all(records: Dict[str, ComponentRecord], design: adsk.fusion.Design) -> None:
+def export_all(
+    records: Dict[str, ComponentRecord],
+    design: adsk.fusion.Design,
+    names: Optional[Set[str]] = None,
+    values: Optional[Mapping[str, float]] = None,
+    queue: Optional[ExportQueue] = None,
+) -> ExportQueue:
+    """Legg eksportjobber for ``names`` (alle uten filter) i ``queue``.
+
+    Kun målene og formatene i ``queue.settings`` tas med, og formater med
+    uendret geometrifingeravtrykk der filen på disk er den som ble skrevet
+    hoppes over. Uten ``values`` eksporteres alt og ingen avtrykk lagres.
+    """
+
+    queue = queue if queue is not None else ExportQueue(EXPORT_SETTINGS)
+    settings = queue.settings
     export_manager = design.exportManager
     CAD_DIR.mkdir(parents=True, exist_ok=True)
     targets = {
-        "assembly": design.rootComponent,
-        "frame": records["frame"].component,
-        "work_cylinder": records["work_cylinder"].component,
-        "displacer_cylinder": records["displacer_cylinder"].component,
-        "work_piston": records["work_piston"].component,
-        "displacer": records["displacer"].component,
-        "crankshaft": records["crankshaft"].component,
-        "flywheel": records["flywheel"].component,
+        name: design.rootComponent if name == "assembly" else records[name].component
+        for name in EXPORT_TARGETS
+        if (names is None or name in names) and settings.wants(name)
     }
     for name, component in targets.items():
-        step_path = CAD_DIR / f"stirling_{name}_v1.step"
-        stl_path = CAD_DIR / f"stirling_{name}_v1.stl"
-        obj_path = CAD_DIR / f"stirling_{name}_v1.obj"
-        try:
-            step_options = export_manager.createSTEPExportOptions(str(step_path), component)
-            export_manager.execute(step_options)
-            stl_options = export_manager.createSTLExportOptions(component)
-            stl_options.meshRefinement = adsk.fusion.MeshRefinementOptions.MeshRefinementHigh
-            stl_options.filename = str(stl_path)
-            export_manager.execute(stl_options)
-            obj_options = export_manager.createOBJExportOptions(component, str(obj_path))
-            export_manager.execute(obj_options)
-        except Exception:
-            continue
+        stem = export_stem(name)
+        stats = source = None
+        stored: Dict[str, Dict[str, str]] = {}
+        if values is not None:
+            stats = geometry_stats(component)
+            source = parameter_hash(values, parameters_for(f"export:{name}"), salt=ID_TAG)
+            stored = load_fingerprints(fingerprint_path(stem))
+        for fmt in settings.formats:
+            path = export_path(name, fmt)
+            on_done = None
+            if stats is not None:
+                fingerprint = geometry_fingerprint(stats, source, settings.options(fmt))
+                if export_is_current(stored.get(fmt), fingerprint, path):
+                    queue.skipped += 1
+                    continue
+                on_done = functools.partial(
+                    store_fingerprint, fingerprint_path(stem), fmt, fingerprint, stats, source, path
+                )
+            execute = functools.partial(
+                export_file, export_manager, component, fmt, path, settings.refinement
+            )
+            queue.add(ExportJob(name, fmt, execute, on_done))
+    return queue
+
+
+def export_file(
+    export_manager: adsk.fusion.ExportManager,
+    component: adsk.fusion.Component,
+    fmt: str,
+    path: Path,
+    refinement: str = "high",
+) -> None:
+    if fmt == "step":
+        options = export_manager.createSTEPExportOptions(str(path), component)
+    elif fmt == "stl":
+        options = export_manager.createSTLExportOptions(component)
+        options.meshRefinement = mesh_refinement(refinement)
+        options.filename = str(path)
+    else:
+        options = export_manager.createOBJExportOptions(component, str(path))
+        options.meshRefinement = mesh_refinement(refinement)
+    export_manager.execute(options)
+
+
+def mesh_refinement(name: str) -> int:
+    return {
+        "low": adsk.fusion.MeshRefinementOptions.MeshRefinementLow,
+        "medium": adsk.fusion.MeshRefinementOptions.MeshRefinementMedium,
+        "high": adsk.fusion.MeshRefinementOptions.MeshRefinementHigh,
+    }[name]
+
+
+def run_export_queue(
+    queue: ExportQueue, ui: Optional[adsk.core.UserInterface] = None
+) -> ExportReport:
+    """Kjør eksportkøen med fremdriftsdialog (avbrytbar) når ``ui`` finnes."""
+
+    dialog = ui.createProgressDialog() if ui and len(queue) else None
+    if dialog:
+        dialog.isCancelButtonShown = True
+        dialog.cancelButtonText = "Avbryt"
+        dialog.show("Stirlingmotoren", "Eksporterer %v av %m filer", 0, len(queue))
+
+    def progress(done: int, job: ExportJob) -> None:
+        if dialog:
+            dialog.message = f"Eksporterer {job.target}.{job.fmt} (%v av %m)"
+            dialog.progressValue = done
+        adsk.doEvents()
+
+    try:
+        report = queue.run(progress, lambda: bool(dialog and dialog.wasCancelled))
+    finally:
+        if dialog:
+            dialog.hide()
+    if report.written or report.skipped or report.failed or report.cancelled:
+        print(report.describe())
+    return report
+
+
+def remove_unfinished_exports(report: ExportReport) -> None:
+    """Slett utdaterte filer for jobber som ble avbrutt eller feilet.
+
+    Da ser neste kjøring at filene mangler og eksporterer dem på nytt, og
+    artefaktlageret lagrer ikke gammel geometri for den nye varianten.
+    """
+
+    for target, fmt in report.unfinished:
+        export_path(target, fmt).unlink(missing_ok=True)
+
+
+def geometry_stats(component: adsk.fusion.Component) -> Dict[str, float]:
+    """Volum, areal, avgrensningsboks og antall kropper/flater (med underforekomster)."""
+
+    bodies = list(component.bRepBodies)
+    for occ in component.allOccurrences:
+        bodies.extend(occ.bRepBodies)
+    properties = component.getPhysicalProperties(adsk.fusion.CalculationAccuracy.LowCalculationAccuracy)
+    box = component.boundingBox
+    stats = {
+        "volume_cm3": properties.volume,
+        "area_cm2": properties.area,
+        "min_x": box.minPoint.x,
+        "min_y": box.minPoint.y,
+        "min_z": box.minPoint.z,
+        "max_x": box.maxPoint.x,
+        "max_y": box.maxPoint.y,
+        "max_z": box.maxPoint.z,
+        "bodies": len(bodies),
+        "faces": sum(body.faces.count for body in bodies),
+    }
+    return {key: float(value) for key, value in stats.items()}
 
 
 def compile_bom_entries(
-    params: Dict[str, adsk.fusion.UserParameter],
+    values: Mapping[str, float],
     geom: Dict[str, float],
     metrics: Dict[str, float],
 ) -> List[BOMEntry]:
@@ -1088,7 +1872,7 @@ def compile_bom_entries(
 
 def write_bom(entries: List[BOMEntry]) -> None:
     path = DOCS_DIR / "BOM.csv"
-    with path.open("w", newline="", encoding="utf-8") as handle:
+    with io.StringIO(newline="") as handle:
         handle.write(f"ID: {ID_TAG}\n")
         writer = csv.writer(handle)
         writer.writerow(["Pos", "Delnavn", "Antall", "Materiale", "Emnedim (rå)", "Prosess", "Toleranse", "Overflate", "Merknad"])
@@ -1104,6 +1888,7 @@ def write_bom(entries: List[BOMEntry]) -> None:
                 entry.surface,
                 entry.note,
             ])
+        atomic_write_text(path, handle.getvalue(), newline="")
 
 
 def write_arbeidsplan() -> None:
@@ -1122,7 +1907,7 @@ def write_arbeidsplan() -> None:
 9. **Montasje** – Monter ramme, sylindre og lager → sett inn stempler → juster 90° fase via veiv.
 10. **Testing** – Kjør tørrgang med hånden → kontroller lekkasjer og interferens → journalfør resultater.
 """
-    path.write_text(content, encoding="utf-8")
+    atomic_write_text(path, content)
 
 
 def update_changelog() -> None:
@@ -1134,24 +1919,30 @@ def update_changelog() -> None:
         "# Endringslogg",
         f"- {timestamp} – v1.1.0 – Opprettet parametrisk Stirlingmotor-generator, eksport og dokumentasjon.",
     ]
-    path.write_text("\n".join(lines), encoding="utf-8")
+    atomic_write_text(path, "\n".join(lines))
 
 
 def write_simulation_stub(metrics: Dict[str, float]) -> None:
     path = SIM_DIR / "kinematikk_plan.md"
+    schmidt_text = ""
+    if "schmidt_work_j" in metrics:
+        schmidt_text = (
+            f"- **Indikert arbeid (Schmidt):** {metrics['schmidt_work_j']:.3f} J/syklus\n"
+            f"- **Indikert effekt (Schmidt):** {metrics['schmidt_power_w']:.2f} W\n"
+        )
     text = f"""ID: {ID_TAG}
 
 # Kinematikk og simulering
 - **Slagvolum:** {metrics['stroke_volume_cm3']:.2f} cm³
 - **Dødvolum:** {metrics['dead_volume_cm3']:.2f} cm³
 - **Kompresjonsforhold (beregnet):** {metrics['cr_estimate']:.3f}
-
+{schmidt_text}
 Før video eksporteres til `sim/kinematikk.mp4`, kjør følgende i Fusion 360:
 1. Sett `STROKE`-parameteren til ønsket verdi (12–20 mm valideres automatisk).
 2. Aktiver *Motion Study* → *Animate Joints* for veivsystemet.
 3. Eksporter MP4 (1920×1080) til `sim/kinematikk.mp4` og legg ved joints-filen i samme mappe.
 """
-    path.write_text(text, encoding="utf-8")
+    atomic_write_text(path, text)
 
 
 def apply_metadata(
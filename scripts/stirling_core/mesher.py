@@ -0,0 +1,461 @@
+# ID: codex_fusionapi_v1.9
+"""Headless tessellering av delene i ``primitives`` til trekantnett (krever numpy).
+
+Alle delene er bokser, rør og sylindre, så nettene kan lages analytisk
+uten Fusion sin ``exportManager``:
+
+- bokser gir 12 trekanter, også roterte ribber;
+- sylindre, rør, stempler og svinghjulet er omdreiningslegemer: en lukket
+  profil i (radius, z) roteres rundt aksen (``revolve_mesh``);
+- bunnplaten er en boks med gjennomgående hull: flaten trianguleres med et
+  kvadrat rundt hvert hull og et rutenett mellom kvadratene, og
+  ekstruderes (``plate_mesh``).
+
+Kroppene blir lukkede skall uten T-skjøter (``is_watertight``). En kropp
+som er en union av flere grunnformer (veivaksel med veivarm, varmeplate
+med ribber) skrives som ett skall per grunnform; slicere slår sammen
+overlappende skall. Oppløsningen er vinkelsteget langs sirklene i
+grader. ``write_binary_stl`` skriver binær STL med én numpy-skriving.
+
+Kjør ``python -m scripts.stirling_core.mesher --help`` fra repo-roten.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scripts.shared.config_loader import PROJECT_ROOT
+from scripts.stirling_core import engine, primitives
+from scripts.stirling_core.layout import LayoutEntry, build_layout_table
+from scripts.stirling_core.parameters import parameter_values
+from scripts.stirling_core.transforms import Matrix, TransformTree
+
+DEFAULT_RESOLUTION_DEG = 6.0
+MIN_SEGMENTS = 8
+DEFAULT_MESH_DIR = PROJECT_ROOT / "cad" / "mesh"
+
+STL_DTYPE = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+
+_KEY_DIGITS = 9
+
+
+@dataclass
+class Mesh:
+    """Trekantnett i mm: ``vertices`` (n, 3) og ``faces`` (m, 3), mot klokka sett utenfra."""
+
+    vertices: np.ndarray
+    faces: np.ndarray
+
+    @property
+    def triangle_count(self) -> int:
+        return int(len(self.faces))
+
+
+def segments_for(resolution_deg: float) -> int:
+    if resolution_deg <= 0:
+        raise ValueError("Vinkeloppløsningen må være positiv.")
+    return max(MIN_SEGMENTS, int(math.ceil(360.0 / resolution_deg)))
+
+
+def merge(meshes: Iterable[Mesh]) -> Mesh:
+    vertices: List[np.ndarray] = []
+    faces: List[np.ndarray] = []
+    offset = 0
+    for mesh in meshes:
+        vertices.append(mesh.vertices)
+        faces.append(mesh.faces + offset)
+        offset += len(mesh.vertices)
+    if not vertices:
+        return Mesh(np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64))
+    return Mesh(np.concatenate(vertices), np.concatenate(faces))
+
+
+def transform_mesh(mesh: Mesh, matrix: Matrix) -> Mesh:
+    """``mesh`` flyttet med en 4×4-matrise fra ``transforms`` (mm)."""
+
+    m = np.asarray(matrix, dtype=float).reshape(4, 4)
+    return Mesh(mesh.vertices @ m[:3, :3].T + m[:3, 3], mesh.faces)
+
+
+def is_watertight(mesh: Mesh) -> bool:
+    """Hver rettet kant forekommer én gang og har en motsatt kant."""
+
+    count = len(mesh.vertices)
+    edges = mesh.faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2).astype(np.int64)
+    forward = edges[:, 0] * count + edges[:, 1]
+    backward = edges[:, 1] * count + edges[:, 0]
+    return bool(np.unique(forward).size == forward.size and np.isin(backward, forward).all())
+
+
+# --- Grunnformer -----------------------------------------------------------
+
+
+def box_mesh(primitive: primitives.Primitive) -> Mesh:
+    length, width, height = primitive.size
+    x, y, z = primitive.center
+    corners = np.array(
+        [(sx * length / 2.0, sy * width / 2.0, sz * height) for sz in (0, 1) for sy in (-1, 1) for sx in (-1, 1)]
+    )
+    angle = math.radians(primitive.angle_deg)
+    cos_a, sin_a = math.cos(angle), math.sin(angle)
+    rotation = np.array([[cos_a, -sin_a, 0.0], [sin_a, cos_a, 0.0], [0.0, 0.0, 1.0]])
+    faces = np.array(
+        [
+            (0, 2, 3), (0, 3, 1),  # -z
+            (4, 5, 7), (4, 7, 6),  # +z
+            (0, 1, 5), (0, 5, 4),  # -y
+            (2, 6, 7), (2, 7, 3),  # +y
+            (0, 4, 6), (0, 6, 2),  # -x
+            (1, 3, 7), (1, 7, 5),  # +x
+        ],
+        dtype=np.int64,
+    )
+    return Mesh(corners @ rotation.T + (x, y, z), faces)
+
+
+def revolve_mesh(
+    profile: Sequence[Tuple[float, float]], segments: int, center: Sequence[float] = (0.0, 0.0, 0.0)
+) -> Mesh:
+    """Roter en lukket profil ``[(radius, z), ...]`` (mot klokka i r–z-planet) om z-aksen.
+
+    Punkter med radius 0 ligger på aksen og blir ett hjørne i stedet for en ring.
+    """
+
+    angles = np.arange(segments) * (2.0 * math.pi / segments)
+    ring_xy = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    vertices: List[np.ndarray] = []
+    rings: List[np.ndarray] = []
+    offset = 0
+    for radius, z in profile:
+        if radius == 0.0:
+            vertices.append(np.array([[0.0, 0.0, z]]))
+            rings.append(np.full(segments, offset, dtype=np.int64))
+            offset += 1
+        else:
+            vertices.append(np.column_stack([ring_xy * radius, np.full(segments, z)]))
+            rings.append(np.arange(offset, offset + segments, dtype=np.int64))
+            offset += segments
+
+    faces: List[np.ndarray] = []
+    following = np.roll(np.arange(segments), -1)
+    for index, (radius, _z) in enumerate(profile):
+        next_index = (index + 1) % len(profile)
+        next_radius = profile[next_index][0]
+        a, b = rings[index], rings[index][following]
+        d, c = rings[next_index], rings[next_index][following]
+        if radius == 0.0 and next_radius == 0.0:
+            continue
+        if radius == 0.0:
+            faces.append(np.column_stack([a, c, d]))
+        elif next_radius == 0.0:
+            faces.append(np.column_stack([a, b, c]))
+        else:
+            faces.append(np.column_stack([a, b, c]))
+            faces.append(np.column_stack([a, c, d]))
+    return Mesh(np.concatenate(vertices) + np.asarray(center, dtype=float), np.concatenate(faces))
+
+
+def cylinder_mesh(primitive: primitives.Primitive, segments: int) -> Mesh:
+    radius, height = primitive.size
+    return revolve_mesh([(0.0, 0.0), (radius, 0.0), (radius, height), (0.0, height)], segments, primitive.center)
+
+
+def primitive_mesh(primitive: primitives.Primitive, segments: int) -> Mesh:
+    if primitive.shape == primitives.CYLINDER:
+        return cylinder_mesh(primitive, segments)
+    return box_mesh(primitive)
+
+
+def _bore_profile(
+    outer: primitives.Primitive, bore: primitives.Primitive, name: str
+) -> List[Tuple[float, float]]:
+    """Profil for en sylinder med koaksialt hull som går ut gjennom topp og/eller bunn."""
+
+    radius, height = outer.size
+    bore_radius, bore_height = bore.size
+    start = bore.center[2] - outer.center[2]
+    end = start + bore_height
+    if not 0.0 < bore_radius < radius:
+        raise ValueError(f"{name}: hullradius {bore_radius:g} passer ikke i radius {radius:g}.")
+    through_bottom = start <= 1e-9
+    through_top = end >= height - 1e-9
+    if through_bottom and through_top:
+        return [(bore_radius, 0.0), (radius, 0.0), (radius, height), (bore_radius, height)]
+    if through_top:
+        return [(0.0, 0.0), (radius, 0.0), (radius, height), (bore_radius, height), (bore_radius, start), (0.0, start)]
+    if through_bottom:
+        return [(bore_radius, 0.0), (radius, 0.0), (radius, height), (0.0, height), (0.0, end), (bore_radius, end)]
+    raise ValueError(f"{name}: lukkede hulrom støttes ikke.")
+
+
+# --- Plate med hull --------------------------------------------------------
+
+
+class _PointIndex:
+    """2D-punkter med felles indeks for like koordinater."""
+
+    def __init__(self) -> None:
+        self.points: List[Tuple[float, float]] = []
+        self._index: Dict[Tuple[float, float], int] = {}
+
+    def add(self, x: float, y: float) -> int:
+        key = (round(x, _KEY_DIGITS) + 0.0, round(y, _KEY_DIGITS) + 0.0)
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self.points)
+            self.points.append((x, y))
+        return index
+
+
+def _plate_triangles(
+    length: float, width: float, holes: Sequence[Tuple[float, float, float]], segments: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Trianguler rektangelet ``length`` × ``width`` (sentrert i origo) minus sirkulære hull.
+
+    Hvert hull får et kvadrat (halv side ``s``) som trianguleres mellom
+    sirkelen og kvadratsidene. Flaten utenfor kvadratene deles i et
+    rutenett langs alle kvadratsidene; celler med ekstra punkter på
+    kantene vifter fra midtpunktet, så naboene deler alle hjørner.
+    """
+
+    x0, x1, y0, y1 = -length / 2.0, length / 2.0, -width / 2.0, width / 2.0
+    squares: List[Tuple[float, float, float, float]] = []
+    for index, (cx, cy, radius) in enumerate(holes):
+        edge = min(cx - x0, x1 - cx, cy - y0, y1 - cy)
+        half = 0.9 * edge
+        for other, (ox, oy, _r) in enumerate(holes):
+            if other != index:
+                half = min(half, 0.45 * max(abs(ox - cx), abs(oy - cy)))
+        if half <= radius * 1.01:
+            raise ValueError(f"Hullet i ({cx:g}, {cy:g}) ligger for nær kanten eller et annet hull.")
+        squares.append((cx, cy, radius, half))
+
+    xs = sorted({x0, x1} | {cx + sign * half for cx, _cy, _r, half in squares for sign in (-1, 1)})
+    ys = sorted({y0, y1} | {cy + sign * half for _cx, cy, _r, half in squares for sign in (-1, 1)})
+    index = _PointIndex()
+    # Punkter på kvadratsidene, per linje: {x: [(x, y), ...]} og {y: [(x, y), ...]}.
+    vertical: Dict[float, List[Tuple[float, float]]] = {}
+    horizontal: Dict[float, List[Tuple[float, float]]] = {}
+    triangles: List[Tuple[int, int, int]] = []
+    angles = [2.0 * math.pi * k / segments for k in range(segments)]
+
+    for cx, cy, radius, half in squares:
+        left, right, bottom, top = cx - half, cx + half, cy - half, cy + half
+        outline: List[Tuple[float, float]] = [(left, bottom), (right, bottom), (right, top), (left, top)]
+        for angle in angles:
+            cos_a, sin_a = math.cos(angle), math.sin(angle)
+            if abs(cos_a) >= abs(sin_a):
+                outline.append((cx + math.copysign(half, cos_a), cy + half * sin_a / abs(cos_a)))
+            else:
+                outline.append((cx + half * cos_a / abs(sin_a), cy + math.copysign(half, sin_a)))
+        outline += [(x, y) for x in xs if left < x < right for y in (bottom, top)]
+        outline += [(x, y) for y in ys if bottom < y < top for x in (left, right)]
+        for x, y in outline:
+            if x in (left, right):
+                vertical.setdefault(x, []).append((x, y))
+            if y in (bottom, top):
+                horizontal.setdefault(y, []).append((x, y))
+
+        ring = sorted({index.add(x, y): math.atan2(y - cy, x - cx) % (2.0 * math.pi) for x, y in outline}.items(), key=lambda item: item[1])
+        outer = [point for point, _angle in ring]
+        outer_angles = [angle for _point, angle in ring]
+        inner = [index.add(cx + radius * math.cos(angle), cy + radius * math.sin(angle)) for angle in angles]
+        i = j = 0
+        while i < len(outer) or j < len(inner):
+            next_outer = outer_angles[i + 1] if i + 1 < len(outer) else 2.0 * math.pi
+            next_inner = angles[j + 1] if j + 1 < len(inner) else 2.0 * math.pi
+            if j >= len(inner) or (i < len(outer) and next_outer <= next_inner):
+                triangles.append((outer[i % len(outer)], outer[(i + 1) % len(outer)], inner[j % len(inner)]))
+                i += 1
+            else:
+                triangles.append((outer[i % len(outer)], inner[(j + 1) % len(inner)], inner[j % len(inner)]))
+                j += 1
+
+    def on_line(lines: Dict[float, List[Tuple[float, float]]], value: float, axis: int, low: float, high: float) -> List[Tuple[float, float]]:
+        return sorted({point for point in lines.get(value, ()) if low < point[axis] < high}, key=lambda point: point[axis])
+
+    for xa, xb in zip(xs, xs[1:]):
+        for ya, yb in zip(ys, ys[1:]):
+            mx, my = (xa + xb) / 2.0, (ya + yb) / 2.0
+            if any(abs(mx - cx) < half and abs(my - cy) < half for cx, cy, _r, half in squares):
+                continue
+            boundary = (
+                [(xa, ya)] + on_line(horizontal, ya, 0, xa, xb)
+                + [(xb, ya)] + on_line(vertical, xb, 1, ya, yb)
+                + [(xb, yb)] + on_line(horizontal, yb, 0, xa, xb)[::-1]
+                + [(xa, yb)] + on_line(vertical, xa, 1, ya, yb)[::-1]
+            )
+            points = [index.add(x, y) for x, y in boundary]
+            # Punkter som faller sammen med et hjørne etter avrunding telles én gang.
+            corners = [point for k, point in enumerate(points) if point != points[k - 1]]
+            if len(corners) == 4:
+                triangles += [(corners[0], corners[1], corners[2]), (corners[0], corners[2], corners[3])]
+                continue
+            middle = index.add(mx, my)
+            triangles += [(middle, corners[k], corners[(k + 1) % len(corners)]) for k in range(len(corners))]
+
+    return np.asarray(index.points, dtype=float), np.asarray(triangles, dtype=np.int64)
+
+
+def extrude_triangles(points: np.ndarray, triangles: np.ndarray, height: float) -> Mesh:
+    """Lukket prisme fra en 2D-triangulering (mot klokka) mellom z = 0 og ``height``."""
+
+    count = len(points)
+    vertices = np.concatenate(
+        [np.column_stack([points, np.zeros(count)]), np.column_stack([points, np.full(count, height)])]
+    )
+    edges = triangles[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    undirected = np.sort(edges, axis=1)
+    _unique, first, counts = np.unique(undirected, axis=0, return_index=True, return_counts=True)
+    boundary = edges[first[counts == 1]]
+    start, end = boundary[:, 0], boundary[:, 1]
+    walls = np.concatenate(
+        [np.column_stack([start, end, end + count]), np.column_stack([start, end + count, start + count])]
+    )
+    faces = np.concatenate([triangles[:, [0, 2, 1]], triangles + count, walls])
+    return Mesh(vertices, faces)
+
+
+def plate_mesh(plate: primitives.Primitive, holes: Sequence[primitives.Primitive], segments: int) -> Mesh:
+    length, width, height = plate.size
+    x, y, z = plate.center
+    circles = [(hole.center[0] - x, hole.center[1] - y, hole.size[0]) for hole in holes]
+    points, triangles = _plate_triangles(length, width, circles, segments)
+    mesh = extrude_triangles(points, triangles, height)
+    return Mesh(mesh.vertices + (x, y, z), mesh.faces)
+
+
+# --- Kropper og deler ------------------------------------------------------
+
+
+def solid_mesh(spec: primitives.SolidSpec, segments: int) -> Mesh:
+    if not spec.subtract:
+        return merge(primitive_mesh(primitive, segments) for primitive in spec.add)
+    if len(spec.add) == 1:
+        base = spec.add[0]
+        cylinders = all(cut.shape == primitives.CYLINDER for cut in spec.subtract)
+        if base.shape == primitives.CYLINDER and len(spec.subtract) == 1 and cylinders:
+            bore = spec.subtract[0]
+            if bore.center[:2] == base.center[:2]:
+                return revolve_mesh(_bore_profile(base, bore, spec.name), segments, base.center)
+        if base.shape == primitives.BOX and base.angle_deg % 360.0 == 0.0 and cylinders:
+            through = all(
+                cut.center[2] == base.center[2] and cut.size[1] == base.size[2] for cut in spec.subtract
+            )
+            if through:
+                return plate_mesh(base, spec.subtract, segments)
+    raise ValueError(f"{spec.name}: kombinasjonen av grunnformer kan ikke tesselleres analytisk.")
+
+
+def part_mesh(key: str, geom: Mapping[str, float], resolution_deg: float = DEFAULT_RESOLUTION_DEG) -> Mesh:
+    """Nettet til komponenten ``key`` i komponentens eget koordinatsystem (mm)."""
+
+    segments = segments_for(resolution_deg)
+    return merge(solid_mesh(spec, segments) for spec in primitives.part_solids(key, geom))
+
+
+def part_meshes(
+    geom: Mapping[str, float],
+    keys: Optional[Iterable[str]] = None,
+    resolution_deg: float = DEFAULT_RESOLUTION_DEG,
+) -> Dict[str, Mesh]:
+    """Nett for ``keys`` (alle deler uten filter); like deler tesselleres én gang."""
+
+    by_shape: Dict[str, Mesh] = {}
+    meshes: Dict[str, Mesh] = {}
+    for key in primitives.PART_SOLIDS if keys is None else keys:
+        shape = primitives.geometry_key(primitives.part_solids(key, geom))
+        if shape not in by_shape:
+            by_shape[shape] = part_mesh(key, geom, resolution_deg)
+        meshes[key] = by_shape[shape]
+    return meshes
+
+
+def assembly_mesh(meshes: Mapping[str, Mesh], layout: Mapping[str, LayoutEntry]) -> Mesh:
+    """Delene plassert med verdensmatrisene fra layouttabellen."""
+
+    tree = TransformTree(layout)
+    return merge(transform_mesh(mesh, tree.world(key)) for key, mesh in meshes.items() if key in layout)
+
+
+def write_binary_stl(path: Path, mesh: Mesh, header: str = "") -> None:
+    """Skriv ``mesh`` som binær STL (atomisk); normalene regnes fra trekantene."""
+
+    triangles = mesh.vertices[mesh.faces]
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    records = np.zeros(len(triangles), dtype=STL_DTYPE)
+    records["normal"] = normals
+    records["vertices"] = triangles
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(header.encode("ascii", "replace")[:80].ljust(80, b" "))
+        handle.write(np.uint32(len(records)).tobytes())
+        records.tofile(handle)
+    os.replace(tmp_path, path)
+
+
+def write_part_stls(
+    geom: Mapping[str, float],
+    out_dir: Path,
+    keys: Optional[Iterable[str]] = None,
+    resolution_deg: float = DEFAULT_RESOLUTION_DEG,
+    layout: Optional[Mapping[str, LayoutEntry]] = None,
+) -> Dict[str, Mesh]:
+    """Skriv ``stirling_<del>_v1.stl`` i ``out_dir``, og sammenstillingen når ``layout`` er gitt."""
+
+    meshes = part_meshes(geom, keys, resolution_deg)
+    for key, mesh in meshes.items():
+        write_binary_stl(Path(out_dir) / f"stirling_{key}_v1.stl", mesh, f"stirling {key}")
+    if layout is not None:
+        assembly = assembly_mesh(part_meshes(geom, None, resolution_deg), layout)
+        write_binary_stl(Path(out_dir) / "stirling_assembly_v1.stl", assembly, "stirling assembly")
+        meshes = dict(meshes, assembly=assembly)
+    return meshes
+
+
+def parse_overrides(items: Sequence[str]) -> Dict[str, float]:
+    overrides: Dict[str, float] = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if not value:
+            raise SystemExit(f"Forventet NAVN=verdi, fikk {item!r}")
+        overrides[name.strip()] = float(value)
+    return overrides
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analytiske STL-nett for delene uten Fusion.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_MESH_DIR)
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION_DEG, help="Vinkelsteg i grader.")
+    parser.add_argument("--set", action="append", default=[], metavar="NAVN=VERDI", help="Overstyr en parameter.")
+    parser.add_argument("--parts", nargs="*", default=None, help="Deler (standard: alle).")
+    parser.add_argument("--no-assembly", action="store_true")
+    args = parser.parse_args(argv)
+
+    values = parameter_values(parse_overrides(args.set))
+    geom = engine.compute_geometry_inputs(values)
+    layout = None if args.no_assembly else build_layout_table(values, geom)
+    started = time.perf_counter()
+    meshes = write_part_stls(geom, args.out, args.parts, args.resolution, layout)
+    elapsed = time.perf_counter() - started
+    for key, mesh in meshes.items():
+        status = "tett" if is_watertight(mesh) else "IKKE tett"
+        print(f"{key}: {mesh.triangle_count} trekanter, {status}")
+    print(f"{len(meshes)} STL-filer i {args.out} på {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+# ID: codex_fusionapi_v1.9
+"""Automatisk pakking av scatter-layouten uten overlapp.
+
+Hver komponent får aksejusterte avgrensningsbokser (AABB) fra
+``primitives`` – én per kropp, så en sylinder som står på bunnplaten ikke
+kolliderer med ramme-søylene bare fordi rammens samlede boks er stor.
+``find_overlaps`` finner overlapp med sweep-and-prune langs x.
+``pack_layout`` lar delene som ikke overlapper stå, og flytter resten
+(med undertreet sitt) til nærmeste ledige punkt på inspeksjonsrutenettet i
+xy-planet, i hele rutenettsteg fra den nominelle posisjonen. Alle mål er i
+millimeter, som i layouttabellen.
+
+Kjør ``python -m scripts.stirling_core.packing`` for en benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from scripts.stirling_core import primitives
+from scripts.stirling_core.transforms import Matrix, TransformTree
+
+Vector = Tuple[float, float, float]
+AABB = Tuple[Vector, Vector]
+
+GRID_PITCH = 10.0
+PART_GAP = 10.0
+MAX_RINGS = 200
+
+_EPS = 1e-6
+
+
+def primitive_bounds(primitive: primitives.Primitive) -> AABB:
+    x, y, z = primitive.center
+    if primitive.shape == primitives.CYLINDER:
+        radius, height = primitive.size
+        return (x - radius, y - radius, z), (x + radius, y + radius, z + height)
+    length, width, height = primitive.size
+    angle = math.radians(primitive.angle_deg)
+    cos_a, sin_a = abs(math.cos(angle)), abs(math.sin(angle))
+    half_x = cos_a * length / 2.0 + sin_a * width / 2.0
+    half_y = sin_a * length / 2.0 + cos_a * width / 2.0
+    return (x - half_x, y - half_y, z), (x + half_x, y + half_y, z + height)
+
+
+def union(boxes: Iterable[AABB]) -> AABB:
+    boxes = list(boxes)
+    return (
+        tuple(min(box[0][axis] for box in boxes) for axis in range(3)),  # type: ignore[return-value]
+        tuple(max(box[1][axis] for box in boxes) for axis in range(3)),
+    )
+
+
+def part_bounds(key: str, geom: Mapping[str, float]) -> List[AABB]:
+    """Lokale bokser for kroppene i ``key`` (uttrekk teller ikke)."""
+
+    return [union(primitive_bounds(primitive) for primitive in spec.add) for spec in primitives.part_solids(key, geom)]
+
+
+def transform_bounds(box: AABB, matrix: Matrix) -> AABB:
+    """AABB rundt de åtte hjørnene til ``box`` etter ``matrix``."""
+
+    lower, upper = box
+    result_min = [math.inf] * 3
+    result_max = [-math.inf] * 3
+    for row in range(3):
+        m0, m1, m2, offset = matrix[row * 4 : row * 4 + 4]
+        # Min/maks av en lineær funksjon over en boks tas i hjørnene per akse.
+        low = high = offset
+        for coefficient, a, b in ((m0, lower[0], upper[0]), (m1, lower[1], upper[1]), (m2, lower[2], upper[2])):
+            first, second = coefficient * a, coefficient * b
+            low += min(first, second)
+            high += max(first, second)
+        result_min[row], result_max[row] = low, high
+    return tuple(result_min), tuple(result_max)  # type: ignore[return-value]
+
+
+def overlaps(a: AABB, b: AABB, gap: Tuple[float, float, float] = (0.0, 0.0, 0.0)) -> bool:
+    """Felles volum (berøring teller ikke), med ekstra avstand ``gap`` per akse."""
+
+    return all(
+        a[0][axis] < b[1][axis] + gap[axis] - _EPS and b[0][axis] < a[1][axis] + gap[axis] - _EPS
+        for axis in range(3)
+    )
+
+
+def find_overlaps(boxes: Sequence[Tuple[str, AABB]]) -> Set[Tuple[str, str]]:
+    """Par av ulike eiere med overlappende bokser (sweep-and-prune langs x)."""
+
+    order = sorted(range(len(boxes)), key=lambda index: boxes[index][1][0][0])
+    active: List[int] = []
+    pairs: Set[Tuple[str, str]] = set()
+    for index in order:
+        owner, box = boxes[index]
+        start_x = box[0][0]
+        active = [other for other in active if boxes[other][1][1][0] > start_x + _EPS]
+        for other in active:
+            other_owner, other_box = boxes[other]
+            if other_owner != owner and overlaps(box, other_box):
+                pairs.add((min(owner, other_owner), max(owner, other_owner)))
+        active.append(index)
+    return pairs
+
+
+class _SpatialHash:
+    """Bokser fordelt på xy-celler slik at en kollisjonssjekk bare ser på naboer."""
+
+    def __init__(self, cell: float) -> None:
+        self.cell = cell
+        self._cells: Dict[Tuple[int, int], List[Tuple[str, AABB]]] = {}
+        self._boxes: List[Tuple[str, AABB]] = []
+
+    def _keys(self, box: AABB, margin: float = 0.0) -> Iterable[Tuple[int, int]]:
+        x0 = math.floor((box[0][0] - margin) / self.cell)
+        x1 = math.floor((box[1][0] + margin) / self.cell)
+        y0 = math.floor((box[0][1] - margin) / self.cell)
+        y1 = math.floor((box[1][1] + margin) / self.cell)
+        return ((ix, iy) for ix in range(x0, x1 + 1) for iy in range(y0, y1 + 1))
+
+    def boxes(self) -> List[Tuple[str, AABB]]:
+        return self._boxes
+
+    def add(self, owner: str, box: AABB) -> None:
+        self._boxes.append((owner, box))
+        for key in self._keys(box):
+            self._cells.setdefault(key, []).append((owner, box))
+
+    def collides(self, owner: str, box: AABB, gap: float) -> bool:
+        gaps = (gap, gap, 0.0)
+        for key in self._keys(box, gap):
+            for other_owner, other_box in self._cells.get(key, ()):
+                if other_owner != owner and overlaps(box, other_box, gaps):
+                    return True
+        return False
+
+
+def _depth(name: str, entries: Mapping[str, Any]) -> int:
+    depth = 0
+    seen = {name}
+    parent = entries[name].parent
+    while parent in entries and parent not in seen:
+        seen.add(parent)
+        depth += 1
+        parent = entries[parent].parent
+    return depth
+
+
+def _rotate_back(matrix: Matrix, vector: Vector) -> Vector:
+    """``Rᵀ · vector`` for rotasjonsdelen av ``matrix`` (verdens- til lokal retning)."""
+
+    return tuple(
+        matrix[column] * vector[0] + matrix[4 + column] * vector[1] + matrix[8 + column] * vector[2]
+        for column in range(3)
+    )  # type: ignore[return-value]
+
+
+def pack_layout(
+    entries: Mapping[str, Any],
+    bounds: Mapping[str, Sequence[AABB]],
+    fixed: Iterable[str] = ("frame",),
+    pitch: float = GRID_PITCH,
+    gap: float = PART_GAP,
+    max_rings: int = MAX_RINGS,
+) -> Tuple[Dict[str, Tuple[float, float, float]], Set[str]]:
+    """Lokale origoer uten overlapp for ``entries`` og navnene som ble flyttet.
+
+    ``entries`` har ``origin``, ``orientation`` og ``parent`` (som
+    ``LayoutEntry``); ``bounds`` gir lokale bokser per post. Poster i
+    ``fixed`` flyttes aldri. Overlappende poster behandles forelder før
+    barn og i tabellrekkefølge; den første i et par blir stående.
+    Flyttede poster holder ``gap`` mm avstand i xy til alt annet.
+    """
+
+    fixed = set(fixed)
+    tree = TransformTree(entries)
+    origins = {name: tuple(entry.origin) for name, entry in entries.items()}
+    world = {
+        name: [transform_bounds(box, tree.world(name)) for box in bounds.get(name, ())] for name in entries
+    }
+
+    nominal = [(name, box) for name in entries for box in world[name]]
+    colliding = {name for pair in find_overlaps(nominal) for name in pair} - fixed
+    children: Dict[str, List[str]] = {}
+    for name, entry in entries.items():
+        children.setdefault(entry.parent, []).append(name)
+    pending: Set[str] = set()
+    stack = list(colliding)
+    while stack:
+        name = stack.pop()
+        if name in pending or name in fixed:
+            continue
+        pending.add(name)
+        stack.extend(children.get(name, ()))
+
+    cell = max(pitch * 4.0, gap * 2.0)
+    placed = _SpatialHash(cell)
+    for name, box in nominal:
+        if name not in pending:
+            placed.add(name, box)
+
+    # En flytting er en ren translasjon i xy, så undertreet arver den og
+    # verdensboksene forskyves i stedet for å regnes ut på nytt.
+    shift: Dict[str, Tuple[float, float]] = {}
+    moved: Set[str] = set()
+    position = {name: index for index, name in enumerate(entries)}
+    order = sorted(pending, key=lambda name: (_depth(name, entries), position[name]))
+    for name in order:
+        entry = entries[name]
+        dx, dy = shift.get(entry.parent, (0.0, 0.0))
+        boxes = [_shifted(box, dx, dy) for box in world[name]] if dx or dy else world[name]
+        if any(placed.collides(name, box, 0.0) for box in boxes):
+            step = _free_step(placed, name, boxes, pitch, gap, max_rings)
+            if step is None:
+                raise ValueError(f"Fant ingen ledig plass til {name} innen {max_rings} rutenettsteg.")
+            delta = (step[0] * pitch, step[1] * pitch, 0.0)
+            parent = entry.parent if entry.parent in entries else None
+            local_delta = _rotate_back(tree.world(parent), delta) if parent else delta
+            origins[name] = tuple(origins[name][axis] + local_delta[axis] for axis in range(3))
+            moved.add(name)
+            boxes = [_shifted(box, delta[0], delta[1]) for box in boxes]
+            dx, dy = dx + delta[0], dy + delta[1]
+        shift[name] = (dx, dy)
+        for box in boxes:
+            placed.add(name, box)
+    return origins, moved  # type: ignore[return-value]
+
+
+def _shifted(box: AABB, dx: float, dy: float) -> AABB:
+    return (box[0][0] + dx, box[0][1] + dy, box[0][2]), (box[1][0] + dx, box[1][1] + dy, box[1][2])
+
+
+def _step_range(low: float, high: float, pitch: float) -> Tuple[int, int]:
+    """Hele steg ``k`` med ``low < k · pitch < high`` som ``(første, siste)``."""
+
+    first = math.floor(low / pitch) + 1
+    while (first - 1) * pitch > low:
+        first -= 1
+    last = math.ceil(high / pitch) - 1
+    while (last + 1) * pitch < high:
+        last += 1
+    return first, last
+
+
+def _blocked_steps(
+    placed: _SpatialHash,
+    name: str,
+    boxes: Sequence[AABB],
+    pitch: float,
+    gap: float,
+) -> List[Tuple[int, int, int, int]]:
+    """Sperrede forskyvninger som rektangler ``(i0, i1, j0, j1)`` i rutenettsteg.
+
+    En forskyvning ``(i, j) · pitch`` av en boks kolliderer med en plassert
+    boks nøyaktig når den ligger i et åpent rektangel (Minkowski-differansen
+    utvidet med ``gap``). Høyden endres ikke, så bokser uten overlapp i z
+    sperrer ingenting.
+    """
+
+    blocked: List[Tuple[int, int, int, int]] = []
+    for other_owner, other in placed.boxes():
+        if other_owner == name:
+            continue
+        for box in boxes:
+            if not (box[0][2] < other[1][2] - _EPS and other[0][2] < box[1][2] - _EPS):
+                continue
+            i0, i1 = _step_range(other[0][0] - box[1][0] - gap + _EPS, other[1][0] - box[0][0] + gap - _EPS, pitch)
+            j0, j1 = _step_range(other[0][1] - box[1][1] - gap + _EPS, other[1][1] - box[0][1] + gap - _EPS, pitch)
+            if i0 <= i1 and j0 <= j1:
+                blocked.append((i0, i1, j0, j1))
+    return blocked
+
+
+def _free_step(
+    placed: _SpatialHash,
+    name: str,
+    boxes: Sequence[AABB],
+    pitch: float,
+    gap: float,
+    max_rings: int,
+) -> Optional[Tuple[int, int]]:
+    """Nærmeste ledige steg ``(i, j)``, eller ``None``.
+
+    Ringene har Chebyshev-avstand 1, 2, …; innen en ring vinner kortest
+    avstand, så størst ``j`` og minst ``i``. Hver side av en ring er et
+    linjestykke der de sperrede rektanglene gir intervaller, og i hvert
+    ledige hull er punktet nærmest midten best. Ringen prøves dermed uten
+    å teste stegene ett for ett.
+    """
+
+    blocked = _blocked_steps(placed, name, boxes, pitch, gap)
+    # Ringer som ligger helt inne i ett rektangel (typisk bunnplaten) hoppes over.
+    covered = max((min(-rect[0], rect[1], -rect[2], rect[3]) for rect in blocked), default=0)
+    for radius in range(max(1, covered + 1), max_rings + 1):
+        best: Optional[Tuple[int, int]] = None
+        best_key: Tuple[int, int, int] = (0, 0, 0)
+        for vertical, fixed in ((False, radius), (False, -radius), (True, radius), (True, -radius)):
+            if vertical:
+                spans = sorted((rect[2], rect[3]) for rect in blocked if rect[0] <= fixed <= rect[1])
+            else:
+                spans = sorted((rect[0], rect[1]) for rect in blocked if rect[2] <= fixed <= rect[3])
+            start = -radius
+            for low, high in spans + [(radius + 1, radius + 1)]:
+                if low > start:
+                    value = min(max(0, start), min(low - 1, radius))
+                    i, j = (fixed, value) if vertical else (value, fixed)
+                    key = (i * i + j * j, -j, i)
+                    if best is None or key < best_key:
+                        best, best_key = (i, j), key
+                start = max(start, high + 1)
+                if start > radius:
+                    break
+        if best is not None:
+            return best
+    return None
+
+
+# --- Benchmark -------------------------------------------------------------
+
+
+class _Entry:
+    __slots__ = ("origin", "orientation", "parent")
+
+    def __init__(self, origin: Vector, orientation: Vector, parent: Optional[str]) -> None:
+        self.origin = origin
+        self.orientation = orientation
+        self.parent = parent
+
+
+def benchmark(cylinders: int = 12) -> Dict[str, float]:
+    """Flersylindret motor: ``cylinders`` × (sylinder, stempel, stang) oppå én ramme."""
+
+    geom = {
+        "base_length": 60.0 * cylinders,
+        "base_width": 160.0,
+        "base_thick": 12.0,
+        "frame_height": 95.0,
+        "od_work": 70.0,
+        "id_work": 63.0,
+        "len_work": 20.0,
+        "piston_diameter": 62.8,
+        "stroke": 15.0,
+        "rod_d": 6.0,
+        "rod_length": 70.0,
+    }
+    entries: Dict[str, _Entry] = {"frame": _Entry((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), None)}
+    bounds: Dict[str, List[AABB]] = {"frame": part_bounds("frame", geom)}
+    for index in range(cylinders):
+        x = (index - (cylinders - 1) / 2.0) * 50.0
+        entries[f"cyl{index}"] = _Entry((x, 0.0, 12.0), (0.0, 0.0, 0.0), "frame")
+        entries[f"piston{index}"] = _Entry((0.0, 0.0, 2.0), (0.0, 0.0, 0.0), f"cyl{index}")
+        entries[f"rod{index}"] = _Entry((0.0, 0.0, 20.0), (0.0, 0.0, 0.0), f"piston{index}")
+        bounds[f"cyl{index}"] = part_bounds("work_cylinder", geom)
+        bounds[f"piston{index}"] = part_bounds("work_piston", geom)
+        bounds[f"rod{index}"] = part_bounds("connecting_rods", geom)
+
+    started = time.perf_counter()
+    origins, moved = pack_layout(entries, bounds)
+    seconds = time.perf_counter() - started
+
+    tree = TransformTree({name: _Entry(origins[name], entry.orientation, entry.parent) for name, entry in entries.items()})
+    final = [(name, transform_bounds(box, tree.world(name))) for name in entries for box in bounds[name]]
+    if find_overlaps(final):
+        raise AssertionError("Pakket layout har fortsatt overlapp.")
+    return {"parts": float(len(entries)), "moved": float(len(moved)), "seconds": seconds}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark for scatter-pakkingen.")
+    parser.add_argument("--cylinders", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    stats = benchmark(args.cylinders)
+    print(
+        f"Deler: {stats['parts']:.0f}, flyttet: {stats['moved']:.0f}, "
+        f"pakking: {stats['seconds'] * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
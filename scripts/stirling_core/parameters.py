@@ -0,0 +1,76 @@
+# ID: codex_fusionapi_v1.9
+"""Parameterdefinisjoner for stirling_core uten avhengighet til adsk.
+
+Tabellen deles av Fusion-add-in'en og de headless beregningene slik at
+standardverdier, enheter og kommentarer kun finnes ett sted.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+
+@dataclass
+class ParameterDef:
+    name: str
+    value: float
+    unit: str
+    comment: str
+
+
+PARAMETER_DEFINITIONS: Tuple[ParameterDef, ...] = (
+    ParameterDef("ID_WORK", 63.0, "mm", "Innvendig diameter arbeidssylinder (kvartsglass)."),
+    ParameterDef("OD_WORK", 70.0, "mm", "Ytre diameter arbeidssylinder."),
+    ParameterDef("LEN_WORK", 20.0, "mm", "Arbeidssylinderens lengde."),
+    ParameterDef("ID_DISP", 63.0, "mm", "Innvendig diameter fortrengersylinder."),
+    ParameterDef("OD_DISP", 70.0, "mm", "Ytre diameter fortrengersylinder."),
+    ParameterDef("LEN_DISP", 20.0, "mm", "Fortrengersylinderens lengde."),
+    ParameterDef("ANGLE_CYL", 90.0, "deg", "Vinkel mellom sylindre."),
+    ParameterDef("STROKE", 15.0, "mm", "Slaglengde."),
+    ParameterDef("CR_TARGET", 1.4, "", "Målsatt kompresjonsforhold."),
+    ParameterDef("CLEAR_MIN", 0.10, "mm", "Minimum klaring mellom bevegelige deler."),
+    ParameterDef("CLEAR_MAX", 0.30, "mm", "Maksimum klaring."),
+    ParameterDef("FLYWHEEL_D", 140.0, "mm", "Svinghjulsdiameter."),
+    ParameterDef("FLYWHEEL_THICK", 12.0, "mm", "Svinghjulstykkelse."),
+    ParameterDef("CRANK_PIN", 4.0, "mm", "Veivpinndiameter."),
+    ParameterDef("SHAFT_D", 8.0, "mm", "Veivakseldiameter."),
+    ParameterDef("ROD_DIAMETER", 6.0, "mm", "Koblingsstangdiameter."),
+    ParameterDef("ROD_LENGTH", 70.0, "mm", "Koblingsstanglengde."),
+    ParameterDef("DISPLACER_OFFSET", 80.0, "mm", "Senteravstand mellom sylindre."),
+    ParameterDef("BASE_LENGTH", 260.0, "mm", "Lengde på bunnplate."),
+    ParameterDef("BASE_WIDTH", 160.0, "mm", "Bredde på bunnplate."),
+    ParameterDef("BASE_THICK", 12.0, "mm", "Bunnplatetykkelse."),
+    ParameterDef("FRAME_COLUMN_H", 95.0, "mm", "Høyde på rammesøyler."),
+    ParameterDef("COLUMN_COUNT", 2, "", "Antall rammesøyler (lineært mønster langs bunnplaten)."),
+    ParameterDef("MOUNT_COUNT_X", 2, "", "Monteringshull langs bunnplatens lengde (rektangulært mønster)."),
+    ParameterDef("MOUNT_COUNT_Y", 2, "", "Monteringshull langs bunnplatens bredde (rektangulært mønster)."),
+    ParameterDef("RIB_COUNT", 6, "", "Antall kjøleribber på varmeplaten (sirkulært mønster)."),
+    ParameterDef("HOT_END_TEMP", 650.0, "degC", "Metadata: varm-sone temperatur."),
+    ParameterDef("COLD_END_TEMP", 60.0, "degC", "Metadata: kald-sone temperatur."),
+)
+
+
+def default_parameter_values() -> Dict[str, float]:
+    """Returner ``{navn: standardverdi}`` i enhetene fra PARAMETER_DEFINITIONS."""
+
+    return {defn.name: defn.value for defn in PARAMETER_DEFINITIONS}
+
+
+def parameter_units() -> Dict[str, str]:
+    """Returner ``{navn: enhet}`` slik verdiene i parametertabellen er uttrykt."""
+
+    return {defn.name: defn.unit for defn in PARAMETER_DEFINITIONS}
+
+
+def parameter_values(overrides: Optional[Mapping[str, float]] = None) -> Dict[str, float]:
+    """Slå sammen standardverdier med overstyringer for én motorvariant."""
+
+    values = default_parameter_values()
+    if overrides:
+        unknown = sorted(name for name in overrides if name not in values)
+        if unknown:
+            raise KeyError(f"Ukjente parametre: {', '.join(unknown)}")
+        for name, value in overrides.items():
+            values[name] = float(value)
+    return values
@@ -0,0 +1,276 @@
+# ID: codex_fusionapi_v1.9
+"""Headless beskrivelse av delene som enkle grunnformer (bokser og sylindre).
+
+Beskrivelsen speiler ``build_*``-funksjonene i add-in'en: samme mål, samme
+plassering i komponentens eget koordinatsystem og samme kroppsnavn. Den
+brukes av den direkte byggeveien (``TemporaryBRepManager``) og kan leses
+uten Fusion. Alle mål er i millimeter; ``center`` er senter på bunnflaten.
+
+Gjengefeatures er ikke geometri og er derfor ikke med; gjengehullene
+beskrives som glatte hull.
+
+Deler med lik form får samme ``geometry_key`` (kroppsnavn teller ikke).
+``shared_definitions`` bruker nøkkelen til å la like deler dele én
+komponentdefinisjon som plasseres med flere forekomster.
+
+Gjentatt geometri (monteringshull, søyler, kjøleribber) beskrives som et
+mønster: ``mount_grid``, ``column_line`` og ``rib_angles`` gir antall og
+avstand som Fusion-byggeren bruker til mønsterfeatures, og posisjonene
+under er avledet av de samme tallene.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+BOX = "box"
+CYLINDER = "cylinder"
+
+MOUNT_HOLE_RADIUS = 2.5
+MOUNT_HOLE_MARGIN = 20.0
+COLUMN_RADIUS = 5.0
+THERMAL_PLATE_THICK = 5.0
+THERMAL_PLATE_MARGIN = 5.0
+DISPLACER_WALL = 0.75
+THERMAL_RIB_WIDTH = 2.0
+THERMAL_RIB_HEIGHT = 5.0
+THERMAL_RIB_INSET = 2.0
+
+DEFAULT_COLUMN_COUNT = 2
+DEFAULT_MOUNT_COUNT = 2
+DEFAULT_RIB_COUNT = 6
+
+
+@dataclass(frozen=True)
+class Primitive:
+    """Boks ``(lengde x, bredde y, høyde z)`` eller sylinder ``(radius, høyde)`` langs z.
+
+    ``angle_deg`` roterer boksen om z-aksen gjennom ``center``.
+    """
+
+    shape: str
+    size: Tuple[float, ...]
+    center: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    angle_deg: float = 0.0
+
+
+@dataclass(frozen=True)
+class SolidSpec:
+    """Én kropp: union av ``add`` minus ``subtract``."""
+
+    name: str
+    add: Tuple[Primitive, ...]
+    subtract: Tuple[Primitive, ...] = ()
+
+
+def box(
+    length: float,
+    width: float,
+    height: float,
+    x: float = 0.0,
+    y: float = 0.0,
+    z: float = 0.0,
+    angle_deg: float = 0.0,
+) -> Primitive:
+    return Primitive(BOX, (length, width, height), (x, y, z), angle_deg)
+
+
+def cylinder(radius: float, height: float, x: float = 0.0, y: float = 0.0, z: float = 0.0) -> Primitive:
+    return Primitive(CYLINDER, (radius, height), (x, y, z))
+
+
+def _count(geom: Mapping[str, float], key: str, default: int) -> int:
+    count = int(round(geom.get(key, default)))
+    if count < 1:
+        raise ValueError(f"{key} må være minst 1.")
+    return count
+
+
+def _spread(count: int, span: float) -> float:
+    """Avstand mellom ``count`` instanser fordelt over ``span`` (0 for én instans)."""
+
+    return span / (count - 1) if count > 1 else 0.0
+
+
+def mount_grid(geom: Mapping[str, float]) -> Tuple[int, float, int, float]:
+    """``(antall x, avstand x, antall y, avstand y)`` for monteringshullene (mm)."""
+
+    count_x = _count(geom, "mount_count_x", DEFAULT_MOUNT_COUNT)
+    count_y = _count(geom, "mount_count_y", DEFAULT_MOUNT_COUNT)
+    span_x = geom["base_length"] - 2 * MOUNT_HOLE_MARGIN
+    span_y = geom["base_width"] - 2 * MOUNT_HOLE_MARGIN
+    return count_x, _spread(count_x, span_x), count_y, _spread(count_y, span_y)
+
+
+def mount_hole_positions(geom: Mapping[str, float]) -> Tuple[Tuple[float, float], ...]:
+    """Hullsentre; første posisjon er frøet som mønsteret bygger videre fra."""
+
+    count_x, step_x, count_y, step_y = mount_grid(geom)
+    start_x = -step_x * (count_x - 1) / 2.0
+    start_y = -step_y * (count_y - 1) / 2.0
+    return tuple(
+        (start_x + i * step_x, start_y + j * step_y) for j in range(count_y) for i in range(count_x)
+    )
+
+
+def column_line(geom: Mapping[str, float]) -> Tuple[int, float]:
+    """``(antall, avstand)`` for søylene langs x, symmetrisk om origo (mm)."""
+
+    count = _count(geom, "column_count", DEFAULT_COLUMN_COUNT)
+    return count, _spread(count, geom["base_length"] / 2.0)
+
+
+def column_positions(geom: Mapping[str, float]) -> Tuple[Tuple[float, float], ...]:
+    count, step = column_line(geom)
+    start = -step * (count - 1) / 2.0
+    return tuple((start + i * step, 0.0) for i in range(count))
+
+
+def rib_angles(geom: Mapping[str, float]) -> Tuple[float, ...]:
+    """Vinkler (grader) for kjøleribbene; hver ribbe går over hele diameteren."""
+
+    count = _count(geom, "rib_count", DEFAULT_RIB_COUNT)
+    return tuple(i * 180.0 / count for i in range(count))
+
+
+def rib_length(geom: Mapping[str, float]) -> float:
+    return 2.0 * (thermal_plate_radius(geom) - THERMAL_RIB_INSET)
+
+
+def thermal_plate_radius(geom: Mapping[str, float]) -> float:
+    return max(geom["od_disp"], geom["od_work"]) / 2.0 + THERMAL_PLATE_MARGIN
+
+
+def frame_solids(geom: Mapping[str, float]) -> Tuple[SolidSpec, ...]:
+    thick = geom["base_thick"]
+    plate = SolidSpec(
+        "Bunnplate",
+        (box(geom["base_length"], geom["base_width"], thick),),
+        tuple(cylinder(MOUNT_HOLE_RADIUS, thick, x, y) for x, y in mount_hole_positions(geom)),
+    )
+    columns = tuple(
+        SolidSpec(f"Rammekolonne {index + 1}", (cylinder(COLUMN_RADIUS, geom["frame_height"], x, y),))
+        for index, (x, y) in enumerate(column_positions(geom))
+    )
+    return (plate,) + columns
+
+
+def tube_solids(outer_diameter: float, inner_diameter: float, length: float, name: str) -> Tuple[SolidSpec, ...]:
+    return (
+        SolidSpec(
+            name,
+            (cylinder(outer_diameter / 2.0, length),),
+            (cylinder(inner_diameter / 2.0, length),),
+        ),
+    )
+
+
+def piston_solids(diameter: float, length: float, name: str, hollow: bool = False) -> Tuple[SolidSpec, ...]:
+    subtract: Tuple[Primitive, ...] = ()
+    if hollow:
+        # Kuttet går fra toppflaten og 90 % av lengden ned.
+        subtract = (cylinder(diameter / 2.0 - DISPLACER_WALL, length * 0.9, z=length * 0.1),)
+    return (SolidSpec(name, (cylinder(diameter / 2.0, length),), subtract),)
+
+
+def crankshaft_solids(geom: Mapping[str, float]) -> Tuple[SolidSpec, ...]:
+    length = geom["offset"] + 2 * geom["rod_length"]
+    web = box(geom["rod_length"] * 2.0 / 3.0, geom["crank_pin"] * 2.0, geom["crank_pin"] * 2.0)
+    return (SolidSpec("Veivaksel", (cylinder(geom["shaft_d"] / 2.0, length), web)),)
+
+
+def flywheel_solids(geom: Mapping[str, float]) -> Tuple[SolidSpec, ...]:
+    thick = geom["flywheel_thick"]
+    return (
+        SolidSpec(
+            "Svinghjul",
+            (cylinder(geom["flywheel_d"] / 2.0, thick),),
+            (cylinder(geom["shaft_d"] / 2.0, thick),),
+        ),
+    )
+
+
+def connecting_rod_solids(geom: Mapping[str, float]) -> Tuple[SolidSpec, ...]:
+    return (SolidSpec("Koblingsstang", (box(geom["rod_d"], geom["rod_length"], geom["rod_d"]),)),)
+
+
+def thermal_solids(geom: Mapping[str, float]) -> Tuple[SolidSpec, ...]:
+    plate = cylinder(thermal_plate_radius(geom), THERMAL_PLATE_THICK)
+    length = rib_length(geom)
+    ribs = tuple(
+        box(length, THERMAL_RIB_WIDTH, THERMAL_RIB_HEIGHT, z=THERMAL_PLATE_THICK, angle_deg=angle)
+        for angle in rib_angles(geom)
+    )
+    return (SolidSpec("Varmeplate", (plate,) + ribs),)
+
+
+PART_SOLIDS: Dict[str, Callable[[Mapping[str, float]], Tuple[SolidSpec, ...]]] = {
+    "frame": frame_solids,
+    "work_cylinder": lambda g: tube_solids(g["od_work"], g["id_work"], g["len_work"], "Arbeidssylinder"),
+    "displacer_cylinder": lambda g: tube_solids(g["od_disp"], g["id_disp"], g["len_disp"], "Fortrengersylinder"),
+    "work_piston": lambda g: piston_solids(g["piston_diameter"], g["stroke"], "Arbeidsstempel"),
+    "displacer": lambda g: piston_solids(g["displacer_diameter"], g["len_disp"], "Fortrenger", hollow=True),
+    "crankshaft": crankshaft_solids,
+    "flywheel": flywheel_solids,
+    "connecting_rods": connecting_rod_solids,
+    "connecting_rod_2": connecting_rod_solids,
+    "thermal": thermal_solids,
+}
+
+
+def part_solids(key: str, geom: Mapping[str, float]) -> Tuple[SolidSpec, ...]:
+    """Kroppene som komponenten ``key`` består av."""
+
+    try:
+        builder = PART_SOLIDS[key]
+    except KeyError:
+        raise KeyError(f"Ukjent komponent: {key}") from None
+    return builder(geom)
+
+
+def _canonical(primitive: Primitive, digits: int) -> Tuple[object, ...]:
+    # + 0.0 gjør -0.0 til 0.0 slik at speilede nuller gir samme nøkkel.
+    return (
+        primitive.shape,
+        tuple(round(value, digits) + 0.0 for value in primitive.size),
+        tuple(round(value, digits) + 0.0 for value in primitive.center),
+        round(primitive.angle_deg % 360.0, digits) + 0.0,
+    )
+
+
+def geometry_key(solids: Iterable[SolidSpec], digits: int = 6) -> str:
+    """Kanonisk nøkkel for formen til ``solids``, uavhengig av kroppsnavn.
+
+    Mål avrundes til ``digits`` desimaler (mm), slik at flyttallsstøy fra
+    avledede mål ikke skiller ellers like deler.
+    """
+
+    canonical = tuple(
+        (
+            tuple(_canonical(primitive, digits) for primitive in spec.add),
+            tuple(_canonical(primitive, digits) for primitive in spec.subtract),
+        )
+        for spec in solids
+    )
+    return hashlib.sha1(repr(canonical).encode("utf-8")).hexdigest()[:16]
+
+
+def shared_definitions(
+    geom: Mapping[str, float],
+    keys: Iterable[str],
+    materials: Optional[Mapping[str, str]] = None,
+) -> Dict[str, str]:
+    """``{komponent: komponenten som eier definisjonen}`` for ``keys`` i rekkefølge.
+
+    Første komponent med en gitt ``geometry_key`` (og samme materiale i
+    ``materials``) eier definisjonen; senere like komponenter peker på den.
+    """
+
+    owners: Dict[str, str] = {}
+    first_by_key: Dict[Tuple[str, str], str] = {}
+    for key in keys:
+        signature = (geometry_key(part_solids(key, geom)), (materials or {}).get(key, ""))
+        owners[key] = first_by_key.setdefault(signature, key)
+    return owners
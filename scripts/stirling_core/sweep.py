@@ -0,0 +1,199 @@
+# ID: codex_fusionapi_v1.9
+"""Vektorisert designsweep over PARAMETER_DEFINITIONS (krever numpy).
+
+En sweep er et kartesisk produkt av verdier for utvalgte parametre; alle
+andre parametre holdes på standardverdien. Resultatet er kolonnebasert:
+én numpy-array per parameter og per nøkkeltall, slik at millioner av
+varianter kan evalueres uten en Python-løkke per variant.
+
+Kjør ``python -m scripts.stirling_core.sweep`` fra repo-roten for en
+benchmark (varianter per sekund).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from scripts.stirling_core import engine
+from scripts.stirling_core.parameters import parameter_values
+
+Column = Union[float, np.ndarray]
+
+DEFAULT_SWEEP_AXES = ("STROKE", "ID_WORK", "CR_TARGET", "DISPLACER_OFFSET")
+
+RESULT_COLUMNS = (
+    "work_clearance",
+    "piston_diameter",
+    "displacer_diameter",
+    "area_mm2",
+    "stroke_volume_cm3",
+    "dead_volume_cm3",
+    "cr_estimate",
+)
+
+
+def parameter_grid(
+    axes: Mapping[str, Sequence[float]],
+    base: Optional[Mapping[str, float]] = None,
+) -> Dict[str, Column]:
+    """Bygg kolonnene for det kartesiske produktet av ``axes``.
+
+    Parametre som ikke sweepes beholdes som skalarer og kringkastes først
+    når de brukes, slik at minnebruken kun vokser med antall sweepakser.
+    """
+
+    columns: Dict[str, Column] = dict(parameter_values(base))
+    unknown = sorted(name for name in axes if name not in columns)
+    if unknown:
+        raise KeyError(f"Ukjente parametre: {', '.join(unknown)}")
+    names = list(axes)
+    grids = np.meshgrid(
+        *(np.asarray(axes[name], dtype=np.float64) for name in names), indexing="ij"
+    )
+    for name, grid in zip(names, grids):
+        columns[name] = grid.ravel()
+    return columns
+
+
+def variant_count(columns: Mapping[str, Column]) -> int:
+    sizes = {np.size(value) for value in columns.values() if np.ndim(value) > 0}
+    if len(sizes) > 1:
+        raise ValueError(f"Kolonnene har ulik lengde: {sorted(sizes)}")
+    return sizes.pop() if sizes else 1
+
+
+def _evaluate_block(columns: Mapping[str, Column]) -> Dict[str, np.ndarray]:
+    # Samme formler som engine.compute_geometry_inputs/compute_performance_metrics,
+    # men med numpy-operasjoner i stedet for max() per variant.
+    work_clearance = 0.5 * (columns["CLEAR_MIN"] + columns["CLEAR_MAX"])
+    piston_diameter = columns["ID_WORK"] - 2 * work_clearance
+    displacer_diameter = columns["ID_DISP"] - 2 * work_clearance
+
+    area_mm2 = np.pi * (np.asarray(columns["ID_WORK"]) / 2.0) ** 2
+    stroke_volume_cm3 = (area_mm2 * columns["STROKE"]) / 1000.0
+    divisor = np.maximum(np.asarray(columns["CR_TARGET"]) - 1.0, 0.01)
+    dead_volume_cm3 = np.where(stroke_volume_cm3 > 0, stroke_volume_cm3 / divisor, 0.0)
+    safe_dead_volume = np.maximum(dead_volume_cm3, 1e-9)
+    cr_estimate = (stroke_volume_cm3 + safe_dead_volume) / safe_dead_volume
+    return {
+        "work_clearance": work_clearance,
+        "piston_diameter": piston_diameter,
+        "displacer_diameter": displacer_diameter,
+        "area_mm2": area_mm2,
+        "stroke_volume_cm3": stroke_volume_cm3,
+        "dead_volume_cm3": dead_volume_cm3,
+        "cr_estimate": cr_estimate,
+    }
+
+
+def sweep_design(
+    columns: Mapping[str, Column], chunk_size: int = 1_000_000
+) -> Dict[str, np.ndarray]:
+    """Evaluer avledet geometri og nøkkeltall for alle varianter i ``columns``.
+
+    Returnerer én array med lengde ``variant_count(columns)`` per kolonne i
+    ``RESULT_COLUMNS``. Store sweeps evalueres i blokker på ``chunk_size``
+    for å holde midlertidige arrays små.
+    """
+
+    count = variant_count(columns)
+    result = {name: np.empty(count, dtype=np.float64) for name in RESULT_COLUMNS}
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        block = {
+            name: value[start:stop] if np.ndim(value) > 0 else value
+            for name, value in columns.items()
+        }
+        for name, values in _evaluate_block(block).items():
+            result[name][start:stop] = values
+    return result
+
+
+def geometry_columns(columns: Mapping[str, Column]) -> Dict[str, Column]:
+    """Oversett parameterkolonner til ``geom``-nøkler (f.eks. for ``thermo``)."""
+
+    pairs = engine.GEOMETRY_PARAMETERS + engine.OPERATING_PARAMETERS + engine.PATTERN_PARAMETERS
+    return {key: columns[name] for key, name in pairs}
+
+
+def check_against_engine(
+    columns: Mapping[str, Column], result: Mapping[str, np.ndarray], samples: int = 64
+) -> float:
+    """Sammenlign et utvalg varianter med engine og returner største avvik."""
+
+    count = variant_count(columns)
+    worst = 0.0
+    for index in np.linspace(0, count - 1, num=min(samples, count), dtype=np.int64):
+        values = {
+            name: float(value[index]) if np.ndim(value) > 0 else float(value)
+            for name, value in columns.items()
+        }
+        geom = engine.compute_geometry_inputs(values)
+        reference = dict(geom, **engine.compute_performance_metrics(values, geom))
+        for name in RESULT_COLUMNS:
+            worst = max(worst, abs(reference[name] - float(result[name][index])))
+    return worst
+
+
+def default_axes(points: int) -> Dict[str, np.ndarray]:
+    """Standardgrid for designgjennomganger med ``points`` verdier per akse."""
+
+    return {
+        "STROKE": np.linspace(10.0, 25.0, points),
+        "ID_WORK": np.linspace(40.0, 80.0, points),
+        "CR_TARGET": np.linspace(1.1, 2.0, points),
+        "DISPLACER_OFFSET": np.linspace(60.0, 120.0, points),
+    }
+
+
+def benchmark(points: int = 40, repeats: int = 3) -> Dict[str, float]:
+    """Mål varianter per sekund for en sweep med ``points**4`` varianter."""
+
+    columns = parameter_grid(default_axes(points))
+    count = variant_count(columns)
+    best = float("inf")
+    result: Dict[str, np.ndarray] = {}
+    for _ in range(max(repeats, 1)):
+        started = time.perf_counter()
+        result = sweep_design(columns)
+        best = min(best, time.perf_counter() - started)
+
+    loop_count = min(count, 20_000)
+    started = time.perf_counter()
+    for index in range(loop_count):
+        values = {
+            name: float(value[index]) if np.ndim(value) > 0 else float(value)
+            for name, value in columns.items()
+        }
+        geom = engine.compute_geometry_inputs(values)
+        engine.compute_performance_metrics(values, geom)
+    loop_rate = loop_count / (time.perf_counter() - started)
+
+    return {
+        "variants": float(count),
+        "seconds": best,
+        "variants_per_second": count / best if best > 0 else float("inf"),
+        "loop_variants_per_second": loop_rate,
+        "max_deviation": check_against_engine(columns, result),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark for vektorisert designsweep.")
+    parser.add_argument("--points", type=int, default=40, help="Verdier per sweepakse.")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    stats = benchmark(args.points, args.repeats)
+    print(f"Varianter: {stats['variants']:.0f} ({', '.join(DEFAULT_SWEEP_AXES)})")
+    print(f"Vektorisert: {stats['seconds']:.3f} s = {stats['variants_per_second']:,.0f} varianter/s")
+    print(f"Python-løkke via engine: {stats['loop_variants_per_second']:,.0f} varianter/s")
+    print(f"Største avvik mot engine: {stats['max_deviation']:.3e}")
+
+
+if __name__ == "__main__":
+    main()
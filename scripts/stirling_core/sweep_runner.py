@@ -0,0 +1,235 @@
+# ID: codex_fusionapi_v1.9
+"""Shardet, gjenopptakbar sweep over flere prosessorkjerner.
+
+Brukes for sjekker som ikke lar seg vektorisere i ``sweep.py``: layout,
+klaringer og produksjonsgrenser. Parameterrommet (kartesisk produkt av
+``SweepSpec.axes``) deles i shards med faste indeksområder. Hver shard
+evalueres i en egen prosess og skrives atomisk til
+``<checkpoint_dir>/shard_<n>.jsonl``; en avbrutt kjøring hopper over
+shards som allerede finnes når den startes på nytt.
+
+Kjør ``python -m scripts.stirling_core.sweep_runner --help`` fra repo-roten.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from scripts.shared.config_loader import PROJECT_ROOT, load_machine_park, load_material_catalog
+from scripts.stirling_core import engine
+from scripts.stirling_core.layout import build_layout_table, resolve_layout_table
+from scripts.stirling_core.parameters import parameter_values
+
+DEFAULT_CHECKPOINT_DIR = PROJECT_ROOT / "sim" / "sweeps"
+MANIFEST_NAME = "manifest.json"
+
+# Konfigurasjonen lastes én gang per arbeidsprosess (se _init_worker).
+_WORKER_CONFIG: Dict[str, Any] = {}
+
+
+@dataclass
+class SweepSpec:
+    axes: Dict[str, Tuple[float, ...]]
+    base: Dict[str, float] = field(default_factory=dict)
+    shard_size: int = 5000
+
+    def __post_init__(self) -> None:
+        self.axes = {name: tuple(float(v) for v in values) for name, values in self.axes.items()}
+        self.base = {name: float(value) for name, value in self.base.items()}
+        if self.shard_size < 1:
+            raise ValueError("shard_size må være minst 1.")
+        parameter_values(dict(self.base, **{name: 0.0 for name in self.axes}))
+
+    @property
+    def variant_count(self) -> int:
+        count = 1
+        for values in self.axes.values():
+            count *= len(values)
+        return count
+
+    @property
+    def shard_count(self) -> int:
+        return -(-self.variant_count // self.shard_size)
+
+    def shard_range(self, shard: int) -> range:
+        start = shard * self.shard_size
+        return range(start, min(start + self.shard_size, self.variant_count))
+
+    def fingerprint(self) -> str:
+        payload = json.dumps(asdict(self), sort_keys=True).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def variant(self, index: int) -> Dict[str, float]:
+        """Parametertabell for variant nr. ``index`` (siste akse varierer raskest)."""
+
+        overrides = dict(self.base)
+        for name in reversed(list(self.axes)):
+            values = self.axes[name]
+            index, position = divmod(index, len(values))
+            overrides[name] = values[position]
+        return parameter_values(overrides)
+
+
+def evaluate_variant(
+    values: Mapping[str, float],
+    machine_cfg: Mapping[str, Mapping[str, Any]],
+    material_db: Sequence[Mapping[str, Any]],
+) -> Dict[str, Any]:
+    """Kjør layout-, klarings- og produksjonssjekkene for én variant."""
+
+    geom = engine.compute_geometry_inputs(values)
+    metrics = engine.compute_performance_metrics(values, geom)
+    row: Dict[str, Any] = {"metrics": metrics}
+    try:
+        row["clearances"] = engine.evaluate_clearances(values, geom)
+        row["clearance_ok"] = True
+    except engine.BuilderError as error:
+        row["clearances"] = {}
+        row["clearance_ok"] = False
+        row["clearance_error"] = str(error)
+    row["production"] = engine.evaluate_production(geom, machine_cfg, material_db)
+    # Ugyldige antall (``primitives``) og en layout uten ledig plass
+    # (``packing``) gir ValueError; varianten registreres i stedet for å
+    # felle hele shardet.
+    try:
+        resolved = resolve_layout_table(build_layout_table(values, geom))
+        row["layout"] = {name: list(entry.origin) for name, entry in resolved.items()}
+        row["layout_ok"] = True
+    except ValueError as error:
+        row["layout"] = {}
+        row["layout_ok"] = False
+        row["layout_error"] = str(error)
+    return row
+
+
+def _init_worker() -> None:
+    _WORKER_CONFIG["machines"] = load_machine_park()
+    _WORKER_CONFIG["materials"] = load_material_catalog()
+
+
+def _run_shard(spec: SweepSpec, shard: int, checkpoint_dir: str) -> Tuple[int, int]:
+    if not _WORKER_CONFIG:
+        _init_worker()
+    machines = _WORKER_CONFIG["machines"]
+    materials = _WORKER_CONFIG["materials"]
+    lines: List[str] = []
+    for index in spec.shard_range(shard):
+        values = spec.variant(index)
+        row = evaluate_variant(values, machines, materials)
+        row["index"] = index
+        row["params"] = {name: values[name] for name in spec.axes}
+        lines.append(json.dumps(row, sort_keys=True))
+
+    target = Path(checkpoint_dir) / f"shard_{shard:06d}.jsonl"
+    tmp_path = target.with_suffix(".tmp")
+    tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp_path, target)
+    return shard, len(lines)
+
+
+def _prepare_checkpoint_dir(spec: SweepSpec, checkpoint_dir: Path) -> None:
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = checkpoint_dir / MANIFEST_NAME
+    manifest = {"fingerprint": spec.fingerprint(), "spec": asdict(spec)}
+    if manifest_path.exists():
+        existing = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if existing.get("fingerprint") != manifest["fingerprint"]:
+            raise ValueError(
+                f"{checkpoint_dir} inneholder en annen sweep ({existing.get('fingerprint')}); "
+                "velg en ny katalog."
+            )
+        return
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def completed_shards(checkpoint_dir: Path) -> List[int]:
+    return sorted(int(path.stem.split("_")[1]) for path in checkpoint_dir.glob("shard_*.jsonl"))
+
+
+def run_sweep(
+    spec: SweepSpec,
+    checkpoint_dir: Optional[Path] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, float]:
+    """Evaluer alle shards som mangler i ``checkpoint_dir`` og returner statistikk."""
+
+    checkpoint_dir = Path(checkpoint_dir or DEFAULT_CHECKPOINT_DIR / spec.fingerprint())
+    _prepare_checkpoint_dir(spec, checkpoint_dir)
+    done = set(completed_shards(checkpoint_dir))
+    pending = [shard for shard in range(spec.shard_count) if shard not in done]
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    evaluated = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_run_shard, spec, shard, str(checkpoint_dir)) for shard in pending]
+            for future in as_completed(futures):
+                _, count = future.result()
+                evaluated += count
+    elapsed = time.perf_counter() - started
+    return {
+        "shards_total": float(spec.shard_count),
+        "shards_skipped": float(len(done)),
+        "variants_evaluated": float(evaluated),
+        "seconds": elapsed,
+        "variants_per_second": evaluated / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def load_results(checkpoint_dir: Path) -> Iterator[Dict[str, Any]]:
+    """Les alle rader fra fullførte shards i indeksrekkefølge."""
+
+    for shard in completed_shards(Path(checkpoint_dir)):
+        path = Path(checkpoint_dir) / f"shard_{shard:06d}.jsonl"
+        with path.open(encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _linspace(start: float, stop: float, points: int) -> Tuple[float, ...]:
+    if points == 1:
+        return (start,)
+    step = (stop - start) / (points - 1)
+    return tuple(start + step * i for i in range(points))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Shardet sweep med sjekkpunkter på disk.")
+    parser.add_argument("--points", type=int, default=12, help="Verdier per sweepakse.")
+    parser.add_argument("--shard-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", type=Path, default=None, help="Katalog for sjekkpunkter.")
+    args = parser.parse_args(argv)
+
+    spec = SweepSpec(
+        axes={
+            "STROKE": _linspace(10.0, 25.0, args.points),
+            "CLEAR_MIN": _linspace(0.05, 0.3, args.points),
+            "BASE_LENGTH": _linspace(200.0, 360.0, args.points),
+            "OD_WORK": _linspace(65.0, 190.0, args.points),
+        },
+        shard_size=args.shard_size,
+    )
+    stats = run_sweep(spec, args.out, args.workers)
+    print(
+        f"Sweep {spec.fingerprint()}: {spec.variant_count} varianter i {spec.shard_count} shards, "
+        f"{stats['shards_skipped']:.0f} hoppet over (sjekkpunkt)."
+    )
+    print(
+        f"Evaluerte {stats['variants_evaluated']:.0f} varianter på {stats['seconds']:.2f} s "
+        f"= {stats['variants_per_second']:,.0f} varianter/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# ID: codex_fusionapi_v1.9
+"""Isoterm Schmidt-analyse for gamma-motoren (krever numpy).
+
+Volumene følger Schmidt-teorien for gamma-konfigurasjonen:
+
+- ekspansjonsrom: ``VE = VSE/2 (1 - cos x) + VDE``
+- kompresjonsrom: ``VC = VSE/2 (1 + cos x) + VSC/2 (1 - cos(x - dx)) + VDC``
+- regenerator ``VR`` ved ``TR = (TE - TC) / ln(TE / TC)``
+
+og trykket er ``p = mR / (VE/TE + VR/TR + VC/TC)`` der ``mR`` skaleres slik
+at syklusens middeltrykk blir ``mean_pressure_pa``. Fortrenger og
+arbeidsstempel deler veivtapp, så faseforskyvningen ``dx`` er vinkelen
+mellom sylindrene (``ANGLE_CYL``).
+
+Alle størrelser kan være skalarer eller arrays med én verdi per design;
+kurvene beregnes som (design × vinkel)-matriser i blokker.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Column = Union[float, np.ndarray]
+
+ATMOSPHERE_PA = 101325.0
+DEFAULT_RPM = 600.0
+DEFAULT_ANGLE_STEPS = 3600
+# Fordeling av dødvolumet på (varm side, regenerator, kald side).
+DEFAULT_DEAD_VOLUME_SPLIT = (1.0 / 3.0, 1.0 / 3.0, 1.0 / 3.0)
+
+MM3_TO_M3 = 1e-9
+CM3_TO_M3 = 1e-6
+
+
+def phase_angle_deg(geom: Mapping[str, Column]) -> Column:
+    """Faseforskyvning mellom fortrenger og arbeidsstempel (felles veivtapp)."""
+
+    return geom["angle_cyl"]
+
+
+def _coefficients(
+    geom: Mapping[str, Column],
+    dead_volume_cm3: Column,
+    dead_volume_split: Tuple[float, float, float],
+) -> Dict[str, np.ndarray]:
+    # VE/TE + VR/TR + VC/TC skrives som K0 + Kc·cos x + Ks·sin x, og dVE/dx,
+    # dVC/dx som lineære kombinasjoner av sin x og cos x. Da kan alle kurver
+    # bygges av to felles vinkelvektorer og noen få koeffisienter per design.
+    stroke = np.asarray(geom["stroke"], dtype=np.float64)
+    vse = np.pi / 4.0 * np.asarray(geom["id_disp"]) ** 2 * stroke * MM3_TO_M3
+    vsc = np.pi / 4.0 * np.asarray(geom["id_work"]) ** 2 * stroke * MM3_TO_M3
+    dead = np.asarray(dead_volume_cm3, dtype=np.float64) * CM3_TO_M3
+    hot_share, regen_share, cold_share = dead_volume_split
+    vde, vr, vdc = dead * hot_share, dead * regen_share, dead * cold_share
+
+    te = np.asarray(geom["hot_end_temp"], dtype=np.float64) + 273.15
+    tc = np.asarray(geom["cold_end_temp"], dtype=np.float64) + 273.15
+    if np.any(te <= tc):
+        raise ValueError("HOT_END_TEMP må være høyere enn COLD_END_TEMP.")
+    tr = (te - tc) / np.log(te / tc)
+
+    dx = np.radians(np.asarray(phase_angle_deg(geom), dtype=np.float64))
+    cos_dx, sin_dx = np.cos(dx), np.sin(dx)
+
+    k0 = (vse / 2.0 + vde) / te + vr / tr + (vse / 2.0 + vsc / 2.0 + vdc) / tc
+    kc = -vse / (2.0 * te) + (vse / 2.0 - vsc / 2.0 * cos_dx) / tc
+    ks = -(vsc / 2.0 * sin_dx) / tc
+    return {
+        "vse": vse,
+        "vsc": vsc,
+        "vde": vde,
+        "vdc": vdc,
+        "k0": k0,
+        "kc": kc,
+        "ks": ks,
+        "cos_dx": cos_dx,
+        "sin_dx": sin_dx,
+    }
+
+
+def schmidt_performance(
+    geom: Mapping[str, Column],
+    dead_volume_cm3: Column,
+    mean_pressure_pa: Column = ATMOSPHERE_PA,
+    rpm: Column = DEFAULT_RPM,
+    steps: int = DEFAULT_ANGLE_STEPS,
+    dead_volume_split: Tuple[float, float, float] = DEFAULT_DEAD_VOLUME_SPLIT,
+    chunk_size: int = 2048,
+) -> Dict[str, np.ndarray]:
+    """Indikert arbeid, effekt og trykkgrenser for ett eller mange design.
+
+    Returnerer arrays med én verdi per design: ``work_j``,
+    ``expansion_work_j``, ``compression_work_j``, ``power_w``,
+    ``efficiency``, ``pressure_min_pa`` og ``pressure_max_pa``.
+    """
+
+    coeffs = _coefficients(geom, dead_volume_cm3, dead_volume_split)
+    shape = np.broadcast(
+        *(np.asarray(value) for value in coeffs.values()),
+        np.asarray(mean_pressure_pa),
+        np.asarray(rpm),
+    ).shape
+    count = int(np.prod(shape)) if shape else 1
+    flat = {key: np.broadcast_to(value, shape).reshape(count) for key, value in coeffs.items()}
+    mean_pressure = np.broadcast_to(np.asarray(mean_pressure_pa, dtype=np.float64), shape).reshape(count)
+
+    theta = np.linspace(0.0, 2.0 * np.pi, steps, endpoint=False)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    d_theta = 2.0 * np.pi / steps
+
+    names = (
+        "expansion_work_j",
+        "compression_work_j",
+        "pressure_min_pa",
+        "pressure_max_pa",
+    )
+    out = {name: np.empty(count, dtype=np.float64) for name in names}
+    for start in range(0, count, chunk_size):
+        block = slice(start, min(start + chunk_size, count))
+        k0 = flat["k0"][block, None]
+        kc = flat["kc"][block, None]
+        ks = flat["ks"][block, None]
+        inverse = 1.0 / (k0 + kc * cos_t + ks * sin_t)
+        mass_r = mean_pressure[block] / inverse.mean(axis=1)
+        pressure = inverse * mass_r[:, None]
+
+        vse = flat["vse"][block, None]
+        vsc = flat["vsc"][block, None]
+        sin_shift = sin_t * flat["cos_dx"][block, None] - cos_t * flat["sin_dx"][block, None]
+        d_ve = vse / 2.0 * sin_t
+        d_vc = -vse / 2.0 * sin_t + vsc / 2.0 * sin_shift
+        # Periodisk integrand på uniformt grid: rektangelregelen er spektralt nøyaktig.
+        out["expansion_work_j"][block] = (pressure * d_ve).sum(axis=1) * d_theta
+        out["compression_work_j"][block] = (pressure * d_vc).sum(axis=1) * d_theta
+        out["pressure_min_pa"][block] = pressure.min(axis=1)
+        out["pressure_max_pa"][block] = pressure.max(axis=1)
+
+    work = out["expansion_work_j"] + out["compression_work_j"]
+    rpm_flat = np.broadcast_to(np.asarray(rpm, dtype=np.float64), shape).reshape(count)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        efficiency = np.where(out["expansion_work_j"] != 0, work / out["expansion_work_j"], 0.0)
+    result = dict(out)
+    result["work_j"] = work
+    result["power_w"] = work * rpm_flat / 60.0
+    result["efficiency"] = efficiency
+    return {key: value.reshape(shape) for key, value in result.items()}
+
+
+def schmidt_cycle(
+    geom: Mapping[str, float],
+    dead_volume_cm3: float,
+    mean_pressure_pa: float = ATMOSPHERE_PA,
+    steps: int = DEFAULT_ANGLE_STEPS,
+    dead_volume_split: Tuple[float, float, float] = DEFAULT_DEAD_VOLUME_SPLIT,
+) -> Dict[str, np.ndarray]:
+    """Full syklus for ett design: vinkel, volumer (cm³) og trykk (Pa)."""
+
+    coeffs = _coefficients(geom, dead_volume_cm3, dead_volume_split)
+    theta = np.linspace(0.0, 2.0 * np.pi, steps, endpoint=False)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    cos_shift = cos_t * coeffs["cos_dx"] + sin_t * coeffs["sin_dx"]
+    ve = coeffs["vse"] / 2.0 * (1.0 - cos_t) + coeffs["vde"]
+    vc = coeffs["vse"] / 2.0 * (1.0 + cos_t) + coeffs["vsc"] / 2.0 * (1.0 - cos_shift) + coeffs["vdc"]
+    inverse = 1.0 / (coeffs["k0"] + coeffs["kc"] * cos_t + coeffs["ks"] * sin_t)
+    pressure = inverse * (mean_pressure_pa / inverse.mean())
+    return {
+        "theta_deg": np.degrees(theta),
+        "volume_expansion_cm3": ve / CM3_TO_M3,
+        "volume_compression_cm3": vc / CM3_TO_M3,
+        "volume_total_cm3": (ve + vc) / CM3_TO_M3,
+        "pressure_pa": pressure,
+    }
+
+
+def benchmark(designs: int = 10_000, steps: int = DEFAULT_ANGLE_STEPS) -> Dict[str, float]:
+    """Mål tiden for ``designs`` design à ``steps`` vinkelpunkter."""
+
+    rng = np.random.default_rng(0)
+    geom = {
+        "id_work": rng.uniform(40.0, 80.0, designs),
+        "id_disp": rng.uniform(40.0, 80.0, designs),
+        "stroke": rng.uniform(10.0, 25.0, designs),
+        "angle_cyl": rng.uniform(60.0, 120.0, designs),
+        "hot_end_temp": rng.uniform(300.0, 700.0, designs),
+        "cold_end_temp": rng.uniform(20.0, 80.0, designs),
+    }
+    dead_volume = rng.uniform(20.0, 150.0, designs)
+    started = time.perf_counter()
+    result = schmidt_performance(geom, dead_volume, steps=steps)
+    elapsed = time.perf_counter() - started
+    carnot = 1.0 - (geom["cold_end_temp"] + 273.15) / (geom["hot_end_temp"] + 273.15)
+    return {
+        "designs": float(designs),
+        "steps": float(steps),
+        "seconds": elapsed,
+        "designs_per_second": designs / elapsed if elapsed > 0 else float("inf"),
+        "max_carnot_deviation": float(np.max(np.abs(result["efficiency"] - carnot))),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark for vektorisert Schmidt-analyse.")
+    parser.add_argument("--designs", type=int, default=10_000)
+    parser.add_argument("--steps", type=int, default=DEFAULT_ANGLE_STEPS)
+    args = parser.parse_args(argv)
+
+    stats = benchmark(args.designs, args.steps)
+    print(
+        f"Schmidt: {stats['designs']:.0f} design × {stats['steps']:.0f} vinkler på "
+        f"{stats['seconds']:.2f} s = {stats['designs_per_second']:,.0f} design/s"
+    )
+    print(f"Største avvik fra Carnot-virkningsgrad: {stats['max_carnot_deviation']:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# ID: codex_fusionapi_v1.9
+"""Transformtre for layouttabellen med hurtigbufrede verdensmatriser.
+
+Hver layoutpost har en lokal transform (``origin`` i mm og ``orientation``
+som Euler-vinkler i grader, rotert om x, så y, så z) relativt til
+forelderen. Verdensmatrisen er forelderens verdensmatrise ganget med den
+lokale, slik at nestede rotasjoner blir riktige. ``TransformTree`` husker
+verdensmatrisene og forkaster kun undertreet til poster som endres, så
+en oppdatering av én post i en stor sammenstilling koster like mye som
+undertreet dens.
+
+Matrisene er 4×4 radvis (16 tall) med translasjon i siste kolonne, samme
+oppsett som ``Matrix3D.asArray()`` i Fusion. Modulen er ren Python slik at
+den kan brukes i Fusion uten numpy.
+
+Kjør ``python -m scripts.stirling_core.transforms`` for en benchmark.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+Matrix = Tuple[float, ...]
+Vector = Tuple[float, float, float]
+
+IDENTITY: Matrix = (
+    1.0, 0.0, 0.0, 0.0,
+    0.0, 1.0, 0.0, 0.0,
+    0.0, 0.0, 1.0, 0.0,
+    0.0, 0.0, 0.0, 1.0,
+)
+
+_DIGITS = 9
+
+
+def multiply(a: Matrix, b: Matrix) -> Matrix:
+    """``a · b`` for affine 4×4-matriser (siste rad er alltid 0 0 0 1)."""
+
+    return (
+        a[0] * b[0] + a[1] * b[4] + a[2] * b[8],
+        a[0] * b[1] + a[1] * b[5] + a[2] * b[9],
+        a[0] * b[2] + a[1] * b[6] + a[2] * b[10],
+        a[0] * b[3] + a[1] * b[7] + a[2] * b[11] + a[3],
+        a[4] * b[0] + a[5] * b[4] + a[6] * b[8],
+        a[4] * b[1] + a[5] * b[5] + a[6] * b[9],
+        a[4] * b[2] + a[5] * b[6] + a[6] * b[10],
+        a[4] * b[3] + a[5] * b[7] + a[6] * b[11] + a[7],
+        a[8] * b[0] + a[9] * b[4] + a[10] * b[8],
+        a[8] * b[1] + a[9] * b[5] + a[10] * b[9],
+        a[8] * b[2] + a[9] * b[6] + a[10] * b[10],
+        a[8] * b[3] + a[9] * b[7] + a[10] * b[11] + a[11],
+        0.0, 0.0, 0.0, 1.0,
+    )
+
+
+def local_matrix(origin: Sequence[float], orientation: Sequence[float]) -> Matrix:
+    """Translasjon ``origin`` etter rotasjon ``Rz · Ry · Rx`` (grader)."""
+
+    ax, ay, az = (math.radians(angle) for angle in orientation)
+    cx, sx = math.cos(ax), math.sin(ax)
+    cy, sy = math.cos(ay), math.sin(ay)
+    cz, sz = math.cos(az), math.sin(az)
+    return (
+        cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx, float(origin[0]),
+        sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx, float(origin[1]),
+        -sy, cy * sx, cy * cx, float(origin[2]),
+        0.0, 0.0, 0.0, 1.0,
+    )
+
+
+def translation(matrix: Matrix) -> Vector:
+    return (_clean(matrix[3]), _clean(matrix[7]), _clean(matrix[11]))
+
+
+def euler_angles(matrix: Matrix) -> Vector:
+    """Euler-vinkler (grader) slik at ``local_matrix(o, vinkler)`` gir samme rotasjon."""
+
+    sy = -matrix[8]
+    if abs(sy) < 1.0 - 1e-12:
+        ax = math.atan2(matrix[9], matrix[10])
+        ay = math.asin(sy)
+        az = math.atan2(matrix[4], matrix[0])
+    else:
+        # Gimbal lock: rotasjonen om x og z faller sammen; legg alt på z.
+        ax = 0.0
+        ay = math.copysign(math.pi / 2.0, sy)
+        az = math.atan2(-matrix[1], matrix[5])
+    return (_clean(math.degrees(ax)), _clean(math.degrees(ay)), _clean(math.degrees(az)))
+
+
+def _clean(value: float) -> float:
+    # + 0.0 gjør -0.0 til 0.0; avrunding fjerner støy fra cos/sin av 90°.
+    return round(value, _DIGITS) + 0.0
+
+
+class TransformTree:
+    """Verdensmatriser for poster med ``origin``, ``orientation`` og ``parent``.
+
+    Poster med ukjent forelder behandles som røtter. Sykler gir
+    ``ValueError``.
+    """
+
+    def __init__(self, entries: Optional[Mapping[str, Any]] = None) -> None:
+        self._source: Dict[str, Tuple[Vector, Vector, Optional[str]]] = {}
+        self._local: Dict[str, Matrix] = {}
+        self._parent: Dict[str, Optional[str]] = {}
+        self._children: Dict[Optional[str], Set[str]] = {}
+        self._world: Dict[str, Matrix] = {}
+        self._dirty: Set[str] = set()
+        if entries:
+            self.update(entries)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._local
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+    def names(self) -> List[str]:
+        return list(self._local)
+
+    def set_entry(
+        self,
+        name: str,
+        origin: Sequence[float],
+        orientation: Sequence[float],
+        parent: Optional[str] = None,
+    ) -> bool:
+        """Sett lokal transform og forelder; ``True`` hvis noe endret seg."""
+
+        source = (tuple(origin), tuple(orientation), parent)
+        if self._source.get(name) == source:
+            return False
+        if name in self._parent:
+            self._children.get(self._parent[name], set()).discard(name)
+        self._source[name] = source  # type: ignore[assignment]
+        self._local[name] = local_matrix(origin, orientation)
+        self._parent[name] = parent
+        self._children.setdefault(parent, set()).add(name)
+        self._invalidate(name)
+        return True
+
+    def remove(self, name: str) -> None:
+        if name not in self._local:
+            return
+        self._invalidate(name)
+        self._children.get(self._parent.pop(name), set()).discard(name)
+        del self._local[name]
+        del self._source[name]
+        self._dirty.discard(name)
+
+    def update(self, entries: Mapping[str, Any]) -> Set[str]:
+        """Synkroniser med ``entries``; returner alle poster med endret verdensmatrise."""
+
+        for name in [name for name in self._local if name not in entries]:
+            self.remove(name)
+        before = set(self._dirty)
+        for name, entry in entries.items():
+            self.set_entry(name, entry.origin, entry.orientation, entry.parent)
+        return self._dirty - before
+
+    def _invalidate(self, name: str) -> None:
+        stack = [name]
+        seen: Set[str] = set()
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            self._world.pop(current, None)
+            self._dirty.add(current)
+            stack.extend(self._children.get(current, ()))
+
+    def world(self, name: str) -> Matrix:
+        cached = self._world.get(name)
+        if cached is not None:
+            return cached
+        # Gå opp til første forfar med kjent verdensmatrise, og ned igjen.
+        chain: List[str] = []
+        current: Optional[str] = name
+        seen: Set[str] = set()
+        while current is not None and current in self._local and current not in self._world:
+            if current in seen:
+                raise ValueError(f"Syklisk layout: {' -> '.join(chain)}")
+            seen.add(current)
+            chain.append(current)
+            current = self._parent[current]
+        matrix = self._world[current] if current in self._world else IDENTITY
+        for item in reversed(chain):
+            matrix = multiply(matrix, self._local[item])
+            self._world[item] = matrix
+        return matrix
+
+    def world_transforms(self, names: Optional[Iterable[str]] = None) -> Dict[str, Matrix]:
+        return {name: self.world(name) for name in (self._local if names is None else names)}
+
+    def take_dirty(self) -> Set[str]:
+        """Poster endret siden forrige kall (alle første gang)."""
+
+        dirty, self._dirty = self._dirty, set()
+        return dirty & set(self._local)
+
+    def resolved(self, name: str) -> Tuple[Vector, Vector]:
+        """``(origin, orientation)`` i verdenskoordinater."""
+
+        matrix = self.world(name)
+        return translation(matrix), euler_angles(matrix)
+
+
+# --- Benchmark -------------------------------------------------------------
+
+
+class _Entry:
+    __slots__ = ("origin", "orientation", "parent")
+
+    def __init__(self, origin: Vector, orientation: Vector, parent: Optional[str]) -> None:
+        self.origin = origin
+        self.orientation = orientation
+        self.parent = parent
+
+
+def _synthetic_layout(count: int, fanout: int = 4) -> Dict[str, _Entry]:
+    entries: Dict[str, _Entry] = {}
+    for index in range(count):
+        parent = f"p{(index - 1) // fanout}" if index else None
+        entries[f"p{index}"] = _Entry((10.0, 0.0, 2.0), (0.0, 0.0, 15.0 if index % 2 else 0.0), parent)
+    return entries
+
+
+def benchmark(count: int = 500, edits: int = 100) -> Dict[str, float]:
+    entries = _synthetic_layout(count)
+
+    started = time.perf_counter()
+    tree = TransformTree(entries)
+    tree.world_transforms()
+    full_seconds = time.perf_counter() - started
+
+    leaf = f"p{count - 1}"
+    started = time.perf_counter()
+    for step in range(edits):
+        entry = entries[leaf]
+        entries[leaf] = _Entry((10.0 + step, 0.0, 2.0), entry.orientation, entry.parent)
+        tree.update(entries)
+        tree.world_transforms(tree.take_dirty())
+    edit_seconds = time.perf_counter() - started
+
+    return {"entries": float(count), "edits": float(edits), "full_seconds": full_seconds, "edit_seconds": edit_seconds}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark for TransformTree.")
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--edits", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    stats = benchmark(args.entries, args.edits)
+    print(f"Poster: {stats['entries']:.0f}")
+    print(f"Full oppløsning: {stats['full_seconds'] * 1000:.2f} ms")
+    print(
+        f"{stats['edits']:.0f} endringer av én post: {stats['edit_seconds'] * 1000:.2f} ms "
+        f"({stats['edit_seconds'] / stats['edits'] * 1e6:.1f} µs per endring)"
+    )
+
+
+if __name__ == "__main__":
+    main()